@@ -0,0 +1,101 @@
+"""
+Offline benchmark for the generate-then-render pipeline
+Replays recorded LLM responses with simulated latency, so generation (and
+optionally rendering) throughput can be measured without the Gemini API
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent))
+
+from config.render_config import render_config
+from utils.llm_backends import PROBLEM_STATEMENT_MARKER, ReplayBackend
+from utils.response_parser import IncrementalSectionParser
+
+TOPICS = [
+    "Explain Newton's second law F=ma with a visual demonstration showing how force, mass, and acceleration are related.",
+    "Show the structure of a water molecule H2O, including bond angles, polarity, and hydrogen bonding.",
+    "Demonstrate how substances cross the cell membrane through passive and active transport.",
+    "Explain the process of photosynthesis with the chemical equation and light/dark reactions.",
+]
+
+def run_job(backend: ReplayBackend, topic: str, renderer=None) -> dict:
+    """Generate (streaming), validate and optionally render one topic; returns stage timings"""
+    start = time.perf_counter()
+    prompt = f"{PROBLEM_STATEMENT_MARKER}\n{topic}\n\nGenerate the animation."
+    parser = IncrementalSectionParser()
+    code_ready = None
+
+    for chunk in backend.stream(prompt):
+        for name, _ in parser.feed(chunk):
+            if name == 'code':
+                code_ready = time.perf_counter() - start
+    for name, _ in parser.close():
+        if name == 'code' and code_ready is None:
+            code_ready = time.perf_counter() - start
+    generated = time.perf_counter() - start
+
+    code = parser.sections['code']
+    compile(code, '<generated animation>', 'exec')
+
+    rendered = None
+    if renderer is not None:
+        result = renderer.render(code, "GeneratedAnimation")
+        rendered = time.perf_counter() - start if result.success else None
+
+    return {'code_ready': code_ready, 'generated': generated, 'rendered': rendered}
+
+def run(backend: ReplayBackend, jobs: int, workers: int, renderer=None) -> None:
+    """Run jobs over a thread pool and print throughput and mean stage times"""
+    topics = [TOPICS[i % len(TOPICS)] for i in range(jobs)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda topic: run_job(backend, topic, renderer), topics))
+    elapsed = time.perf_counter() - start
+
+    mean = lambda key: sum(r[key] for r in results) / len(results)
+    line = (f"  {workers:2d} worker(s): {elapsed:6.2f}s  {jobs / elapsed:5.2f} animations/s  "
+            f"code ready {mean('code_ready'):.2f}s, full response {mean('generated'):.2f}s")
+    if renderer is not None:
+        rendered = [r['rendered'] for r in results if r['rendered'] is not None]
+        line += f", rendered {len(rendered)}/{jobs}"
+    print(line)
+
+def main():
+    """Benchmark generation throughput at increasing concurrency"""
+    cfg = render_config.llm_config
+    parser = argparse.ArgumentParser(description="Offline generate-then-render benchmark")
+    parser.add_argument("--jobs", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=cfg.replay_latency,
+                        help="Seconds before the first chunk")
+    parser.add_argument("--chunk-delay", type=float, default=cfg.replay_chunk_delay,
+                        help="Seconds between chunks")
+    parser.add_argument("--render", action="store_true", help="Also render each animation with Manim")
+    args = parser.parse_args()
+
+    backend = ReplayBackend(Path(cfg.replay_dir), args.latency, args.chunk_delay, cfg.replay_chunk_size)
+    if not backend.is_available():
+        print(f"❌ No recorded responses in {backend.replay_dir}")
+        return False
+
+    renderer = None
+    if args.render:
+        from utils.render_queue import render_queue
+        renderer = render_queue.renderer
+
+    print(f"⏱️  Generation benchmark: {args.jobs} animations, {len(backend.fixtures)} recorded responses")
+    print(f"   ({args.latency * 1000:.0f} ms to first chunk, {args.chunk_delay * 1000:.0f} ms between "
+          f"{cfg.replay_chunk_size}-character chunks)")
+    print("=" * 88)
+    for workers in (1, 4, 8):
+        run(backend, args.jobs, workers, renderer)
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
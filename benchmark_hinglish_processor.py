@@ -0,0 +1,52 @@
+"""
+Micro-benchmark for HinglishProcessor
+Reports the per-call cost of the text processing that runs before every synthesis,
+both uncached and as a memo hit
+"""
+
+import sys
+import timeit
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent))
+
+from utils.hinglish_processor import HinglishProcessor
+
+SAMPLE_TEXTS = {
+    'short': "Dekho, yeh Newton ka second law hai.",
+    'technical': "Force equals mass times acceleration. Acceleration aur velocity dono vector quantities hain, "
+                 "lekin mass ek scalar hai, isliye photosynthesis jaise terms alag hain.",
+    'devanagari': "देखिए, यहाँ force और acceleration का relation है। अगर mass बढ़ता है तो acceleration कम होता है, "
+                  "क्योंकि force constant है। क्या आप समझिए?",
+}
+
+def bench(label: str, method: str, args, number: int) -> None:
+    """Print the mean cost per call in microseconds, uncached and memoized"""
+    uncached = HinglishProcessor(memo_size=0)
+    memoized = HinglishProcessor()
+    cold = timeit.timeit(lambda: getattr(uncached, method)(*args), number=number) / number * 1e6
+    warm = timeit.timeit(lambda: getattr(memoized, method)(*args), number=number) / number * 1e6
+    print(f"  {label:<36} {cold:9.1f} µs/call {warm:9.1f} µs/call")
+
+def main():
+    """Benchmark each public processing step on representative narration"""
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"⏱️  HinglishProcessor micro-benchmark ({number} calls each)")
+    print("=" * 72)
+    print(f"  {'':<36} {'uncached':>16} {'memo hit':>16}")
+
+    for name, text in SAMPLE_TEXTS.items():
+        print(f"\n📝 {name} ({len(text)} chars)")
+        bench("process_for_tts(xtts)", 'process_for_tts', (text, 'xtts'), number)
+        bench("process_for_tts(gtts)", 'process_for_tts', (text, 'gtts'), number)
+        bench("validate_hinglish_text", 'validate_hinglish_text', (text,), number)
+        bench("detect_language_segments", 'detect_language_segments', (text,), number)
+        bench("romanize_hindi", 'romanize_hindi', (text,), number)
+        bench("enhance_technical_pronunciation", 'enhance_technical_pronunciation', (text,), number)
+
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
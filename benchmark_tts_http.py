@@ -0,0 +1,93 @@
+"""
+Offline benchmark for pooled TTS HTTP sessions
+Runs gTTS and ElevenLabs synthesis against the local mock server, comparing a
+fresh session per request (what gTTS does) with the shared keep-alive pool
+"""
+
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent))
+
+from config.tts_config import tts_config
+from utils.http_pool import HTTPSessionPool
+from utils.mock_tts_server import MockTTSServer
+from utils.voice_manager import GTTSService, ElevenLabsService
+
+SENTENCES = [
+    "Dekho, yeh Newton ka second law hai, jo batata hai ki force equals mass times acceleration hota hai.",
+    "Agar mass constant rahe to acceleration force ke directly proportional hota hai, yeh bahut important hai.",
+    "Velocity ek vector quantity hai, matlab iski direction bhi hoti hai aur magnitude bhi hota hai.",
+    "Momentum mass aur velocity ka product hai, aur collision mein total momentum conserve rehta hai.",
+] * 3
+
+def fresh_session_gtts(text: str, output_path: str, endpoint: str) -> None:
+    """gTTS's own behaviour: a new requests.Session for every text part"""
+    import requests
+    from gtts import gTTS
+    tts = gTTS(text=text, lang='hi')
+    with open(output_path, 'wb') as f:
+        for prepared in tts._prepare_requests():
+            prepared.url = HTTPSessionPool.rebase_url(prepared.url, endpoint)
+            with requests.Session() as session:
+                response = session.send(prepared, timeout=30)
+            f.write(response.content)
+
+def fresh_session_elevenlabs(text: str, output_path: str, endpoint: str) -> None:
+    """One new client per sentence"""
+    import requests
+    with requests.Session() as session:
+        response = session.post(f"{endpoint}/v1/text-to-speech/voice", json={'text': text},
+                                headers={'xi-api-key': 'mock'}, timeout=30)
+    with open(output_path, 'wb') as f:
+        f.write(response.content)
+
+def run(label: str, server: MockTTSServer, synthesize, workers: int) -> float:
+    """Synthesize every sentence and print wall time and connections opened"""
+    output_dir = tempfile.mkdtemp()
+    server.reset_counters()
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda item: synthesize(item[1], os.path.join(output_dir, f"{item[0]}.mp3")),
+                      enumerate(SENTENCES)))
+    elapsed = time.time() - start
+    print(f"  {label:<34} {elapsed:6.2f}s  {len(SENTENCES) / elapsed:6.1f} sentences/s  "
+          f"{server.connections:3d} connections, {server.requests:3d} requests")
+    return elapsed
+
+def main():
+    """Compare fresh sessions with the pooled sessions at 1 and 4 workers"""
+    server = MockTTSServer(connect_delay=0.1, response_delay=0.02).start()
+    cfg = tts_config.http_pool_config
+    cfg.gtts_endpoint = cfg.elevenlabs_endpoint = server.url
+    os.environ.setdefault('ELEVENLABS_API_KEY', 'mock-key')
+
+    print(f"⏱️  TTS HTTP benchmark: {len(SENTENCES)} sentences against {server.url}")
+    print("   (100 ms per new connection, standing in for a TLS handshake; 20 ms per request)")
+    print("=" * 88)
+
+    for workers in (1, 4):
+        print(f"\n🧵 {workers} worker(s)")
+        gtts_service = GTTSService(pool=HTTPSessionPool(pool_size=8, per_host_limit=4))
+        run("gTTS, fresh session per part", server,
+            lambda text, path: fresh_session_gtts(text, path, server.url), workers)
+        run("gTTS, pooled keep-alive", server,
+            lambda text, path: gtts_service.synthesize(text, path, config={'lang': 'hi'}), workers)
+
+        elevenlabs_service = ElevenLabsService(pool=HTTPSessionPool(pool_size=8, per_host_limit=4))
+        run("ElevenLabs, fresh session", server,
+            lambda text, path: fresh_session_elevenlabs(text, path, server.url), workers)
+        run("ElevenLabs, pooled keep-alive", server,
+            lambda text, path: elevenlabs_service.synthesize(text, path, config={}), workers)
+
+    server.stop()
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
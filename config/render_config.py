@@ -0,0 +1,201 @@
+"""
+Render Pipeline Configuration for the Streamlit Animation App
+Sizes the background Manim render queue to the machine it runs on
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+import os
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def _env_int(name: str, default: int, minimum: int = 1) -> int:
+    """Read an integer of at least minimum from the environment, falling back to default"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return max(minimum, int(value))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a non-negative number from the environment, falling back to default"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return default
+
+
+@dataclass
+class RenderQueueConfig:
+    """Configuration for the render job queue and its worker pool"""
+    max_workers: int = 2          # Concurrent manim subprocesses
+    max_queue_depth: int = 8      # Jobs allowed to wait for a worker
+    job_timeout: int = 300        # Seconds before a single render is killed
+    job_retention: int = 3600     # Seconds finished jobs stay pollable
+    progressive: bool = True      # Render a low-res draft first, then the selected quality
+
+@dataclass
+class RenderCacheConfig:
+    """Configuration for the content-addressed render cache"""
+    enabled: bool = True
+    cache_dir: str = str(PROJECT_ROOT / "media" / "videos" / "_render_cache")
+    max_bytes: int = 1024 * 1024 * 1024  # 1 GB of rendered video
+
+@dataclass
+class NarrationPrefetchConfig:
+    """Configuration for synthesizing narration before manim starts"""
+    enabled: bool = True
+    max_workers: int = 8          # Concurrent TTS requests per scene
+
+@dataclass
+class ResponseCacheConfig:
+    """Configuration for the persistent cache of Gemini responses"""
+    enabled: bool = True
+    cache_dir: str = str(PROJECT_ROOT / "media" / "_response_cache")
+    max_bytes: int = 64 * 1024 * 1024   # 64 MB of generated text
+    ttl: int = 7 * 24 * 3600            # Seconds a response stays servable
+
+@dataclass
+class LLMBackendConfig:
+    """Configuration for the LLM that writes the animation code"""
+    backend: str = "gemini"             # "gemini", or "replay" for recorded offline responses
+    model_name: str = "gemini-2.5-flash"
+    replay_dir: str = str(PROJECT_ROOT / "fixtures" / "llm_responses")
+    replay_latency: float = 1.0         # Seconds before the first replayed chunk
+    replay_chunk_delay: float = 0.02    # Seconds between replayed chunks
+    replay_chunk_size: int = 200        # Characters per replayed chunk
+    record_dir: Optional[str] = None    # Save live responses here as replay fixtures
+
+@dataclass
+class PreflightConfig:
+    """Configuration for the dry run that vets scene code before it is queued"""
+    enabled: bool = True
+    timeout: int = 30                   # Seconds before the dry-run worker is killed
+    memory_mb: int = 2048               # Address-space limit for the worker (POSIX only)
+
+@dataclass
+class RepairLoopConfig:
+    """Configuration for sending failing scenes back to the LLM for a fix"""
+    enabled: bool = True
+    max_attempts: int = 3               # LLM repair calls per failure
+    max_traceback_lines: int = 25       # Error lines included in each repair prompt
+
+@dataclass
+class SegmentRenderConfig:
+    """Configuration for rendering one scene as parallel parts"""
+    enabled: bool = True
+    max_segments: int = 0               # Parts per scene; 0 shares the CPU cores among render workers
+    min_segment_seconds: int = 5        # Shorter parts are merged; each part pays manim's startup
+
+@dataclass
+class SegmentCacheConfig:
+    """Configuration for reusing partial movie files across re-renders of an animation"""
+    enabled: bool = True
+    index_path: str = str(PROJECT_ROOT / "media" / "videos" / "_segment_index.sqlite3")
+    max_bytes: int = 2 * 1024 * 1024 * 1024  # 2 GB of partial movie files
+
+
+class RenderServiceConfig:
+    """Main render service configuration
+
+    Every value can be overridden from the environment so the queue can be
+    sized per render box without code changes:
+
+        MANIM_RENDER_WORKERS, MANIM_RENDER_QUEUE_DEPTH,
+        MANIM_RENDER_TIMEOUT, MANIM_RENDER_JOB_RETENTION,
+        MANIM_PROGRESSIVE_RENDER (0 renders the selected quality only),
+        MANIM_RENDER_CACHE (0 disables), MANIM_RENDER_CACHE_DIR,
+        MANIM_RENDER_CACHE_MAX_MB, MANIM_PREFETCH_NARRATION (0 disables),
+        MANIM_PREFETCH_WORKERS, MANIM_RESPONSE_CACHE (0 disables),
+        MANIM_RESPONSE_CACHE_DIR, MANIM_RESPONSE_CACHE_MAX_MB,
+        MANIM_RESPONSE_CACHE_TTL_HOURS, MANIM_LLM_BACKEND, MANIM_LLM_MODEL,
+        MANIM_LLM_REPLAY_DIR, MANIM_LLM_REPLAY_LATENCY_MS,
+        MANIM_LLM_REPLAY_CHUNK_DELAY_MS, MANIM_LLM_RECORD_DIR,
+        MANIM_PREFLIGHT (0 disables), MANIM_PREFLIGHT_TIMEOUT,
+        MANIM_PREFLIGHT_MEMORY_MB, MANIM_REPAIR_LOOP (0 disables),
+        MANIM_REPAIR_ATTEMPTS, MANIM_REPAIR_TRACEBACK_LINES,
+        MANIM_SEGMENT_RENDER (0 renders each scene in one process; needs
+        MANIM_PREFLIGHT), MANIM_SEGMENT_MAX (0 shares the cores among workers),
+        MANIM_SEGMENT_MIN_SECONDS,
+        MANIM_SEGMENT_CACHE (0 re-renders every animation),
+        MANIM_SEGMENT_CACHE_MAX_MB
+    """
+
+    def __init__(self):
+        defaults = RenderQueueConfig()
+        self.queue_config = RenderQueueConfig(
+            max_workers=_env_int('MANIM_RENDER_WORKERS', defaults.max_workers),
+            max_queue_depth=_env_int('MANIM_RENDER_QUEUE_DEPTH', defaults.max_queue_depth),
+            job_timeout=_env_int('MANIM_RENDER_TIMEOUT', defaults.job_timeout),
+            job_retention=_env_int('MANIM_RENDER_JOB_RETENTION', defaults.job_retention),
+            progressive=os.getenv('MANIM_PROGRESSIVE_RENDER', '1') != '0',
+        )
+
+        cache_defaults = RenderCacheConfig()
+        self.cache_config = RenderCacheConfig(
+            enabled=os.getenv('MANIM_RENDER_CACHE', '1') != '0',
+            cache_dir=os.getenv('MANIM_RENDER_CACHE_DIR', cache_defaults.cache_dir),
+            max_bytes=_env_int('MANIM_RENDER_CACHE_MAX_MB', cache_defaults.max_bytes // (1024 * 1024)) * 1024 * 1024,
+        )
+
+        prefetch_defaults = NarrationPrefetchConfig()
+        self.prefetch_config = NarrationPrefetchConfig(
+            enabled=os.getenv('MANIM_PREFETCH_NARRATION', '1') != '0',
+            max_workers=_env_int('MANIM_PREFETCH_WORKERS', prefetch_defaults.max_workers),
+        )
+
+        response_defaults = ResponseCacheConfig()
+        self.response_cache_config = ResponseCacheConfig(
+            enabled=os.getenv('MANIM_RESPONSE_CACHE', '1') != '0',
+            cache_dir=os.getenv('MANIM_RESPONSE_CACHE_DIR', response_defaults.cache_dir),
+            max_bytes=_env_int('MANIM_RESPONSE_CACHE_MAX_MB', response_defaults.max_bytes // (1024 * 1024)) * 1024 * 1024,
+            ttl=_env_int('MANIM_RESPONSE_CACHE_TTL_HOURS', response_defaults.ttl // 3600) * 3600,
+        )
+
+        llm_defaults = LLMBackendConfig()
+        self.llm_config = LLMBackendConfig(
+            backend=os.getenv('MANIM_LLM_BACKEND', llm_defaults.backend),
+            model_name=os.getenv('MANIM_LLM_MODEL', llm_defaults.model_name),
+            replay_dir=os.getenv('MANIM_LLM_REPLAY_DIR', llm_defaults.replay_dir),
+            replay_latency=_env_float('MANIM_LLM_REPLAY_LATENCY_MS', llm_defaults.replay_latency * 1000) / 1000,
+            replay_chunk_delay=_env_float('MANIM_LLM_REPLAY_CHUNK_DELAY_MS', llm_defaults.replay_chunk_delay * 1000) / 1000,
+            record_dir=os.getenv('MANIM_LLM_RECORD_DIR'),
+        )
+
+        preflight_defaults = PreflightConfig()
+        self.preflight_config = PreflightConfig(
+            enabled=os.getenv('MANIM_PREFLIGHT', '1') != '0',
+            timeout=_env_int('MANIM_PREFLIGHT_TIMEOUT', preflight_defaults.timeout),
+            memory_mb=_env_int('MANIM_PREFLIGHT_MEMORY_MB', preflight_defaults.memory_mb),
+        )
+
+        repair_defaults = RepairLoopConfig()
+        self.repair_config = RepairLoopConfig(
+            enabled=os.getenv('MANIM_REPAIR_LOOP', '1') != '0',
+            max_attempts=_env_int('MANIM_REPAIR_ATTEMPTS', repair_defaults.max_attempts),
+            max_traceback_lines=_env_int('MANIM_REPAIR_TRACEBACK_LINES', repair_defaults.max_traceback_lines),
+        )
+
+        segment_defaults = SegmentRenderConfig()
+        self.segment_config = SegmentRenderConfig(
+            enabled=os.getenv('MANIM_SEGMENT_RENDER', '1') != '0',
+            max_segments=_env_int('MANIM_SEGMENT_MAX', segment_defaults.max_segments, minimum=0),
+            min_segment_seconds=_env_int('MANIM_SEGMENT_MIN_SECONDS', segment_defaults.min_segment_seconds),
+        )
+
+        segment_cache_defaults = SegmentCacheConfig()
+        self.segment_cache_config = SegmentCacheConfig(
+            enabled=os.getenv('MANIM_SEGMENT_CACHE', '1') != '0',
+            max_bytes=_env_int('MANIM_SEGMENT_CACHE_MAX_MB', segment_cache_defaults.max_bytes // (1024 * 1024)) * 1024 * 1024,
+        )
+
+# Global configuration instance
+render_config = RenderServiceConfig()
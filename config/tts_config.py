@@ -3,11 +3,34 @@ TTS Configuration for Hinglish Educational Content
 Supports multiple TTS services with fallback mechanisms
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, Any, Optional
 from enum import Enum
+from pathlib import Path
 import os
 
+PROJECT_ROOT = Path(__file__).parent.parent
+
+def _env_int(name: str, default: int, minimum: int = 1) -> int:
+    """Read an integer of at least minimum from the environment, falling back to default"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return max(minimum, int(value))
+    except ValueError:
+        return default
+
+def _env_float(name: str, default: float) -> float:
+    """Read a non-negative number from the environment, falling back to default"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return default
+
 class TTSQuality(Enum):
     """TTS Quality levels"""
     FAST = "fast"      # gTTS for quick prototyping
@@ -39,6 +62,42 @@ class XTTSConfig:
     use_finetuned_model: bool = True
     finetuned_model_path: str = "Abhinay45/XTTS-Hindi-finetuned"
     
+@dataclass
+class XTTSServerConfig:
+    """Configuration for the warm XTTS model server"""
+    enabled: bool = True
+    # Per-user directory, created 0700; the .lock, .failed and .log files live beside the socket
+    socket_path: str = os.path.join(os.getenv('XDG_RUNTIME_DIR') or os.path.join(Path.home(), ".cache"),
+                                    "hinglish_tts", "xtts.sock")
+    autostart: bool = True           # Spawn the daemon on first use
+    start_timeout: float = 60.0      # Seconds to wait for a spawned daemon
+    retry_after: float = 300.0       # Seconds to skip autostart after a failed start
+    request_timeout: float = 300.0   # Seconds to wait for one synthesis
+    batch_window_ms: int = 25        # How long to coalesce concurrent requests
+    max_batch_size: int = 8          # Requests run together in one batch
+    
+@dataclass
+class HTTPPoolConfig:
+    """Configuration for the keep-alive HTTP pool used by network TTS services"""
+    pool_size: int = 8               # Connections kept open per host
+    per_host_limit: int = 4          # Concurrent requests per host
+    timeout: float = 30.0            # Seconds per HTTP request
+    gtts_endpoint: Optional[str] = None        # Override, e.g. a local mock server
+    elevenlabs_endpoint: Optional[str] = None
+    
+@dataclass
+class ResilienceConfig:
+    """Rate limits, circuit breakers and latency tracking for the fallback chain"""
+    # Sustained requests per second per service; 0 means unlimited
+    rate_limits: Dict[str, float] = field(default_factory=lambda: {
+        'gtts': 5.0, 'elevenlabs': 2.0, 'xtts': 0.0,
+    })
+    burst: int = 4                   # Tokens a bucket can bank
+    rate_wait: float = 2.0           # Seconds to wait for a token before falling back
+    failure_threshold: int = 3       # Consecutive failures that open a breaker
+    reset_timeout: float = 30.0      # Seconds a breaker stays open before a half-open probe
+    latency_window: int = 100        # Recent successful calls kept for percentiles
+    
 @dataclass
 class GTTSConfig:
     """Configuration for Google TTS"""
@@ -62,20 +121,48 @@ class TTSServiceConfig:
     
     def __init__(self):
         self.default_quality = TTSQuality.HIGH
-        self.cache_dir = "/Users/manishsoni/Manin Animations/assets/audio_cache"
-        self.reference_voices_dir = "/Users/manishsoni/Manin Animations/assets/reference_voices"
+        # Directories are only created when something is first written to them
+        self.cache_dir = os.getenv('HINGLISH_TTS_CACHE_DIR', str(PROJECT_ROOT / "assets" / "audio_cache"))
+        # Audio cache budget; least recently used files are evicted beyond it
+        self.cache_max_bytes = _env_int('HINGLISH_TTS_CACHE_MAX_MB', 512) * 1024 * 1024
+        # Thread pool size for batch synthesis with network services
+        self.batch_workers = _env_int('HINGLISH_TTS_BATCH_WORKERS', 4)
+        # Seconds a service availability probe is trusted before re-checking
+        self.availability_ttl = _env_float('HINGLISH_TTS_AVAILABILITY_TTL', 60.0)
+        self.reference_voices_dir = os.getenv('HINGLISH_REFERENCE_VOICES_DIR',
+                                              str(PROJECT_ROOT / "assets" / "reference_voices"))
+        # XTTS conditioning latents computed from the reference voices
+        self.speaker_latents_dir = os.path.join(self.cache_dir, "speaker_latents")
         
         # Service configurations
         self.xtts_config = XTTSConfig()
+        self.xtts_server_config = XTTSServerConfig(
+            enabled=os.getenv('HINGLISH_XTTS_SERVER', '1') != '0',
+            socket_path=os.getenv('HINGLISH_XTTS_SOCKET', XTTSServerConfig.socket_path),
+            autostart=os.getenv('HINGLISH_XTTS_AUTOSTART', '1') != '0',
+            batch_window_ms=_env_int('HINGLISH_XTTS_BATCH_WINDOW_MS', 25, minimum=0),
+            max_batch_size=_env_int('HINGLISH_XTTS_MAX_BATCH', 8),
+        )
         self.gtts_config = GTTSConfig()
+        self.http_pool_config = HTTPPoolConfig(
+            pool_size=_env_int('HINGLISH_TTS_HTTP_POOL_SIZE', 8),
+            per_host_limit=_env_int('HINGLISH_TTS_HTTP_PER_HOST', 4),
+            timeout=_env_float('HINGLISH_TTS_HTTP_TIMEOUT', 30.0),
+            gtts_endpoint=os.getenv('HINGLISH_GTTS_ENDPOINT'),
+            elevenlabs_endpoint=os.getenv('HINGLISH_ELEVENLABS_ENDPOINT'),
+        )
         self.elevenlabs_config = ElevenLabsConfig()
+        self.resilience_config = ResilienceConfig(
+            burst=_env_int('HINGLISH_TTS_RATE_BURST', 4),
+            rate_wait=_env_float('HINGLISH_TTS_RATE_WAIT', 2.0),
+            failure_threshold=_env_int('HINGLISH_TTS_BREAKER_FAILURES', 3),
+            reset_timeout=_env_float('HINGLISH_TTS_BREAKER_RESET', 30.0),
+        )
+        for service, rate in self.resilience_config.rate_limits.items():
+            self.resilience_config.rate_limits[service] = _env_float(f'HINGLISH_TTS_RATE_{service.upper()}', rate)
         
         # Voice profiles for different subjects
         self.voice_profiles = self._setup_voice_profiles()
-        
-        # Ensure cache directory exists
-        os.makedirs(self.cache_dir, exist_ok=True)
-        os.makedirs(self.reference_voices_dir, exist_ok=True)
     
     def _setup_voice_profiles(self) -> Dict[SubjectVoice, Dict[str, Any]]:
         """Setup voice profiles for different subjects"""
@@ -108,26 +195,34 @@ class TTSServiceConfig:
     
     def get_service_config(self, quality: TTSQuality, subject: SubjectVoice) -> Dict[str, Any]:
         """Get configuration for specific TTS service and subject"""
-        base_config = {}
-        
-        if quality == TTSQuality.HIGH:
-            base_config = {
+        service_map = {
+            TTSQuality.HIGH: "xtts",
+            TTSQuality.FAST: "gtts",
+            TTSQuality.PREMIUM: "elevenlabs"
+        }
+        if quality not in service_map:
+            return {}
+        return self.get_config_for_service(service_map[quality], subject)
+    
+    def get_config_for_service(self, service: str, subject: SubjectVoice) -> Dict[str, Any]:
+        """Get the resolved configuration a named service synthesizes with"""
+        if service == "xtts":
+            return {
                 "service": "xtts",
                 **self.xtts_config.__dict__,
                 **self.voice_profiles[subject]
             }
-        elif quality == TTSQuality.FAST:
-            base_config = {
+        if service == "gtts":
+            return {
                 "service": "gtts",
                 **self.gtts_config.__dict__
             }
-        elif quality == TTSQuality.PREMIUM:
-            base_config = {
+        if service == "elevenlabs":
+            return {
                 "service": "elevenlabs",
                 **self.elevenlabs_config.__dict__
             }
-            
-        return base_config
+        return {}
 
 # Global configuration instance
 tts_config = TTSServiceConfig()
@@ -3,22 +3,49 @@ Voice Profile Management for Subject-Specific Educational Content
 Handles voice cloning, reference audio management, and subject-specific TTS settings
 """
 
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 import os
 import json
+import threading
 from pathlib import Path
-from .tts_config import SubjectVoice, TTSQuality
+from .tts_config import SubjectVoice, TTSQuality, tts_config
 
 class VoiceProfileManager:
-    """Manages voice profiles for different educational subjects"""
+    """Manages voice profiles for different educational subjects
     
-    def __init__(self, reference_voices_dir: str = "/Users/manishsoni/Manin Animations/assets/reference_voices"):
-        self.reference_voices_dir = Path(reference_voices_dir)
-        self.reference_voices_dir.mkdir(parents=True, exist_ok=True)
+    Nothing touches the filesystem until a profile is first read:
+    profiles.json is loaded then and reloaded whenever its mtime changes.
+    Without one, the defaults are used in memory; the file is only written
+    by update_profile.
+    """
+    
+    def __init__(self, reference_voices_dir: Optional[str] = None):
+        self.reference_voices_dir = Path(reference_voices_dir or tts_config.reference_voices_dir)
         
         # Voice profile metadata
         self.profile_metadata_file = self.reference_voices_dir / "profiles.json"
-        self.profiles = self._load_profiles()
+        self._profiles: Optional[Dict[str, Dict]] = None
+        self._profiles_mtime: Optional[int] = None
+        self._lock = threading.RLock()
+        
+        # Called with (subject, reference audio paths) whenever a profile changes
+        self._update_listeners: List[Callable[[SubjectVoice, List[str]], None]] = []
+    
+    def _metadata_mtime(self) -> Optional[int]:
+        try:
+            return self.profile_metadata_file.stat().st_mtime_ns
+        except OSError:
+            return None
+    
+    @property
+    def profiles(self) -> Dict[str, Dict]:
+        """Profile metadata, (re)loaded when profiles.json appears or changes"""
+        mtime = self._metadata_mtime()
+        with self._lock:
+            if self._profiles is None or mtime != self._profiles_mtime:
+                self._profiles = self._load_profiles()
+                self._profiles_mtime = mtime
+            return self._profiles
     
     def _load_profiles(self) -> Dict[str, Dict]:
         """Load voice profile metadata from JSON file"""
@@ -26,15 +53,17 @@ class VoiceProfileManager:
             with open(self.profile_metadata_file, 'r', encoding='utf-8') as f:
                 return json.load(f)
         else:
-            # Create default profiles
-            default_profiles = self._create_default_profiles()
-            self._save_profiles(default_profiles)
-            return default_profiles
+            # Defaults stay in memory until a profile is updated
+            return self._create_default_profiles()
     
     def _save_profiles(self, profiles: Dict[str, Dict]) -> None:
         """Save voice profile metadata to JSON file"""
-        with open(self.profile_metadata_file, 'w', encoding='utf-8') as f:
+        self.reference_voices_dir.mkdir(parents=True, exist_ok=True)
+        temp_file = self.profile_metadata_file.with_suffix('.json.tmp')
+        with open(temp_file, 'w', encoding='utf-8') as f:
             json.dump(profiles, f, indent=2, ensure_ascii=False)
+        os.replace(temp_file, self.profile_metadata_file)
+        self._profiles_mtime = self._metadata_mtime()
     
     def _create_default_profiles(self) -> Dict[str, Dict]:
         """Create default voice profiles for each subject"""
@@ -106,12 +135,27 @@ class VoiceProfileManager:
         subject_key = subject.value
         return self.profiles.get(subject_key, self.profiles["general"])
     
+    def add_update_listener(self, listener: Callable[[SubjectVoice, List[str]], None]) -> None:
+        """Register a callback for profile updates, e.g. to drop cached voice data"""
+        self._update_listeners.append(listener)
+    
     def update_profile(self, subject: SubjectVoice, updates: Dict) -> None:
         """Update voice profile for a subject"""
         subject_key = subject.value
-        if subject_key in self.profiles:
-            self.profiles[subject_key].update(updates)
-            self._save_profiles(self.profiles)
+        with self._lock:
+            profiles = self.profiles
+            if subject_key not in profiles:
+                return
+            # The old and new reference files may both have changed on disk
+            reference_paths = [str(self.reference_voices_dir / profiles[subject_key]["reference_audio"])]
+            profiles[subject_key].update(updates)
+            self._save_profiles(profiles)
+            
+            new_reference = str(self.reference_voices_dir / profiles[subject_key]["reference_audio"])
+        if new_reference not in reference_paths:
+            reference_paths.append(new_reference)
+        for listener in self._update_listeners:
+            listener(subject, reference_paths)
     
     def get_reference_audio_path(self, subject: SubjectVoice) -> Optional[str]:
         """Get path to reference audio file for voice cloning"""
@@ -125,13 +169,12 @@ class VoiceProfileManager:
             # System will use default voice
             return None
     
-    def create_reference_audio_placeholder(self, subject: SubjectVoice) -> str:
-        """Create placeholder reference audio file with instructions"""
+    def reference_audio_instructions(self, subject: SubjectVoice) -> str:
+        """Recording instructions for a subject's reference audio"""
         profile = self.get_profile(subject)
         audio_file = self.reference_voices_dir / profile["reference_audio"]
-        instructions_file = audio_file.with_suffix('.txt')
         
-        instructions = f"""
+        return f"""
 Reference Audio Instructions for {profile['name']} ({subject.value.title()})
 
 To create a high-quality voice clone for {subject.value} content:
@@ -163,9 +206,15 @@ To create a high-quality voice clone for {subject.value} content:
 
 Once you place the audio file, the system will automatically use it for voice cloning.
 """
+    
+    def create_reference_audio_placeholder(self, subject: SubjectVoice) -> str:
+        """Create placeholder reference audio file with instructions"""
+        profile = self.get_profile(subject)
+        instructions_file = (self.reference_voices_dir / profile["reference_audio"]).with_suffix('.txt')
         
+        self.reference_voices_dir.mkdir(parents=True, exist_ok=True)
         with open(instructions_file, 'w', encoding='utf-8') as f:
-            f.write(instructions)
+            f.write(self.reference_audio_instructions(subject))
         
         return str(instructions_file)
     
@@ -174,8 +223,9 @@ Once you place the audio file, the system will automatically use it for voice cl
         audio_path = self.get_reference_audio_path(subject)
         
         if not audio_path:
-            instructions_file = self.create_reference_audio_placeholder(subject)
-            return False, f"Reference audio not found. Instructions created: {instructions_file}"
+            # Read-only: instructions are written by create_reference_audio_placeholder on request
+            expected = self.reference_voices_dir / self.get_profile(subject)["reference_audio"]
+            return False, f"Reference audio not found. Record it as: {expected}"
         
         # Basic file validation
         audio_file = Path(audio_path)
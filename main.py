@@ -40,6 +40,7 @@ def run_comprehensive_system():
     
     try:
         from utils.voice_manager import tts_manager
+        from utils.hinglish_processor import hinglish_processor
         from config.voice_profiles import voice_manager
         
         print("\n📊 TTS Service Status:")
@@ -51,6 +52,17 @@ def run_comprehensive_system():
             if not info['available']:
                 print(f"   Install: {info['requirements']}")
         
+        cache_stats = tts_manager.get_cache_stats()
+        print(f"\n💾 Audio Cache: {cache_stats['entries']} files, "
+              f"{cache_stats['bytes']/1024/1024:.1f} of {cache_stats['max_bytes']/1024/1024:.0f} MB, "
+              f"hit rate {cache_stats['hit_rate']:.0%}, {cache_stats['evictions']} evictions")
+        
+        memo_stats = hinglish_processor.memo_stats()
+        print("📝 Text Processing Memo: " + ", ".join(
+            f"{name} {stats['hit_rate']:.0%} of {stats['hits'] + stats['misses']}"
+            for name, stats in memo_stats.items()
+        ))
+        
         print("\n🎭 Voice Profiles:")
         profiles = voice_manager.list_available_profiles()
         
@@ -13,6 +13,7 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from config.tts_config import TTSQuality, SubjectVoice
 from utils.voice_manager import tts_manager
+from utils.narration import extract_scene_narration
 from scenes.physics_scenes import HinglishTTSService
 
 class BiologyHinglishScene(VoiceoverScene):
@@ -25,10 +26,12 @@ class BiologyHinglishScene(VoiceoverScene):
         
     def setup_voice(self):
         """Setup TTS service for biology content"""
-        self.set_speech_service(HinglishTTSService(
+        speech_service = HinglishTTSService(
             quality=self.tts_quality,
             subject=self.subject
-        ))
+        )
+        speech_service.prefetch(extract_scene_narration(type(self)))
+        self.set_speech_service(speech_service)
 
 class CellMembraneScene(BiologyHinglishScene):
     """Demonstrates cell membrane structure and transport"""
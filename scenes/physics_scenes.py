@@ -20,6 +20,7 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from config.tts_config import TTSQuality, SubjectVoice
 from utils.voice_manager import tts_manager
+from utils.narration import extract_scene_narration
 
 class PhysicsHinglishScene(VoiceoverScene):
     """Base scene class for physics content with Hinglish voiceover"""
@@ -32,10 +33,13 @@ class PhysicsHinglishScene(VoiceoverScene):
     def setup_voice(self):
         """Setup TTS service for physics content"""
         # Configure manim-voiceover to use our TTS manager
-        self.set_speech_service(HinglishTTSService(
+        speech_service = HinglishTTSService(
             quality=self.tts_quality,
             subject=self.subject
-        ))
+        )
+        # Synthesize every narration line up front instead of one per voiceover block
+        speech_service.prefetch(extract_scene_narration(type(self)))
+        self.set_speech_service(speech_service)
 
 class NewtonsSecondLawScene(PhysicsHinglishScene):
     """Demonstrates Newton's Second Law with Hinglish explanation"""
@@ -405,8 +409,19 @@ class HinglishTTSService:
         self.subject = subject
         self.tts_manager = tts_manager
     
-    def generate_from_text(self, text: str, cache_dir: str = None, path: str = None, **kwargs):
-        """Generate audio from text for manim-voiceover"""
+    def prefetch(self, texts):
+        """Pre-synthesize narration lines in parallel so later voiceovers hit the cache"""
+        if texts:
+            self.tts_manager.synthesize_batch(texts, quality=self.quality, subject=self.subject)
+    
+    def generate_from_text(self, text: str, cache_dir: str = None, path: str = None,
+                           on_chunk=None, **kwargs):
+        """Generate audio from text for manim-voiceover
+        
+        Passing on_chunk (e.g. self.voiceover(text=..., on_chunk=...)) streams
+        the line sentence by sentence, handing each sentence's AudioChunk, with
+        its offset and duration, to on_chunk as soon as it is ready.
+        """
         import tempfile
         import os
         
@@ -422,7 +437,9 @@ class HinglishTTSService:
             output_path=path,
             quality=self.quality,
             subject=self.subject,
-            use_cache=True
+            use_cache=True,
+            stream=on_chunk is not None,
+            on_chunk=on_chunk
         )
         
         if success and os.path.exists(path):
@@ -5,13 +5,20 @@ Provides a user-friendly interface for creating educational animations with Gemi
 
 import streamlit as st
 import os
-import subprocess
-import tempfile
-import json
 import time
+import uuid
 from pathlib import Path
-import google.generativeai as genai
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Optional, Tuple
+
+from config.render_config import render_config
+from utils.llm_backends import LLMBackend, ReplayBackend, create_llm_backend, record_response
+from utils.manim_renderer import DRAFT_PRESET, QUALITY_PRESETS, RenderResult
+from utils.preflight import PreflightResult, run_preflight
+from utils.repair_loop import RepairAttempt, create_repair_loop, preflight_error, repair_stats, scene_problems
+from utils.render_queue import render_queue, JobStatus
+from utils.response_cache import response_cache, response_cache_key
+from utils.code_repair import RepairResult
+from utils.response_parser import IncrementalSectionParser
 
 # Configure page
 st.set_page_config(
@@ -21,19 +28,41 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Configure Google AI
-GOOGLE_API_KEY = st.secrets.get("GOOGLE_API_KEY", "")
-if not GOOGLE_API_KEY:
-    st.error("⚠️ Google API Key not found. Please set GOOGLE_API_KEY in your Streamlit secrets.")
-    st.stop()
-genai.configure(api_key=GOOGLE_API_KEY)
+def get_google_api_key() -> str:
+    """Google API key from Streamlit secrets, falling back to the environment"""
+    try:
+        api_key = st.secrets.get("GOOGLE_API_KEY", "")
+    except Exception:
+        # No secrets file at all
+        api_key = ""
+    return api_key or os.getenv("GOOGLE_API_KEY", "")
+
+# Display titles for the generated sections, in generation order
+SECTION_TITLES = {
+    'objectives': "📋 Learning Objectives",
+    'design_plan': "🎨 Visual Design Plan",
+    'storyboard': "🎬 Detailed Storyboard",
+    'narration': "🗣️ Hinglish Narration",
+    'code': "💻 Production-Ready Code",
+}
+
+# Render Quality slider labels and the presets they select
+QUALITY_OPTIONS = {
+    "Low (Fast)": 'low',
+    "Medium": 'medium',
+    "High (Slow)": 'high',
+}
 
 class AnimationGenerator:
-    """Handles animation generation using Gemini AI"""
+    """Handles animation generation using Gemini AI (or the configured LLM backend)"""
     
-    def __init__(self):
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+    def __init__(self, backend: Optional[LLMBackend] = None):
+        self.backend = backend or create_llm_backend(get_google_api_key())
         self.project_root = Path(__file__).parent
+        self.cache = response_cache
+        self.last_from_cache = False
+        # What the repair pipeline changed in the most recent code section
+        self.last_repair: Optional[RepairResult] = None
     
     def get_gemini_prompt(self) -> str:
         """Get the comprehensive, structured Gemini prompt for high-quality animation generation"""
@@ -226,178 +255,77 @@ USER PROBLEM STATEMENT:
 Generate a complete, production-ready animation that meets all these standards.
 """
     
-    def generate_animation_code(self, problem_statement: str) -> Dict[str, str]:
-        """Generate animation code using Gemini AI"""
+    def generate_animation_code(
+        self,
+        problem_statement: str,
+        on_section: Optional[Callable[[str, str], None]] = None
+    ) -> Dict[str, str]:
+        """Generate animation code using Gemini AI, reusing cached responses for repeated topics
+        
+        With on_section, the response is streamed and on_section(name, text)
+        is called for each section as soon as it closes.
+        """
         try:
-            prompt = self.get_gemini_prompt().format(problem_statement=problem_statement)
-            
-            with st.spinner("🤖 Generating animation with Gemini AI..."):
-                response = self.model.generate_content(prompt)
-                content = response.text
-            
-            # Parse the response
-            sections = self._parse_gemini_response(content)
+            template = self.get_gemini_prompt()
+            cache_key = response_cache_key(template, self.backend.model_name, problem_statement)
+            
+            self.last_from_cache = False
+            if self.cache is not None:
+                content = self.cache.lookup(cache_key)
+                if content is not None:
+                    sections = self._parse_gemini_response(content)
+                    if sections.get('code'):
+                        self.last_from_cache = True
+                        if on_section:
+                            for name, text in sections.items():
+                                on_section(name, text)
+                        return sections
+            
+            prompt = template.format(problem_statement=problem_statement)
+            
+            if on_section:
+                content, sections = self._stream_response(prompt, on_section)
+            else:
+                with st.spinner("🤖 Generating animation with Gemini AI..."):
+                    content = self.backend.generate(prompt)
+                
+                # Parse the response
+                sections = self._parse_gemini_response(content)
+            
+            # Only responses that yielded code are worth serving again
+            if self.cache is not None and sections.get('code'):
+                self.cache.store(cache_key, content, {'model': self.backend.model_name})
+            record_dir = render_config.llm_config.record_dir
+            if record_dir and not isinstance(self.backend, ReplayBackend):
+                record_response(Path(record_dir), problem_statement, content, self.backend.model_name)
             return sections
             
         except Exception as e:
             st.error(f"Error generating animation: {str(e)}")
             return {}
     
-    def _parse_gemini_response(self, content: str) -> Dict[str, str]:
-        """Parse Gemini response into sections"""
-        sections = {
-            'objectives': '',
-            'design_plan': '',
-            'storyboard': '',
-            'narration': '',
-            'code': ''
-        }
+    def _stream_response(self, prompt: str, on_section: Callable[[str, str], None]) -> Tuple[str, Dict[str, str]]:
+        """Stream the response through the incremental parser; returns the full text and sections"""
+        parser = IncrementalSectionParser()
+        chunks = []
         
-        # Split content by section headers
-        current_section = None
-        lines = content.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            
-            if '=== LEARNING OBJECTIVES ===' in line:
-                current_section = 'objectives'
-                continue
-            elif '=== VISUAL DESIGN PLAN ===' in line:
-                current_section = 'design_plan'
-                continue
-            elif '=== DETAILED STORYBOARD ===' in line:
-                current_section = 'storyboard'
-                continue
-            elif '=== HINGLISH NARRATION SCRIPT ===' in line:
-                current_section = 'narration'
-                continue
-            elif '=== PRODUCTION-READY CODE ===' in line:
-                current_section = 'code'
-                continue
-            
-            if current_section and line:
-                sections[current_section] += line + '\n'
-        
-        # Clean up code section
-        if sections['code']:
-            # Remove markdown code blocks
-            code = sections['code']
-            if '```python' in code:
-                code = code.split('```python')[1].split('```')[0]
-            elif '```' in code:
-                code = code.split('```')[1].split('```')[0]
-            
-            # Fix indentation issues and undefined constants
-            import textwrap
-            
-            # First, fix undefined constants
-            code = code.replace('FRAME_WIDTH', '14')  # LEFT*7 to RIGHT*7 = 14 units
-            code = code.replace('FRAME_HEIGHT', '8')   # UP*4 to DOWN*4 = 8 units
-            code = code.replace('FRAME_RATE', '30')
-            code = code.replace('PIXEL_HEIGHT', '720')
-            code = code.replace('PIXEL_WIDTH', '1280')
-            
-            # Fix missing color definitions
-            if 'PRIMARY_COLOR' not in code:
-                code = code.replace('# Setup TTS (REQUIRED)', '# Setup TTS (REQUIRED)\n        \n        # Define color scheme (REQUIRED)\n        PRIMARY_COLOR = BLUE\n        SECONDARY_COLOR = GREEN\n        ACCENT_COLOR = ORANGE\n        TEXT_COLOR = WHITE')
-            elif 'TEXT_COLOR' not in code:
-                # Find where colors are defined and add TEXT_COLOR
-                if 'PRIMARY_COLOR =' in code:
-                    # Find the line with PRIMARY_COLOR and add TEXT_COLOR after it
-                    lines = code.split('\n')
-                    for i, line in enumerate(lines):
-                        if 'PRIMARY_COLOR =' in line:
-                            lines.insert(i + 1, '        TEXT_COLOR = WHITE')
-                            break
-                    code = '\n'.join(lines)
-                else:
-                    # Add all colors if none exist
-                    code = code.replace('# Setup TTS (REQUIRED)', '# Setup TTS (REQUIRED)\n        \n        # Define color scheme (REQUIRED)\n        PRIMARY_COLOR = BLUE\n        SECONDARY_COLOR = GREEN\n        ACCENT_COLOR = ORANGE\n        TEXT_COLOR = WHITE')
-            
-            # Then, try to fix basic indentation
-            try:
-                # Remove any leading/trailing whitespace
-                code = code.strip()
-                
-                # Split into lines
-                lines = code.split('\n')
-                fixed_lines = []
-                in_class = False
-                in_method = False
-                in_voiceover = False
-                
-                for line in lines:
-                    stripped = line.strip()
-                    
-                    # Skip empty lines
-                    if not stripped:
-                        fixed_lines.append('')
-                        continue
-                    
-                    # Handle imports
-                    if stripped.startswith(('from ', 'import ')):
-                        fixed_lines.append(stripped)
-                        continue
-                    
-                    # Handle class definition
-                    if stripped.startswith('class '):
-                        fixed_lines.append(stripped)
-                        in_class = True
-                        in_method = False
-                        in_voiceover = False
-                        continue
-                    
-                    # Handle method definitions
-                    if stripped.startswith('def ') and in_class:
-                        fixed_lines.append('    ' + stripped)
-                        in_method = True
-                        in_voiceover = False
-                        continue
-                    
-                    # Handle voiceover blocks
-                    if stripped.startswith('with self.voiceover'):
-                        fixed_lines.append('        ' + stripped)
-                        in_voiceover = True
-                        continue
-                    
-                    # Handle method content
-                    if in_method:
-                        if in_voiceover:
-                            # Inside voiceover block - 8 spaces
-                            if stripped.startswith('self.play') or stripped.startswith('self.wait'):
-                                fixed_lines.append('            ' + stripped)
-                            elif stripped.startswith('#'):
-                                fixed_lines.append('            ' + stripped)
-                            else:
-                                fixed_lines.append('            ' + stripped)
-                        else:
-                            # Regular method content - 4 spaces
-                            if any(stripped.startswith(pattern) for pattern in [
-                                'self.', 'title =', 'equation =', 'circle =', 'square =', 
-                                'arrow =', 'line =', 'PRIMARY_COLOR', 'SECONDARY_COLOR'
-                            ]):
-                                fixed_lines.append('        ' + stripped)
-                            elif stripped.startswith('#'):
-                                fixed_lines.append('        ' + stripped)
-                            else:
-                                # Keep existing indentation if reasonable
-                                if line.startswith('        ') or line.startswith('    '):
-                                    fixed_lines.append(line)
-                                else:
-                                    fixed_lines.append('        ' + stripped)
-                    else:
-                        # Not in method, probably class-level
-                        fixed_lines.append('    ' + stripped)
-                
-                sections['code'] = '\n'.join(fixed_lines)
-                
-            except Exception as e:
-                st.warning(f"Code formatting warning: {e}")
-                # Fallback: use original code
-                sections['code'] = code.strip()
+        for text in self.backend.stream(prompt):
+            chunks.append(text)
+            for name, section_text in parser.feed(text):
+                on_section(name, section_text)
         
-        return sections
+        for name, section_text in parser.close():
+            on_section(name, section_text)
+        self.last_repair = parser.repair
+        return ''.join(chunks), parser.sections
+    
+    def _parse_gemini_response(self, content: str) -> Dict[str, str]:
+        """Parse Gemini response into sections"""
+        parser = IncrementalSectionParser()
+        parser.feed(content)
+        parser.close()
+        self.last_repair = parser.repair
+        return parser.sections
 
 class ManimeAnimationRunner:
     """Handles running Manim animations"""
@@ -406,168 +334,216 @@ class ManimeAnimationRunner:
         self.project_root = Path(__file__).parent
         self.temp_dir = self.project_root / "temp_animations"
         self.temp_dir.mkdir(exist_ok=True)
+        # Share the queue's renderer so both paths use one render cache
+        self.renderer = render_queue.renderer
+        self.last_preflight: Optional[PreflightResult] = None
+        self.last_preflight_code: Optional[str] = None
+        # Code actually queued by submit_animation, after any repair
+        self.submitted_code: Optional[str] = None
     
-    def run_animation(self, code: str, scene_name: str = "GeneratedAnimation") -> Optional[str]:
-        """Run the generated animation code and return video path"""
+    def validate_code(self, code: str) -> bool:
+        """Validate generated code before it is handed to Manim"""
         try:
-            # Create temporary Python file
-            temp_file = self.temp_dir / f"temp_animation_{int(time.time())}.py"
-            
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                f.write(code)
-            
-            st.info(f"📝 Created animation file: {temp_file.name}")
-            
-            # Validate the Python code syntax
-            try:
-                compile(code, temp_file, 'exec')
-                st.success("✅ Code syntax is valid")
-                
-                # Additional validation checks
-                if 'class GeneratedAnimation' not in code:
-                    st.error("❌ Missing required class name 'GeneratedAnimation'")
-                    return None
-                
-                if 'self.set_speech_service' not in code:
-                    st.error("❌ Missing TTS setup")
-                    return None
-                
-                if 'self.voiceover(' not in code:
-                    st.error("❌ Missing voiceover blocks")
-                    return None
-                
-                # Check for undefined constants
-                undefined_constants = ['FRAME_WIDTH', 'FRAME_HEIGHT', 'FRAME_RATE', 'PIXEL_HEIGHT', 'PIXEL_WIDTH']
-                found_undefined = [const for const in undefined_constants if const in code]
-                
-                if found_undefined:
-                    st.error(f"❌ Found undefined constants: {', '.join(found_undefined)}")
-                    st.error("These constants don't exist in Manim Community Edition")
-                    st.error("Use: LEFT*7, RIGHT*7, UP*4, DOWN*4 instead")
-                    return None
-                
-                # Check for undefined color variables
-                required_colors = ['PRIMARY_COLOR', 'SECONDARY_COLOR', 'ACCENT_COLOR', 'TEXT_COLOR']
-                missing_colors = [color for color in required_colors if color not in code]
-                
-                if missing_colors:
-                    st.error(f"❌ Missing required color definitions: {', '.join(missing_colors)}")
-                    st.error("All animations must define these color variables")
-                    return None
-                
-                st.success("✅ All validation checks passed")
-                
-            except SyntaxError as e:
-                st.error(f"❌ Syntax Error in generated code: {e}")
-                st.error(f"Line {e.lineno}: {e.text}")
-                return None
-            except Exception as e:
-                st.error(f"❌ Code validation error: {e}")
-                return None
-            
-            # Run Manim with ultra-fast settings for faster processing
-            cmd = [
-                "manim", 
-                str(temp_file), 
-                scene_name,
-                "-ql",  # Low quality for speed
-                "--disable_caching",
-                "--fps", "15",
-                "--resolution", "480,360"
-            ]
-            
-            st.info(f"🔧 Running command: {' '.join(cmd)}")
-            st.info("⚡ Using ultra-fast settings: 480p15 resolution, 15 FPS, no caching")
-            
-            with st.spinner("🎬 Rendering animation with ultra-fast settings... This should take 30 seconds to 2 minutes"):
-                result = subprocess.run(
-                    cmd, 
-                    capture_output=True, 
-                    text=True,
-                    cwd=str(self.project_root),
-                    timeout=300  # 5 minute timeout
-                )
-            
-            st.info(f"📊 Manim exit code: {result.returncode}")
-            
-            # Show output for debugging
-            if result.stdout:
-                with st.expander("📤 Manim Output", expanded=False):
-                    st.text(result.stdout[-2000:])  # Last 2000 chars
-            
-            if result.stderr:
-                with st.expander("📥 Manim Errors", expanded=result.returncode != 0):
-                    st.text(result.stderr[-2000:])  # Last 2000 chars
-            
-            if result.returncode == 0:
-                # Find the generated video file - prioritize 480p15 for fast rendering
-                possible_paths = [
-                    self.project_root / "media" / "videos" / temp_file.stem / "480p15",  # Primary output
-                    self.project_root / "media" / "videos" / temp_file.stem / "360p15",  # Fallback
-                    self.project_root / "media" / "videos" / temp_file.stem / "720p30",  # Higher quality fallback
-                    self.project_root / "media" / "videos" / temp_file.stem / "1080p60", # Highest quality fallback
-                ]
-                
-                video_found = False
-                
-                for media_dir in possible_paths:
-                    st.info(f"🔍 Checking: {media_dir}")
-                    
-                    if media_dir.exists():
-                        video_files = list(media_dir.glob(f"{scene_name}.mp4"))
-                        all_files = list(media_dir.glob("*"))
-                        
-                        st.info(f"📁 Found files: {[f.name for f in all_files]}")
-                        
-                        if video_files:
-                            video_path = str(video_files[0])
-                            video_size = video_files[0].stat().st_size
-                            
-                            if video_size > 1000:  # Ensure it's a real video file
-                                st.success(f"✅ Video found: {video_path} ({video_size:,} bytes)")
-                                return video_path
-                            else:
-                                st.warning(f"⚠️ Video file too small: {video_size} bytes")
-                        else:
-                            # Try alternative file patterns
-                            alt_files = list(media_dir.glob("*.mp4"))
-                            if alt_files:
-                                video_path = str(alt_files[0])
-                                video_size = alt_files[0].stat().st_size
-                                st.info(f"📹 Found alternative video: {video_path} ({video_size:,} bytes)")
-                                return video_path
-                
-                # If no video found, show detailed error
-                st.error("❌ Video file not found in any quality directory")
-                
-                # Show what directories exist
-                base_media_dir = self.project_root / "media" / "videos" / temp_file.stem
-                if base_media_dir.exists():
-                    subdirs = [d for d in base_media_dir.iterdir() if d.is_dir()]
-                    st.error(f"Available quality directories: {[d.name for d in subdirs]}")
-                    
-                    for subdir in subdirs:
-                        files = list(subdir.glob("*"))
-                        st.error(f"Files in {subdir.name}: {[f.name for f in files]}")
-                else:
-                    st.error(f"Media directory doesn't exist: {base_media_dir}")
-                
-                return None
+            compile(code, '<generated animation>', 'exec')
+            st.success("✅ Code syntax is valid")
+            
+            # Additional validation checks
+            if 'class GeneratedAnimation' not in code:
+                st.error("❌ Missing required class name 'GeneratedAnimation'")
+                return False
+            
+            if 'self.set_speech_service' not in code:
+                st.error("❌ Missing TTS setup")
+                return False
+            
+            if 'self.voiceover(' not in code:
+                st.error("❌ Missing voiceover blocks")
+                return False
+            
+            # Check for undefined constants
+            undefined_constants = ['FRAME_WIDTH', 'FRAME_HEIGHT', 'FRAME_RATE', 'PIXEL_HEIGHT', 'PIXEL_WIDTH']
+            found_undefined = [const for const in undefined_constants if const in code]
+            
+            if found_undefined:
+                st.error(f"❌ Found undefined constants: {', '.join(found_undefined)}")
+                st.error("These constants don't exist in Manim Community Edition")
+                st.error("Use: LEFT*7, RIGHT*7, UP*4, DOWN*4 instead")
+                return False
+            
+            # Check for undefined color variables
+            required_colors = ['PRIMARY_COLOR', 'SECONDARY_COLOR', 'ACCENT_COLOR', 'TEXT_COLOR']
+            missing_colors = [color for color in required_colors if color not in code]
+            
+            if missing_colors:
+                st.error(f"❌ Missing required color definitions: {', '.join(missing_colors)}")
+                st.error("All animations must define these color variables")
+                return False
+            
+            st.success("✅ All validation checks passed")
+            return True
+            
+        except SyntaxError as e:
+            st.error(f"❌ Syntax Error in generated code: {e}")
+            st.error(f"Line {e.lineno}: {e.text}")
+            return False
+        except Exception as e:
+            st.error(f"❌ Code validation error: {e}")
+            return False
+    
+    def show_render_result(self, result: RenderResult) -> Optional[str]:
+        """Display a finished render's output and return the video path"""
+        if result.cached:
+            st.success("⚡ Identical animation found in the render cache")
+        if result.prefetch and not result.prefetch.skipped_reason:
+            prefetch = result.prefetch
+            st.info(f"🔊 Narration prefetch: {prefetch.synthesized} synthesized, "
+                    f"{prefetch.cached} already cached ({prefetch.elapsed:.1f}s)")
+        if result.command:
+            st.info(f"🔧 Command: {' '.join(result.command)}")
+        if result.returncode is not None:
+            st.info(f"📊 Manim exit code: {result.returncode} ({result.elapsed:.1f}s)")
+        if result.segments:
+            st.info(f"🧩 Rendered as {result.segments} parts in parallel")
+        if result.reused_segments:
+            st.info(f"♻️ Reused {result.reused_segments} unchanged animations, "
+                    f"re-rendered {result.encoded_segments}")
+        
+        # Show output for debugging
+        if result.stdout:
+            with st.expander("📤 Manim Output", expanded=False):
+                st.text(result.stdout[-2000:])  # Last 2000 chars
+        
+        if result.stderr:
+            with st.expander("📥 Manim Errors", expanded=not result.success):
+                st.text(result.stderr[-2000:])  # Last 2000 chars
+        
+        if result.success:
+            video_size = os.path.getsize(result.video_path)
+            st.success(f"✅ Video found: {result.video_path} ({video_size:,} bytes)")
+            return result.video_path
+        
+        if result.timed_out:
+            st.error("⏰ Animation rendering timed out. Try a simpler animation.")
+        else:
+            st.error(f"❌ {result.error}")
+        return None
+    
+    def preflight_for(self, code: str) -> Optional[PreflightResult]:
+        """The passing dry run of exactly this code, so segmented renders need not repeat it"""
+        result = self.last_preflight
+        if result is not None and result.ok and self.last_preflight_code == code:
+            return result
+        return None
+    
+    def preflight(self, code: str, scene_name: str = "GeneratedAnimation") -> bool:
+        """Dry-run the scene in a sandboxed worker; False if the render is bound to fail"""
+        self.last_preflight = None
+        if not render_config.preflight_config.enabled:
+            return True
+        
+        with st.spinner("🧪 Dry-running the scene before rendering..."):
+            result = run_preflight(code, scene_name)
+        self.last_preflight = result
+        self.last_preflight_code = code
+        
+        if result.skipped:
+            st.info(f"ℹ️ {result.warnings[0]}")
+            return True
+        if not result.ok:
+            location = f" (line {result.error_line})" if result.error_line else ""
+            st.error(f"❌ Dry run failed{location}: {result.errors[0]}")
+            if result.traceback:
+                with st.expander("🔍 Dry-run traceback", expanded=False):
+                    st.code(result.traceback)
+            return False
+        
+        st.success(f"✅ Dry run passed in {result.elapsed:.1f}s: {result.animation_count} animations, "
+                   f"{result.voiceover_count} voiceovers, about {result.estimated_duration:.0f}s of video")
+        for warning in result.warnings:
+            st.warning(f"⚠️ {warning}")
+        return True
+    
+    def failure_reason(self, code: str, scene_name: str = "GeneratedAnimation") -> str:
+        """Why code failed validate_code or the dry run, as text for the repair prompt"""
+        try:
+            compile(code, '<generated animation>', 'exec')
+        except SyntaxError as e:
+            return f"SyntaxError: {e.msg} (line {e.lineno})"
+        return (scene_problems(code, scene_name)
+                or (self.last_preflight and preflight_error(self.last_preflight))
+                or "Code failed validation")
+    
+    def repair(self, code: str, error: str, backend: LLMBackend,
+               scene_name: str = "GeneratedAnimation") -> Optional[str]:
+        """Send failing code and its error back to the LLM; returns fixed code or None"""
+        loop = create_repair_loop(backend, scene_name)
+        
+        def show_attempt(attempt: RepairAttempt) -> None:
+            if attempt.success:
+                st.write(f"✅ Repair attempt {attempt.attempt}: fixed ({attempt.tokens:,} tokens, {attempt.latency:.1f}s)")
             else:
-                st.error(f"❌ Manim rendering failed with exit code {result.returncode}")
+                reason = (attempt.error or '').splitlines()[0] if attempt.error else 'still failing'
+                st.write(f"❌ Repair attempt {attempt.attempt}: {reason} ({attempt.tokens:,} tokens, {attempt.latency:.1f}s)")
+        
+        with st.spinner(f"🔧 Asking {backend.model_name} to repair the scene..."):
+            outcome = loop.run(code, error, on_attempt=show_attempt)
+        
+        if outcome.success:
+            st.success(f"🔧 Scene repaired in {len(outcome.attempts)} attempt(s) using {outcome.tokens:,} tokens")
+            return outcome.code
+        st.error(f"❌ Could not repair the scene in {len(outcome.attempts)} attempt(s)")
+        return None
+    
+    def submit_animation(self, code: str, scene_name: str = "GeneratedAnimation",
+                         backend: Optional[LLMBackend] = None, quality: str = DRAFT_PRESET,
+                         name: Optional[str] = None, narration: Optional[str] = None) -> Optional[str]:
+        """Validate the code and queue it for background rendering; returns a job ID
+        
+        With a backend, code that fails validation is first sent through the
+        repair loop; submitted_code holds what was actually queued. Above the
+        draft quality (and with progressive rendering on) the job is a fast
+        draft whose follow_up_id renders the selected quality afterwards.
+        Renders with the same name reuse every animation an edit left unchanged,
+        and the narration script is prefetched alongside the code's voiceovers.
+        """
+        self.submitted_code = None
+        if not self.validate_code(code) or not self.preflight(code, scene_name):
+            if backend is None or not render_config.repair_config.enabled:
                 return None
-                
-        except subprocess.TimeoutExpired:
-            st.error("⏰ Animation rendering timed out (5 minutes). Try a simpler animation.")
-            return None
-        except Exception as e:
-            st.error(f"❌ Error running animation: {str(e)}")
-            import traceback
-            st.error(f"Full error: {traceback.format_exc()}")
+            code = self.repair(code, self.failure_reason(code, scene_name), backend, scene_name)
+            if code is None:
+                return None
+        
+        self.submitted_code = code
+        if render_config.queue_config.progressive:
+            job_id = render_queue.submit(code, scene_name, settings=QUALITY_PRESETS[DRAFT_PRESET],
+                                         final_settings=QUALITY_PRESETS[quality], name=name,
+                                         narration=narration, preflight=self.preflight_for(code))
+        else:
+            job_id = render_queue.submit(code, scene_name, settings=QUALITY_PRESETS[quality], name=name,
+                                         narration=narration, preflight=self.preflight_for(code))
+        if job_id is None:
+            st.warning("🚦 Render queue is full. Please try again in a minute.")
+        return job_id
+    
+    def run_animation(self, code: str, scene_name: str = "GeneratedAnimation",
+                      quality: str = DRAFT_PRESET, name: Optional[str] = None,
+                      narration: Optional[str] = None) -> Optional[str]:
+        """Run the generated animation code synchronously and return video path"""
+        if not self.validate_code(code) or not self.preflight(code, scene_name):
             return None
-        finally:
-            # Keep temporary file for debugging - don't delete immediately
-            pass
+        
+        settings = QUALITY_PRESETS[quality]
+        st.info(f"⚡ Rendering at {settings.quality_dir} ({settings.resolution.replace(',', 'x')}, {settings.fps} FPS)")
+        
+        with st.spinner("🎬 Rendering animation... Draft quality takes 30 seconds to 2 minutes"):
+            result = self.renderer.render(code, scene_name, settings=settings, name=name,
+                                          narration=narration, preflight=self.preflight_for(code))
+        
+        if result.scene_file:
+            st.info(f"📝 Created animation file: {Path(result.scene_file).name}")
+        
+        return self.show_render_result(result)
 
 def check_dependencies() -> Dict[str, bool]:
     """Check if required dependencies are installed"""
@@ -604,8 +580,11 @@ def main():
     with st.sidebar:
         st.header("🛠️ System Status")
         
-        # Check dependencies
+        # Check dependencies; the offline replay backend needs no Gemini SDK
+        llm_backend = create_llm_backend(get_google_api_key())
         deps = check_dependencies()
+        if isinstance(llm_backend, ReplayBackend):
+            deps.pop('google-generativeai')
         all_deps_ok = all(deps.values())
         
         if all_deps_ok:
@@ -619,6 +598,49 @@ def main():
             if not all_deps_ok:
                 st.code("pip install manim manim-voiceover gtts pygame google-generativeai")
         
+        if not llm_backend.is_available():
+            if isinstance(llm_backend, ReplayBackend):
+                st.error(f"⚠️ No recorded responses in {llm_backend.replay_dir}")
+            else:
+                st.error("⚠️ Google API Key not found. Please set GOOGLE_API_KEY in your Streamlit secrets.")
+            all_deps_ok = False
+        elif isinstance(llm_backend, ReplayBackend):
+            st.info(f"📼 Offline mode: replaying {len(llm_backend.fixtures)} recorded responses")
+        
+        # Render queue occupancy
+        queue_stats = render_queue.stats()
+        st.caption(
+            f"🎬 Render queue: {queue_stats['running']} running, {queue_stats['queued']} queued "
+            f"({queue_stats['max_workers']} workers, depth {queue_stats['max_queue_depth']})"
+        )
+        if render_queue.renderer.cache is not None:
+            cache_stats = render_queue.renderer.cache.stats()
+            st.caption(
+                f"⚡ Render cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses, "
+                f"{cache_stats['entries']} videos ({cache_stats['bytes']/1024/1024:.0f} of "
+                f"{cache_stats['max_bytes']/1024/1024:.0f} MB)"
+            )
+        if render_queue.renderer.segment_cache is not None:
+            segment_stats = render_queue.renderer.segment_cache.stats()
+            if segment_stats['reused'] + segment_stats['encoded']:
+                st.caption(
+                    f"♻️ Segments: {segment_stats['reuse_rate']:.0%} reused across re-renders, "
+                    f"{segment_stats['segments']} kept ({segment_stats['bytes']/1024/1024:.0f} MB)"
+                )
+        if response_cache is not None:
+            response_stats = response_cache.stats()
+            st.caption(
+                f"🧠 Gemini cache: {response_stats['hits']} hits / {response_stats['misses']} misses "
+                f"({response_stats['hit_rate']:.0%}), {response_stats['entries']} responses"
+            )
+        repair_summary = repair_stats.summary()
+        if repair_summary['loops']:
+            first_try = repair_summary['attempts'].get(1, {})
+            st.caption(
+                f"🔧 Repairs: {repair_summary['repaired']}/{repair_summary['loops']} scenes fixed, "
+                f"first attempt {first_try.get('success_rate', 0):.0%} at ~{first_try.get('mean_tokens', 0):,.0f} tokens"
+            )
+        
         st.markdown("---")
         
         # Quick examples
@@ -668,6 +690,7 @@ def main():
         
         include_equations = st.checkbox("Include mathematical equations", value=True)
         include_diagrams = st.checkbox("Include diagrams/visuals", value=True)
+        stream_sections = st.checkbox("Show sections as they are generated", value=True)
         
         # Generate button
         generate_button = st.button("🎬 Generate Animation", type="primary", disabled=not all_deps_ok)
@@ -680,13 +703,39 @@ def main():
             st.session_state.current_problem = problem_statement
             
             # Initialize generators
-            generator = AnimationGenerator()
+            generator = AnimationGenerator(llm_backend)
             
             # Generate animation code
-            sections = generator.generate_animation_code(problem_statement)
+            if stream_sections:
+                # Render each section the moment its header closes
+                live_preview = st.empty()
+                with live_preview.container():
+                    st.caption("🤖 Generating animation with Gemini AI...")
+                    section_slots = {name: st.empty() for name in SECTION_TITLES}
+                runner = ManimeAnimationRunner()
+                
+                def show_section(name: str, text: str) -> None:
+                    with section_slots[name].container():
+                        st.markdown(f"**{SECTION_TITLES[name]}**")
+                        if name == 'code':
+                            st.code(text, language='python')
+                            # Validate as soon as the code block ends, while Gemini may still be writing
+                            st.session_state.code_validation = (text, runner.validate_code(text))
+                        else:
+                            st.markdown(text or 'Not generated')
+                
+                sections = generator.generate_animation_code(problem_statement, on_section=show_section)
+                live_preview.empty()
+            else:
+                sections = generator.generate_animation_code(problem_statement)
+            if generator.last_from_cache:
+                st.success("⚡ Reused a cached Gemini response for this topic")
             
             # Store generated content in session state
             st.session_state.generated_sections = sections
+            st.session_state.code_repair = generator.last_repair
+            # Kept across edits, so re-renders of this animation reuse unchanged segments
+            st.session_state.animation_id = uuid.uuid4().hex[:12]
             
         # Display generated content if it exists in session state
         if hasattr(st.session_state, 'generated_sections') and st.session_state.generated_sections.get('code'):
@@ -698,27 +747,51 @@ def main():
                 st.info(f"📝 Current Topic: {st.session_state.get('current_problem', 'Unknown')}")
             with col_new:
                 if st.button("🆕 New Animation", help="Generate a new animation"):
-                    # Clear all session state
-                    for key in ['generated_sections', 'current_problem', 'video_path', 'video_bytes', 'video_code', 'render_requested']:
+                    # Stop renders of the old animation, then clear all session state
+                    for key in ('render_job_id', 'final_job_id'):
+                        if st.session_state.get(key):
+                            render_queue.cancel(st.session_state[key])
+                    for key in ['generated_sections', 'current_problem', 'video_path', 'video_bytes', 'video_code', 'render_requested', 'render_job_id', 'render_job_code', 'code_validation', 'code_repair', 'render_repairs', 'render_quality', 'final_job_id', 'video_quality', 'animation_id']:
                         if key in st.session_state:
                             del st.session_state[key]
                     st.rerun()
             
             # Show generated content
-            with st.expander("📋 Learning Objectives", expanded=True):
+            with st.expander(SECTION_TITLES['objectives'], expanded=True):
                 st.markdown(sections.get('objectives', 'Not generated'))
             
-            with st.expander("🎨 Visual Design Plan", expanded=True):
+            with st.expander(SECTION_TITLES['design_plan'], expanded=True):
                 st.markdown(sections.get('design_plan', 'Not generated'))
             
-            with st.expander("🎬 Detailed Storyboard", expanded=False):
+            with st.expander(SECTION_TITLES['storyboard'], expanded=False):
                 st.markdown(sections.get('storyboard', 'Not generated'))
             
-            with st.expander("🗣️ Hinglish Narration", expanded=False):
+            with st.expander(SECTION_TITLES['narration'], expanded=False):
                 st.markdown(sections.get('narration', 'Not generated'))
             
-            with st.expander("💻 Production-Ready Code", expanded=False):
-                st.code(sections.get('code', ''), language='python')
+            with st.expander(SECTION_TITLES['code'], expanded=False):
+                edited_code = st.text_area(
+                    "Edit the code and render again; unchanged animations are reused",
+                    sections.get('code', ''),
+                    height=400,
+                )
+                if edited_code != sections.get('code', ''):
+                    sections['code'] = edited_code
+            
+            repair = st.session_state.get('code_repair')
+            if repair and repair.diagnostics:
+                with st.expander(f"🔧 Code Repairs ({len(repair.diagnostics)})", expanded=not repair.valid):
+                    for diagnostic in repair.diagnostics:
+                        icon = "✅" if diagnostic.fixed else "❌"
+                        st.markdown(f"{icon} {diagnostic}")
+            
+            # Result of the validation that ran while the response was streaming
+            validation = st.session_state.get('code_validation')
+            if validation and validation[0] == sections.get('code'):
+                if validation[1]:
+                    st.success("✅ Code validated while it was being generated")
+                else:
+                    st.warning("⚠️ Generated code failed validation; see the checks when rendering")
                 
             # Run animation button
             render_button = st.button("▶️ Render Video", type="primary", key="render_video_btn")
@@ -726,6 +799,12 @@ def main():
             if render_button:
                 # Store rendering request in session state
                 st.session_state.render_requested = True
+                st.session_state.render_repairs = 0
+                st.session_state.render_quality = QUALITY_OPTIONS[quality]
+                # A new render supersedes any draft or background pass still waiting
+                for key in ('render_job_id', 'final_job_id'):
+                    if st.session_state.get(key):
+                        render_queue.cancel(st.session_state.pop(key))
                 st.rerun()
             
             # Handle video rendering if requested
@@ -740,39 +819,124 @@ def main():
                 # Initialize runner
                 runner = ManimeAnimationRunner()
                 
-                # Run the animation
-                video_path = runner.run_animation(sections['code'])
+                # Queue the animation; the render runs on a background worker
+                job_id = runner.submit_animation(sections['code'], backend=llm_backend,
+                                                 quality=st.session_state.get('render_quality', DRAFT_PRESET),
+                                                 name=st.session_state.get('animation_id'),
+                                                 narration=sections.get('narration'))
                 
-                if video_path and os.path.exists(video_path):
-                    st.success("🎉 Animation rendered successfully!")
-                    
-                    # Store video info in session state
-                    st.session_state.video_path = video_path
-                    st.session_state.video_code = sections['code']
-                    
-                    # Get video info
-                    video_size = os.path.getsize(video_path)
-                    st.info(f"📏 Video size: {video_size:,} bytes ({video_size/1024/1024:.1f} MB)")
-                    
-                    # Display video
-                    st.subheader("🎥 Your Animation")
-                    try:
-                        with open(video_path, 'rb') as video_file:
-                            video_bytes = video_file.read()
-                            st.video(video_bytes)
-                        
-                        # Store video bytes for downloads
-                        st.session_state.video_bytes = video_bytes
-                        
-                    except Exception as e:
-                        st.error(f"Error displaying video: {e}")
-                        st.info(f"Video file exists at: {video_path}")
+                if job_id:
+                    st.session_state.render_job_id = job_id
+                    st.session_state.render_job_code = runner.submitted_code
+                    sections['code'] = runner.submitted_code
                 else:
-                    st.error("❌ Failed to render animation. Check the errors above for details.")
+                    st.error("❌ Failed to queue animation. Check the errors above for details.")
                 
                 # Clear the render request
                 st.session_state.render_requested = False
             
+            # Poll the background render job without blocking the session
+            if st.session_state.get('render_job_id'):
+                job_id = st.session_state.render_job_id
+                job = render_queue.get_job(job_id)
+                
+                if job is None:
+                    st.warning("⚠️ Render job expired. Please render again.")
+                    del st.session_state.render_job_id
+                elif not job.done:
+                    st.markdown("---")
+                    st.subheader("🎬 Video Rendering Process")
+                    
+                    if job.status == JobStatus.QUEUED:
+                        position = render_queue.queue_position(job_id)
+                        st.info(f"⏳ Job `{job_id}` queued ({position} ahead of you)")
+                        if st.button("✖️ Cancel Render", key="cancel_render_btn"):
+                            render_queue.cancel(job_id)
+                            st.rerun()
+                    else:
+                        st.info(f"🎬 Job `{job_id}` rendering... {job.elapsed:.0f}s elapsed")
+                    
+                    # Poll again shortly; each rerun returns immediately
+                    time.sleep(2)
+                    st.rerun()
+                else:
+                    st.markdown("---")
+                    st.subheader("🎬 Video Rendering Process")
+                    del st.session_state.render_job_id
+                    
+                    if job.status == JobStatus.CANCELLED:
+                        st.warning("Render cancelled.")
+                    else:
+                        runner = ManimeAnimationRunner()
+                        video_path = runner.show_render_result(job.result)
+                        
+                        if video_path and os.path.exists(video_path):
+                            st.success("🎉 Animation rendered successfully!")
+                            
+                            # Store video info in session state
+                            st.session_state.video_path = video_path
+                            st.session_state.video_code = st.session_state.get('render_job_code', sections['code'])
+                            st.session_state.video_quality = job.settings.quality_dir
+                            if job.follow_up_id:
+                                # The player switches to the final render when it lands
+                                st.session_state.final_job_id = job.follow_up_id
+                            elif job.follow_up_skipped:
+                                st.warning("⚠️ Too many renders waiting, so the full-quality pass was "
+                                           "skipped; showing the draft. Render again for full quality.")
+                            
+                            # Get video info
+                            video_size = os.path.getsize(video_path)
+                            st.info(f"📏 Video size: {video_size:,} bytes ({video_size/1024/1024:.1f} MB)")
+                            
+                            try:
+                                with open(video_path, 'rb') as video_file:
+                                    # Store video bytes for display and downloads
+                                    st.session_state.video_bytes = video_file.read()
+                            except Exception as e:
+                                st.error(f"Error displaying video: {e}")
+                                st.info(f"Video file exists at: {video_path}")
+                        else:
+                            st.error("❌ Failed to render animation. Check the errors above for details.")
+                            
+                            # Send the render error back to the LLM instead of regenerating from scratch
+                            repairs = st.session_state.get('render_repairs', 0)
+                            if (render_config.repair_config.enabled and not job.result.timed_out
+                                    and repairs < render_config.repair_config.max_attempts
+                                    and llm_backend.is_available()):
+                                st.session_state.render_repairs = repairs + 1
+                                failing_code = st.session_state.get('render_job_code', sections['code'])
+                                error = job.result.stderr or job.result.error or ''
+                                repaired = runner.repair(failing_code, error, llm_backend)
+                                job_id = runner.submit_animation(
+                                    repaired, backend=llm_backend,
+                                    quality=st.session_state.get('render_quality', DRAFT_PRESET),
+                                    name=st.session_state.get('animation_id'),
+                                    narration=sections.get('narration')
+                                ) if repaired else None
+                                if job_id:
+                                    st.session_state.render_job_id = job_id
+                                    st.session_state.render_job_code = runner.submitted_code
+                                    sections['code'] = runner.submitted_code
+                                    st.rerun()
+            
+            # Swap in the selected-quality video once its background pass finishes
+            final_job = None
+            if st.session_state.get('final_job_id'):
+                final_job = render_queue.get_job(st.session_state.final_job_id)
+                if final_job is None or final_job.done:
+                    del st.session_state.final_job_id
+                if final_job is not None and final_job.done:
+                    final_result = final_job.result
+                    if final_result and final_result.success and os.path.exists(final_result.video_path or ''):
+                        with open(final_result.video_path, 'rb') as video_file:
+                            st.session_state.video_bytes = video_file.read()
+                        st.session_state.video_path = final_result.video_path
+                        st.session_state.video_quality = final_job.settings.quality_dir
+                        st.success(f"✨ Switched to the {final_job.settings.quality_dir} render")
+                    elif final_job.status != JobStatus.CANCELLED:
+                        st.warning("⚠️ The full-quality render failed; keeping the draft")
+                    final_job = None
+            
             # Show video and download buttons if video exists in session state
             if hasattr(st.session_state, 'video_path') and hasattr(st.session_state, 'video_bytes'):
                 st.markdown("---")
@@ -780,6 +944,10 @@ def main():
                 
                 # Display video from session state
                 st.video(st.session_state.video_bytes)
+                if final_job is not None:
+                    st.info(f"🖼️ Showing the {st.session_state.get('video_quality', 'draft')} draft; "
+                            f"rendering {final_job.settings.quality_dir} in the background "
+                            f"({final_job.elapsed:.0f}s so far)")
                 
                 # Download buttons
                 col1, col2, col3 = st.columns(3)
@@ -811,11 +979,18 @@ def main():
                             del st.session_state.video_bytes
                         if 'video_code' in st.session_state:
                             del st.session_state.video_code
+                        if st.session_state.get('final_job_id'):
+                            render_queue.cancel(st.session_state.pop('final_job_id'))
                         st.rerun()
                 
                 # Show video info
                 st.info(f"💾 Video saved at: {st.session_state.video_path}")
                 st.info(f"📏 Size: {len(st.session_state.video_bytes):,} bytes ({len(st.session_state.video_bytes)/1024/1024:.1f} MB)")
+                
+                if final_job is not None:
+                    # Poll the background pass; slower than the draft poll since a video is already up
+                    time.sleep(3)
+                    st.rerun()
             else:
                 st.error("Failed to generate animation code. Please try again.")
         
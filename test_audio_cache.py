@@ -0,0 +1,125 @@
+"""
+Test the indexed audio cache: hit delivery, clone fallback and eviction
+Works on small fake audio files in a temp directory; no TTS needed
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent))
+
+import utils.audio_cache as audio_cache_module
+from utils.audio_cache import AudioCache
+
+def fake_audio(directory, name, content=b'RIFF audio', size=None):
+    path = Path(directory) / name
+    path.write_bytes(content if size is None else b'0' * size)
+    return str(path)
+
+def test_hit_delivers_an_independent_file():
+    """A delivered hit is the cached audio, but writing to it leaves the cache alone"""
+    print("🧪 Testing hit delivery")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AudioCache(Path(tmp) / "cache", 10_000)
+        output = os.path.join(tmp, "line.wav")
+        assert not cache.deliver("k", output)
+
+        cached = cache.store("k", fake_audio(tmp, "fresh.wav", b'original'))
+        assert cache.deliver("k", output)
+        assert Path(output).read_bytes() == b'original'
+        assert os.stat(output).st_ino != os.stat(cached).st_ino
+
+        # Writing the delivered file in place, as an exporter would
+        with open(output, 'wb') as f:
+            f.write(b'overwritten')
+        assert Path(cached).read_bytes() == b'original'
+
+        stats = cache.stats()
+        assert (stats['hits'], stats['misses']) == (1, 1)
+    print("✅ Delivered file does not share the cache's inode")
+
+def test_store_without_move_keeps_caller_file_separate():
+    """store(move=False) clones, so the caller's file can still change"""
+    print("🧪 Testing store without move")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AudioCache(Path(tmp) / "cache", 10_000)
+        source = fake_audio(tmp, "out.wav", b'speech')
+        cached = cache.store("k", source, move=False)
+
+        Path(source).write_bytes(b'changed')
+        assert Path(cached).read_bytes() == b'speech'
+    print("✅ Cached copy unaffected by the caller's file")
+
+def test_reflink_falls_back_to_copy():
+    """Reflink is used where it works; otherwise the audio is copied"""
+    print("🧪 Testing clone fallback")
+    original_reflink = audio_cache_module._reflink
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = AudioCache(Path(tmp) / "cache", 10_000)
+            cache.store("k", fake_audio(tmp, "fresh.wav", b'speech'))
+
+            def working_reflink(src, dst):
+                shutil.copyfile(src, dst)
+                return True
+
+            audio_cache_module._reflink = working_reflink
+            assert cache.deliver("k", os.path.join(tmp, "a.wav"))
+            assert cache.stats()['reflinked'] == 1
+
+            audio_cache_module._reflink = lambda src, dst: False
+            assert cache.deliver("k", os.path.join(tmp, "b.wav"))
+            assert Path(tmp, "b.wav").read_bytes() == b'speech'
+            assert cache.stats()['copied'] == 1
+            assert not list(Path(tmp).glob("*.tmp"))
+    finally:
+        audio_cache_module._reflink = original_reflink
+    print("✅ Reflink first, copy when unsupported")
+
+def test_vanished_file_is_a_miss():
+    """A cache file deleted behind the index's back is dropped and reported as a miss"""
+    print("🧪 Testing vanished cache file")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AudioCache(Path(tmp) / "cache", 10_000)
+        os.unlink(cache.store("k", fake_audio(tmp, "fresh.wav")))
+        assert not cache.deliver("k", os.path.join(tmp, "out.wav"))
+        assert not cache.contains("k")
+    print("✅ Vanished file forgotten")
+
+def test_least_recently_used_evicted():
+    """Past the byte budget the least recently delivered audio is removed"""
+    print("🧪 Testing eviction")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AudioCache(Path(tmp) / "cache", 250)
+        first = cache.store("a", fake_audio(tmp, "a.wav", size=100))
+        second = cache.store("b", fake_audio(tmp, "b.wav", size=100))
+        assert cache.deliver("a", os.path.join(tmp, "out.wav"))
+        cache.store("c", fake_audio(tmp, "c.wav", size=100))
+
+        assert os.path.exists(first) and not os.path.exists(second)
+        assert not cache.contains("b")
+        assert cache.prune(100) == 1
+        assert cache.stats()['entries'] == 1
+    print("✅ Least recently used audio evicted")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing Audio Cache")
+    print("=" * 40)
+
+    test_hit_delivers_an_independent_file()
+    test_store_without_move_keeps_caller_file_separate()
+    test_reflink_falls_back_to_copy()
+    test_vanished_file_is_a_miss()
+    test_least_recently_used_evicted()
+
+    print("\n🎉 ALL AUDIO CACHE TESTS PASSED!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
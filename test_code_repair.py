@@ -0,0 +1,114 @@
+"""
+Test the AST-based code repair pipeline
+Pure Python; needs neither Manim nor Gemini
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent))
+
+from utils.code_repair import repair_code
+
+VALID = '''from manim import *
+
+class GeneratedAnimation(VoiceoverScene):
+    def construct(self):
+        PRIMARY_COLOR = BLUE
+        SECONDARY_COLOR = GREEN
+        ACCENT_COLOR = ORANGE
+        TEXT_COLOR = WHITE
+        label = Text("FRAME_WIDTH se bada", color=TEXT_COLOR)  # FRAME_WIDTH in a comment
+        box = Rectangle(width=config.frame_width, color=PRIMARY_COLOR)
+        with self.voiceover(text="Dekho") as tracker:
+            if box.width > 1:
+                self.play(Write(label), run_time=tracker.duration)
+            else:
+                self.wait()
+'''
+
+FLATTENED = '''from manim import *
+class GeneratedAnimation(VoiceoverScene):
+def construct(self):
+# Setup TTS (REQUIRED)
+self.set_speech_service(GTTSService())
+title = Text("बल FRAME_WIDTH", color=TEXT_COLOR).shift(UP * FRAME_HEIGHT / 4)
+with self.voiceover(text="Force") as tracker:
+self.play(Write(title), run_time=tracker.duration)
+def outro(self):
+self.play(FadeOut(Circle(radius=FRAME_WIDTH / 4, color=PRIMARY_COLOR)))
+'''
+
+def test_valid_code_is_untouched():
+    """Code that parses and defines its colors comes back byte for byte"""
+    print("🧪 Testing valid code passthrough")
+    result = repair_code(VALID)
+    assert result.valid
+    assert result.diagnostics == []
+    assert result.code == VALID.strip('\n')
+    print("✅ No changes to valid code")
+
+def test_flattened_code_is_reindented():
+    """Code that lost its indentation is rebuilt from its block structure"""
+    print("🧪 Testing re-indentation")
+    result = repair_code(FLATTENED)
+    assert result.valid
+    assert "Re-indented" in result.diagnostics[0].message
+
+    lines = result.code.split('\n')
+    assert '    def construct(self):' in lines
+    assert '        # Setup TTS (REQUIRED)' in lines
+    assert '            self.play(Write(title), run_time=tracker.duration)' in lines
+    assert '    def outro(self):' in lines
+    print("✅ Class, methods and with-blocks nested correctly")
+
+def test_constants_rewritten_at_node_level():
+    """Only real uses of undefined constants are replaced, not strings or attributes"""
+    print("🧪 Testing constant rewriting")
+    result = repair_code(FLATTENED)
+    assert 'Text("बल FRAME_WIDTH"' in result.code
+    assert 'UP * 8 / 4' in result.code
+    assert 'radius=14 / 4' in result.code
+    assert sum('Replaced undefined constant' in d.message for d in result.diagnostics) == 2
+
+    bound = repair_code("FRAME_WIDTH = 10\nx = FRAME_WIDTH / 2\n")
+    assert 'x = FRAME_WIDTH / 2' in bound.code
+    print("✅ Constants rewritten only where undefined")
+
+def test_missing_colors_injected():
+    """Colors used without a visible definition are defined after the imports"""
+    print("🧪 Testing color injection")
+    result = repair_code(FLATTENED)
+    lines = result.code.split('\n')
+    assert lines.index('TEXT_COLOR = WHITE') < lines.index('class GeneratedAnimation(VoiceoverScene):')
+    assert 'PRIMARY_COLOR = BLUE' in lines
+    compile(result.code, '<repaired>', 'exec')
+    print("✅ Colors defined at module level")
+
+def test_unrepairable_code_reported():
+    """Real syntax errors are reported, not papered over"""
+    print("🧪 Testing unrepairable code")
+    result = repair_code("def construct(self:\n    pass\n")
+    assert not result.valid
+    assert not result.diagnostics[0].fixed
+    assert result.diagnostics[0].line == 1
+    print("✅ Syntax error reported with its line")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing Code Repair")
+    print("=" * 40)
+
+    test_valid_code_is_untouched()
+    test_flattened_code_is_reindented()
+    test_constants_rewritten_at_node_level()
+    test_missing_colors_injected()
+    test_unrepairable_code_reported()
+
+    print("\n🎉 ALL CODE REPAIR TESTS PASSED!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
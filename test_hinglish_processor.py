@@ -0,0 +1,120 @@
+"""
+Test the Hinglish text processor's precompiled rewrite rules and memos
+Pure text processing; no TTS backend needed
+"""
+
+import dataclasses
+import os
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent))
+
+from utils.hinglish_processor import HinglishProcessor, _memo_size_from_env
+
+def test_romanize_longest_key_first():
+    """'क्योंकि' romanizes whole instead of as 'kyon' plus a stray syllable"""
+    print("🧪 Testing romanization")
+    processor = HinglishProcessor()
+    assert processor.romanize_hindi("क्योंकि force और mass") == "kyonki force aur mass"
+    assert processor.romanize_hindi("क्यों?") == "kyon?"
+    print("✅ Longest mapping wins")
+
+def test_pronunciation_hints_match_whole_words():
+    """Technical terms get a hint in any case, but not inside longer words"""
+    print("🧪 Testing pronunciation hints")
+    processor = HinglishProcessor()
+    hinted = processor.enhance_technical_pronunciation("Acceleration aur accelerations, photosynthesis")
+    assert hinted == "acceleration (एक्सेलेरेशन) aur accelerations, photosynthesis (फोटोसिंथेसिस)"
+    print("✅ Whole-word, case-insensitive hints")
+
+def test_pauses_after_conjunctions_only():
+    """Conjunctions get a pause; words that merely contain one do not"""
+    print("🧪 Testing natural pauses")
+    processor = HinglishProcessor()
+    assert processor._add_natural_pauses("force aur mass, aurat to photo tomato") == \
+        "force aur, mass, aurat to, photo tomato"
+    print("✅ Pauses only after whole conjunctions")
+
+def test_sentences_classified_in_one_pass():
+    """Script ratios decide the language; technical terms are flagged"""
+    print("🧪 Testing sentence classification")
+    processor = HinglishProcessor()
+    segments = processor.detect_language_segments(
+        "देखिए यहाँ क्या है। Force equals mass times acceleration. यह force है")
+    assert [(s.language, s.is_technical) for s in segments] == [('hi', False), ('en', True), ('mixed', True)]
+    assert processor.detect_language_segments("123 ... !!") == []
+    print("✅ Hindi, English and mixed sentences classified")
+
+def test_compile_rules_picks_up_edited_tables():
+    """Editing a table and recompiling changes the output"""
+    print("🧪 Testing recompiled rules")
+    processor = HinglishProcessor()
+    assert processor.enhance_technical_pronunciation("momentum") == "momentum"
+    processor.pronunciation_adjustments['momentum'] = 'मोमेंटम'
+    processor.compile_rules()
+    assert processor.enhance_technical_pronunciation("Momentum") == "momentum (मोमेंटम)"
+    print("✅ New table entries take effect")
+
+def test_memo_hits_and_shared_values_are_safe():
+    """Repeated text is a memo hit, and callers cannot change what other callers get"""
+    print("🧪 Testing memoization")
+    processor = HinglishProcessor(memo_size=2)
+    text = "Force aur mass. Acceleration dekho!"
+
+    first = processor.detect_language_segments(text)
+    first.append(None)
+    try:
+        first[0].text = "changed"
+        assert False, "memoized segments must be immutable"
+    except dataclasses.FrozenInstanceError:
+        pass
+    valid, issues = processor.validate_hinglish_text("Sirf English text here")
+    issues.clear()
+
+    assert [s.text for s in processor.detect_language_segments(text)] == ["Force aur mass.", "Acceleration dekho!"]
+    assert processor.validate_hinglish_text("Sirf English text here")[1]
+    stats = processor.memo_stats()
+    assert stats['segments']['hits'] >= 1 and stats['validation']['hits'] == 1
+
+    for i in range(3):
+        processor.process_for_tts(f"Line {i}.", 'gtts')
+    assert processor.memo_stats()['process_for_tts']['entries'] == 2
+    print("✅ Hits counted, shared values unchanged, size bounded")
+
+def test_memo_size_from_env():
+    """A malformed memo size falls back to the default"""
+    print("🧪 Testing memo size setting")
+    saved = os.environ.get('HINGLISH_PROCESSOR_MEMO_SIZE')
+    try:
+        os.environ['HINGLISH_PROCESSOR_MEMO_SIZE'] = 'lots'
+        assert _memo_size_from_env() == 4096
+        os.environ['HINGLISH_PROCESSOR_MEMO_SIZE'] = '0'
+        assert _memo_size_from_env() == 0
+    finally:
+        if saved is None:
+            os.environ.pop('HINGLISH_PROCESSOR_MEMO_SIZE', None)
+        else:
+            os.environ['HINGLISH_PROCESSOR_MEMO_SIZE'] = saved
+    print("✅ Malformed value ignored")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing Hinglish Processor")
+    print("=" * 40)
+
+    test_romanize_longest_key_first()
+    test_pronunciation_hints_match_whole_words()
+    test_pauses_after_conjunctions_only()
+    test_sentences_classified_in_one_pass()
+    test_compile_rules_picks_up_edited_tables()
+    test_memo_hits_and_shared_values_are_safe()
+    test_memo_size_from_env()
+
+    print("\n🎉 ALL HINGLISH PROCESSOR TESTS PASSED!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
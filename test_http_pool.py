@@ -0,0 +1,135 @@
+"""
+Test the pooled TTS HTTP transport against the local mock server
+Needs gtts and requests; no network access
+"""
+
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent))
+
+import utils.voice_manager as voice_manager_module
+from config.tts_config import tts_config
+from utils.http_pool import HTTPSessionPool
+from utils.mock_tts_server import FAKE_MP3, MockTTSServer
+from utils.voice_manager import GTTSService
+
+LONG_TEXT = ("Dekho, yeh Newton ka second law hai, jo batata hai ki force equals mass times acceleration hota hai. "
+             "Agar mass constant rahe to acceleration force ke directly proportional hota hai.")
+
+class MockEndpoint:
+    """Runs the mock server and points the gTTS endpoint at it"""
+
+    def __enter__(self):
+        self.server = MockTTSServer(connect_delay=0, response_delay=0).start()
+        self.saved = tts_config.http_pool_config.gtts_endpoint
+        tts_config.http_pool_config.gtts_endpoint = self.server.url
+        return self.server
+
+    def __exit__(self, *exc):
+        tts_config.http_pool_config.gtts_endpoint = self.saved
+        self.server.stop()
+
+def test_rebase_url_keeps_path_and_query():
+    """Only scheme and host change when a request is rebased"""
+    print("🧪 Testing URL rebasing")
+    url = "https://translate.google.com/_/TranslateWebserverUi/data/batchexecute?rpcids=jQ1olc"
+    assert HTTPSessionPool.rebase_url(url, "http://127.0.0.1:8765") == \
+        "http://127.0.0.1:8765/_/TranslateWebserverUi/data/batchexecute?rpcids=jQ1olc"
+    assert HTTPSessionPool.rebase_url(url, None) == url
+    print("✅ Path and query kept")
+
+def test_per_host_limit():
+    """No more than per_host_limit requests run at once against one host"""
+    print("🧪 Testing per-host limit")
+    pool = HTTPSessionPool(per_host_limit=2)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def call():
+        with pool._host_slot("http://127.0.0.1:1/path"):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.pop()
+
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(peak) == 2
+    print("✅ Concurrency capped per host")
+
+def test_gtts_parts_over_one_pool():
+    """A multi-part gTTS line is fetched over the pool and written in order"""
+    print("🧪 Testing pooled gTTS")
+    with MockEndpoint() as server, tempfile.TemporaryDirectory() as tmp:
+        pool = HTTPSessionPool(pool_size=4, per_host_limit=2)
+        service = GTTSService(pool=pool)
+        output = os.path.join(tmp, "line.mp3")
+
+        assert service.synthesize(LONG_TEXT, output, config={'lang': 'hi'})
+        parts = server.requests
+        assert parts > 1
+        assert Path(output).read_bytes() == FAKE_MP3 * parts
+        assert pool.requests_sent == parts
+        assert server.connections <= 2
+        pool.close()
+    print("✅ Parts fetched concurrently on kept-alive connections")
+
+def test_gtts_falls_back_to_write_to_fp():
+    """When gTTS internals change, the public write_to_fp is used instead"""
+    print("🧪 Testing gTTS fallback")
+    from gtts import gTTS
+    original_pattern = voice_manager_module._GTTS_AUDIO_PATTERN
+    original_prepare = gTTS._prepare_requests
+    original_write = gTTS.write_to_fp
+    gTTS.write_to_fp = lambda self, fp: fp.write(b'public api audio')
+    try:
+        with MockEndpoint(), tempfile.TemporaryDirectory() as tmp:
+            service = GTTSService(pool=HTTPSessionPool())
+
+            # Response format no longer matches
+            voice_manager_module._GTTS_AUDIO_PATTERN = re.compile(r'no such audio field')
+            output = os.path.join(tmp, "changed_format.mp3")
+            assert service.synthesize("Force", output, config={'lang': 'hi'})
+            assert Path(output).read_bytes() == b'public api audio'
+            voice_manager_module._GTTS_AUDIO_PATTERN = original_pattern
+
+            # Private request builder removed
+            del gTTS._prepare_requests
+            output = os.path.join(tmp, "no_private_api.mp3")
+            assert service.synthesize("Force", output, config={'lang': 'hi'})
+            assert Path(output).read_bytes() == b'public api audio'
+    finally:
+        voice_manager_module._GTTS_AUDIO_PATTERN = original_pattern
+        gTTS._prepare_requests = original_prepare
+        gTTS.write_to_fp = original_write
+    print("✅ write_to_fp used when the private API changes")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing HTTP Pool")
+    print("=" * 40)
+
+    test_rebase_url_keeps_path_and_query()
+    test_per_host_limit()
+    test_gtts_parts_over_one_pool()
+    test_gtts_falls_back_to_write_to_fp()
+
+    print("\n🎉 ALL HTTP POOL TESTS PASSED!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
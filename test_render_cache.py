@@ -0,0 +1,160 @@
+"""
+Test the content-addressed render cache and its LRU index
+Uses small fake video files in a temp directory; no Manim needed
+"""
+
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent))
+
+from utils.lru_index import LRUIndex
+from utils.render_cache import RenderCache, render_cache_key
+
+SCENE = '''from manim import *
+
+class GeneratedAnimation(VoiceoverScene):
+    def construct(self):
+        with self.voiceover(text="""Force barabar hai
+mass  into acceleration""") as tracker:
+            self.play(Write(Text("F = ma")))
+'''
+
+def key(code):
+    return render_cache_key(code, "GeneratedAnimation", "l", 15, "480,360")
+
+def fake_video(directory, name, size):
+    path = Path(directory) / f"{name}.mp4"
+    path.write_bytes(b'0' * size)
+    return str(path)
+
+def test_cosmetic_changes_share_a_key():
+    """Comments, blank lines, trailing spaces and indent width do not change the key"""
+    print("🧪 Testing cosmetic normalization")
+    cosmetic = SCENE.replace("    def construct", "\n    # Main scene\n    def construct") + "\n\n"
+    cosmetic = cosmetic.replace("(Text(\"F = ma\")))", "(Text(\"F = ma\")))   # title")
+    assert key(cosmetic) == key(SCENE)
+    assert key(SCENE.replace("    ", "  ")) == key(SCENE)
+    assert key(SCENE.replace("\n", "\r\n")) == key(SCENE)
+    print("✅ Cosmetic edits hash identically")
+
+def test_string_contents_change_the_key():
+    """Whitespace and blank lines inside strings are narration, not formatting"""
+    print("🧪 Testing string contents")
+    assert key(SCENE.replace("mass  into", "mass into")) != key(SCENE)
+    assert key(SCENE.replace("hai\nmass", "hai\n\nmass")) != key(SCENE)
+    assert key(SCENE.replace("hai\nmass", "hai   \nmass")) != key(SCENE)
+    assert key(SCENE.replace('"F = ma"', '"F  = ma"')) != key(SCENE)
+    print("✅ Scenes with different strings get different keys")
+
+def test_lookup_store_and_eviction():
+    """Stored videos are found again; past the budget the least recently used go first"""
+    print("🧪 Testing store and eviction")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = RenderCache(Path(tmp) / "cache", max_bytes=2500)
+        assert cache.lookup("a") is None
+
+        work_dir = Path(tmp) / "work"
+        work_dir.mkdir()
+        cache.store("a", fake_video(tmp, "a", 1000), work_dir=work_dir)
+        assert not work_dir.exists()
+        cache.store("b", fake_video(tmp, "b", 1000))
+        assert cache.lookup("a")                      # a is now the most recently used
+        cache.store("c", fake_video(tmp, "c", 1000))
+
+        assert cache.lookup("b") is None
+        assert cache.lookup("a") and cache.lookup("c")
+        assert not (Path(tmp) / "cache" / "b.mp4").exists()
+        stats = cache.stats()
+        assert stats['entries'] == 2 and stats['evictions'] == 1
+    print("✅ Least recently used video evicted")
+
+def test_oversized_video_survives_its_store():
+    """A video larger than the whole budget is still there when store returns it"""
+    print("🧪 Testing oversized store")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = RenderCache(Path(tmp) / "cache", max_bytes=500)
+        cache.store("small", fake_video(tmp, "small", 100))
+        path = cache.store("big", fake_video(tmp, "big", 1000))
+
+        assert Path(path).exists()
+        assert cache.lookup("small") is None
+        cache.store("next", fake_video(tmp, "next", 100))
+        assert not Path(path).exists()
+    print("✅ Just-stored video kept until the next store")
+
+def test_missing_file_is_a_miss():
+    """A cached file deleted behind the cache's back is forgotten"""
+    print("🧪 Testing vanished files")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = RenderCache(Path(tmp) / "cache", max_bytes=10_000)
+        Path(cache.store("a", fake_video(tmp, "a", 100))).unlink()
+        assert cache.lookup("a") is None
+        assert cache.index.count() == 0
+    print("✅ Vanished file treated as a miss")
+
+def test_concurrent_store():
+    """Render workers storing at once leave every video indexed and on disk"""
+    print("🧪 Testing concurrent store")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = RenderCache(Path(tmp) / "cache", max_bytes=10 * 1024 * 1024)
+        videos = [fake_video(tmp, f"v{i}", 2000) for i in range(16)]
+        errors = []
+
+        def store(i):
+            try:
+                cache.store(f"key{i}", videos[i])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=store, args=(i,)) for i in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors
+        assert cache.index.count() == 16
+        assert cache.index.total_bytes() == 16 * 2000
+        assert all(cache.lookup(f"key{i}") for i in range(16))
+    print("✅ All concurrent stores indexed")
+
+def test_lru_index_persists():
+    """Entries and counters survive reopening the index"""
+    print("🧪 Testing index persistence")
+    with tempfile.TemporaryDirectory() as tmp:
+        index = LRUIndex(Path(tmp) / "index.sqlite3", max_bytes=100)
+        index.put("a", "/a", 60, {'scene': 'A'})
+        index.incr('hits', 3)
+        index.close()
+
+        reopened = LRUIndex(Path(tmp) / "index.sqlite3", max_bytes=100)
+        assert reopened.get("a")['meta'] == {'scene': 'A'}
+        assert reopened.counters()['hits'] == 3
+        reopened.put("b", "/b", 60)
+        assert [entry['key'] for entry in reopened.evict()] == ["a"]
+        reopened.close()
+    print("✅ Index reopened with entries and counters")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing Render Cache")
+    print("=" * 40)
+
+    test_cosmetic_changes_share_a_key()
+    test_string_contents_change_the_key()
+    test_lookup_store_and_eviction()
+    test_oversized_video_survives_its_store()
+    test_missing_file_is_a_miss()
+    test_concurrent_store()
+    test_lru_index_persists()
+
+    print("\n🎉 ALL RENDER CACHE TESTS PASSED!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,222 @@
+"""
+Test the background render job queue
+Uses a fake renderer so no Manim install is needed
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent))
+
+from utils.manim_renderer import QUALITY_PRESETS, RenderResult
+from utils.render_queue import RenderJobQueue, JobStatus
+
+class FakeRenderer:
+    """Stands in for ManimRenderer with a fixed render time"""
+
+    def __init__(self, delay: float = 0.1, success: bool = True, timed_out: bool = False):
+        self.delay = delay
+        self.success = success
+        self.timed_out = timed_out
+        self.rendered = []
+
+    def cached_result(self, code, scene_name, settings=None):
+        return None
+
+    def render(self, code, scene_name, timeout=None, settings=None, check_cache=True, name=None, narration=None,
+               preflight=None):
+        self.rendered.append((code, settings))
+        time.sleep(self.delay)
+        return RenderResult(success=self.success, video_path="fake.mp4" if self.success else None,
+                            timed_out=self.timed_out)
+
+def wait_for(render_queue, job_id, limit=5.0):
+    """Poll a job the way the UI does until it finishes"""
+    deadline = time.time() + limit
+    while time.time() < deadline:
+        job = render_queue.get_job(job_id)
+        if job.done:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+def test_submit_and_poll():
+    """Jobs get IDs and finish with their render result"""
+    print("🧪 Testing submit and poll")
+    render_queue = RenderJobQueue(renderer=FakeRenderer(), max_workers=1, max_queue_depth=4)
+
+    job_id = render_queue.submit("code")
+    assert job_id
+
+    job = wait_for(render_queue, job_id)
+    assert job.status == JobStatus.SUCCEEDED
+    assert render_queue.get_result(job_id).video_path == "fake.mp4"
+    print("✅ Job finished and result is fetchable")
+    render_queue.shutdown()
+
+def test_queue_depth_is_bounded():
+    """Submissions beyond the configured depth are refused"""
+    print("🧪 Testing queue depth limit")
+    render_queue = RenderJobQueue(renderer=FakeRenderer(delay=0.3), max_workers=1, max_queue_depth=2)
+
+    job_ids = [render_queue.submit("code") for _ in range(6)]
+    accepted = [job_id for job_id in job_ids if job_id]
+
+    # One job may already be on the worker, freeing a slot
+    assert 2 <= len(accepted) <= 3
+    assert None in job_ids
+    print(f"✅ Accepted {len(accepted)} of {len(job_ids)} submissions")
+    render_queue.shutdown(wait=False)
+
+def test_cancelled_jobs_free_their_slots():
+    """A re-submission right after cancelling is not refused as queue full"""
+    print("🧪 Testing slots of cancelled jobs")
+    render_queue = RenderJobQueue(renderer=FakeRenderer(delay=0.3), max_workers=1, max_queue_depth=2)
+
+    busy_id = render_queue.submit("busy")
+    while render_queue.get_job(busy_id).status == JobStatus.QUEUED:
+        time.sleep(0.01)
+    waiting = [render_queue.submit(f"edit {i}") for i in range(2)]
+    assert all(waiting) and render_queue.submit("one too many") is None
+
+    for job_id in waiting:
+        assert render_queue.cancel(job_id)
+    resubmitted = render_queue.submit("latest edit")
+    assert resubmitted
+    assert render_queue.queue_position(resubmitted) == 0
+    assert wait_for(render_queue, resubmitted).status == JobStatus.SUCCEEDED
+    print("✅ Cancelled jobs left the queue at once")
+    render_queue.shutdown()
+
+def test_timeout_and_cancel():
+    """Timed out renders are reported and queued jobs can be cancelled"""
+    print("🧪 Testing timeout status and cancellation")
+    render_queue = RenderJobQueue(renderer=FakeRenderer(delay=0.2, success=False, timed_out=True),
+                                  max_workers=1, max_queue_depth=4)
+
+    first = render_queue.submit("code")
+    second = render_queue.submit("code")
+    assert render_queue.cancel(second)
+
+    assert wait_for(render_queue, first).status == JobStatus.TIMED_OUT
+    assert render_queue.get_job(second).status == JobStatus.CANCELLED
+    print("✅ Timeout and cancellation reported")
+    render_queue.shutdown()
+
+def test_progressive_draft_then_final():
+    """A draft is followed by a background pass at the final settings; new drafts go first"""
+    print("🧪 Testing progressive rendering")
+    renderer = FakeRenderer(delay=0.1)
+    render_queue = RenderJobQueue(renderer=renderer, max_workers=1, max_queue_depth=4)
+
+    draft_id = render_queue.submit("scene a", settings=QUALITY_PRESETS['low'],
+                                   final_settings=QUALITY_PRESETS['high'], name="anim_a")
+    # Submitted while scene a's draft renders: it runs before scene a's final pass
+    other_id = render_queue.submit("scene b", settings=QUALITY_PRESETS['low'])
+    draft = wait_for(render_queue, draft_id)
+    assert draft.status == JobStatus.SUCCEEDED
+    assert draft.follow_up_id
+
+    final = wait_for(render_queue, draft.follow_up_id)
+    wait_for(render_queue, other_id)
+    assert final.background and final.settings == QUALITY_PRESETS['high']
+    assert final.name == "anim_a"    # Same animation, so its partial movie files are shared
+    assert final.follow_up_id is None
+
+    order = [(code, settings.quality) for code, settings in renderer.rendered]
+    assert order == [("scene a", 'l'), ("scene b", 'l'), ("scene a", 'h')]
+
+    # Same settings for draft and final: a single pass
+    single = wait_for(render_queue, render_queue.submit("scene c", settings=QUALITY_PRESETS['low'],
+                                                        final_settings=QUALITY_PRESETS['low']))
+    assert single.follow_up_id is None
+    print("✅ Draft first, final pass in the background")
+    render_queue.shutdown()
+
+def test_cancel_drops_final_pass():
+    """Cancelling a running draft queues no final pass; cancelling a finished one cancels its pass"""
+    print("🧪 Testing cancellation of final passes")
+    renderer = FakeRenderer(delay=0.2)
+    render_queue = RenderJobQueue(renderer=renderer, max_workers=1, max_queue_depth=4)
+
+    running_id = render_queue.submit("scene a", settings=QUALITY_PRESETS['low'],
+                                     final_settings=QUALITY_PRESETS['high'], name="anim_a")
+    while render_queue.get_job(running_id).status == JobStatus.QUEUED:
+        time.sleep(0.01)
+    assert render_queue.cancel(running_id)
+    running = wait_for(render_queue, running_id)
+    assert running.status == JobStatus.SUCCEEDED and running.follow_up_id is None
+
+    # Another draft keeps the worker busy, so scene b's final pass is still queued when cancelled
+    draft_id = render_queue.submit("scene b", settings=QUALITY_PRESETS['low'],
+                                   final_settings=QUALITY_PRESETS['high'], name="anim_b")
+    busy_id = render_queue.submit("scene c", settings=QUALITY_PRESETS['low'])
+    draft = wait_for(render_queue, draft_id)
+    assert render_queue.cancel(draft_id)
+    assert render_queue.get_job(draft.follow_up_id).status == JobStatus.CANCELLED
+    wait_for(render_queue, busy_id)
+    time.sleep(0.3)
+
+    assert [code for code, _ in renderer.rendered] == ["scene a", "scene b", "scene c"]
+    print("✅ No final pass rendered after cancellation")
+    render_queue.shutdown()
+
+def test_newer_final_pass_supersedes_queued_one():
+    """A new final pass of the same animation cancels the one still waiting"""
+    print("🧪 Testing superseded final passes")
+    renderer = FakeRenderer(delay=0.1)
+    render_queue = RenderJobQueue(renderer=renderer, max_workers=1, max_queue_depth=4)
+
+    first_id = render_queue.submit("edit 1", settings=QUALITY_PRESETS['low'],
+                                   final_settings=QUALITY_PRESETS['high'], name="anim_a")
+    second_id = render_queue.submit("edit 2", settings=QUALITY_PRESETS['low'],
+                                    final_settings=QUALITY_PRESETS['high'], name="anim_a")
+    first, second = wait_for(render_queue, first_id), wait_for(render_queue, second_id)
+
+    assert wait_for(render_queue, first.follow_up_id).status == JobStatus.CANCELLED
+    assert wait_for(render_queue, second.follow_up_id).status == JobStatus.SUCCEEDED
+    assert [code for code, _ in renderer.rendered] == ["edit 1", "edit 2", "edit 2"]
+    print("✅ Only the latest final pass rendered")
+    render_queue.shutdown()
+
+def test_skipped_final_pass_is_reported():
+    """A draft whose final pass finds the background queue full says so"""
+    print("🧪 Testing skipped final pass")
+    renderer = FakeRenderer(delay=0.1)
+    render_queue = RenderJobQueue(renderer=renderer, max_workers=1, max_queue_depth=1)
+
+    # While the worker is busy, the draft waits and the background queue fills up
+    busy_id = render_queue.submit("busy")
+    while render_queue.get_job(busy_id).status == JobStatus.QUEUED:
+        time.sleep(0.01)
+    draft_id = render_queue.submit("scene", settings=QUALITY_PRESETS['low'],
+                                   final_settings=QUALITY_PRESETS['high'], name="anim_a")
+    render_queue._background.put_nowait("stale job")
+    draft = wait_for(render_queue, draft_id)
+    assert draft.status == JobStatus.SUCCEEDED
+    assert draft.follow_up_id is None and draft.follow_up_skipped
+    print("✅ Skipped final pass flagged on the draft")
+    render_queue.shutdown()
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing Render Job Queue")
+    print("=" * 40)
+
+    test_submit_and_poll()
+    test_queue_depth_is_bounded()
+    test_cancelled_jobs_free_their_slots()
+    test_timeout_and_cancel()
+    test_progressive_draft_then_final()
+    test_cancel_drops_final_pass()
+    test_newer_final_pass_supersedes_queued_one()
+    test_skipped_final_pass_is_reported()
+
+    print("\n🎉 ALL RENDER QUEUE TESTS PASSED!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
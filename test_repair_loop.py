@@ -0,0 +1,216 @@
+"""
+Test the bounded LLM repair loop
+Uses a scripted stand-in backend and validator; no Gemini or Manim needed
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent))
+
+from utils.code_repair import repair_code
+from utils.llm_backends import LLMBackend
+from utils.repair_loop import RepairLoop, RepairStats, error_line, trim_traceback
+
+BROKEN = '''from manim import *
+
+class GeneratedAnimation(VoiceoverScene):
+    def construct(self):
+        self.play(Write(titel))
+
+    def outro(self):
+        self.wait()
+'''
+
+FIXED = BROKEN.replace('titel', 'Text("Newton")')
+
+STDERR = '''Animation 0: Write(Text):  40%|####      | 2/5
+\x1b[31mTraceback (most recent call last)\x1b[0m
+  File "/app/temp_animations/animation_1.py", line 5, in construct
+    self.play(Write(titel))
+NameError: name 'titel' is not defined
+'''
+
+class ScriptedBackend(LLMBackend):
+    """Returns canned responses in order and remembers the prompts"""
+
+    def __init__(self, responses):
+        self.model_name = "scripted"
+        self.responses = list(responses)
+        self.prompts = []
+
+    def generate(self, prompt):
+        self.prompts.append(prompt)
+        return self.responses.pop(0)
+
+    def stream(self, prompt):
+        yield self.generate(prompt)
+
+    def is_available(self):
+        return True
+
+def validate(code):
+    """Stand-in for the dry run: fails, with the line, while the typo is present"""
+    if 'titel' not in code:
+        return None
+    line = next(i for i, text in enumerate(code.split('\n'), 1) if 'titel' in text)
+    return f"NameError: name 'titel' is not defined (line {line})"
+
+def test_trim_traceback():
+    """Progress bars and color codes are dropped; the exception is kept"""
+    print("🧪 Testing traceback trimming")
+    trimmed = trim_traceback(STDERR)
+    assert trimmed.startswith('Traceback (most recent call last)')
+    assert trimmed.endswith("NameError: name 'titel' is not defined")
+    assert '%|' not in trimmed and '\x1b' not in trimmed
+
+    long_error = '\n'.join(f"line {i}" for i in range(100))
+    assert len(trim_traceback(long_error, max_lines=10).splitlines()) == 10
+    print("✅ Traceback trimmed to what matters")
+
+def test_error_line_located():
+    """The scene frame is found in plain and rich tracebacks and in dry-run errors"""
+    print("🧪 Testing error location")
+    assert error_line(STDERR) == 5
+    assert error_line("│ /app/temp_animations/animation_1.py:7 in construct │\n"
+                      "│ /usr/lib/python3.11/site-packages/manim/scene/scene.py:1080 in play │") == 7
+    assert error_line("NameError: name 'titel' is not defined (line 12)") == 12
+    print("✅ Failing line found")
+
+def test_repair_succeeds_on_retry():
+    """A still-broken first answer is retried with the new error; the second one passes"""
+    print("🧪 Testing repair retries")
+    backend = ScriptedBackend([
+        "```python\ndef construct(self):\n    self.play(Write(titel))\n```",
+        "Here you go:\n```python\n    def construct(self):\n        self.play(Write(Text(\"Newton\")))\n```",
+    ])
+    stats = RepairStats()
+    outcome = RepairLoop(backend, validate, max_attempts=3, stats=stats).run(BROKEN, STDERR)
+
+    assert outcome.success
+    assert outcome.code == repair_code(FIXED).code
+    assert [a.success for a in outcome.attempts] == [False, True]
+    assert [a.scope for a in outcome.attempts] == ['method', 'method']
+
+    # The prompt carries the code and the trimmed error, not the generation template,
+    # and asks for the failing method only
+    assert "NameError" in backend.prompts[0] and "self.play(Write(titel))" in backend.prompts[0]
+    assert "ONLY the corrected `construct` method" in backend.prompts[0]
+    assert '%|' not in backend.prompts[0]
+    assert len(backend.prompts[0]) < len(BROKEN) + 1200
+
+    summary = stats.summary()
+    assert summary['repaired'] == 1
+    assert summary['attempts'][1]['success_rate'] == 0.0
+    assert summary['attempts'][2]['success_rate'] == 1.0
+    print("✅ Repaired on the second attempt")
+
+def test_full_file_answer_accepted():
+    """Without a usable line, the whole file is asked for and used"""
+    print("🧪 Testing whole-file repair")
+    backend = ScriptedBackend([f"```python\n{FIXED}```"])
+    outcome = RepairLoop(backend, validate).run(BROKEN, "Scene failed")
+
+    assert outcome.success
+    assert outcome.attempts[0].scope == 'file'
+    assert 'Text("Newton")' in outcome.code
+    print("✅ Whole-file answer used")
+
+def test_attempts_are_bounded():
+    """The loop gives up after max_attempts"""
+    print("🧪 Testing attempt bound")
+    backend = ScriptedBackend([f"```python\n{BROKEN}```"] * 5)
+    outcome = RepairLoop(backend, validate, max_attempts=2).run(BROKEN, STDERR)
+
+    assert not outcome.success
+    assert len(outcome.attempts) == 2
+    assert len(backend.prompts) == 2
+    print("✅ Stopped after two attempts")
+
+def test_unplaceable_method_keeps_code():
+    """A method answer that cannot be spliced in fails the attempt instead of replacing the scene"""
+    print("🧪 Testing unplaceable method answer")
+    backend = ScriptedBackend([
+        "```python\ndef intro(self):\n    self.wait()\n```",
+        "```python\ndef construct(self):\n    self.play(Write(Text(\"Newton\")))\n```",
+    ])
+    outcome = RepairLoop(backend, validate, max_attempts=3).run(BROKEN, STDERR)
+
+    assert [a.success for a in outcome.attempts] == [False, True]
+    assert "`construct` method" in outcome.attempts[0].error
+    # The second prompt still shows the whole scene and the original error
+    assert "class GeneratedAnimation" in backend.prompts[1] and "NameError" in backend.prompts[1]
+    assert outcome.code == repair_code(FIXED).code
+    print("✅ Previous code kept, attempt reported as failed")
+
+def test_invalid_answer_keeps_error():
+    """An answer that does not parse is dropped, and the next prompt keeps the original traceback"""
+    print("🧪 Testing unparseable answer")
+    backend = ScriptedBackend([
+        "```python\nfrom manim import *\n\nclass GeneratedAnimation(VoiceoverScene):\n"
+        "    def construct(self):\n        x = (1 +\n        self.play(Write(Text(\"Newton\")]]\n```",
+        f"```python\n{FIXED}```",
+    ])
+    outcome = RepairLoop(backend, validate, max_attempts=3).run(BROKEN, STDERR)
+
+    assert [a.success for a in outcome.attempts] == [False, True]
+    assert "SyntaxError" in outcome.attempts[0].error
+    assert "self.play(Write(titel))" in backend.prompts[1] and "NameError" in backend.prompts[1]
+    assert "SyntaxError" not in backend.prompts[1]
+    assert "ONLY the corrected `construct` method" in backend.prompts[1]
+    print("✅ Discarded answer's diagnostics not carried forward")
+
+class UsageBackend(ScriptedBackend):
+    """Reports token usage that depends on the prompt, after a delay"""
+
+    def generate(self, prompt):
+        usage = {'prompt_tokens': len(prompt), 'response_tokens': 1}
+        time.sleep(0.05)
+        self.last_usage = usage
+        time.sleep(0.05)
+        return "done"
+
+def test_usage_is_per_thread():
+    """Concurrent calls on one backend each read their own token usage"""
+    print("🧪 Testing per-thread usage")
+    backend = UsageBackend([])
+    seen = {}
+
+    def call(prompt):
+        backend.generate(prompt)
+        time.sleep(0.02)
+        seen[prompt] = backend.last_usage['prompt_tokens']
+
+    threads = [threading.Thread(target=call, args=("x" * n,)) for n in (10, 20, 30)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert seen == {"x" * n: n for n in (10, 20, 30)}
+    assert backend.last_usage is None    # Nothing was generated on this thread
+    print("✅ Each thread saw its own usage")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing Repair Loop")
+    print("=" * 40)
+
+    test_trim_traceback()
+    test_error_line_located()
+    test_repair_succeeds_on_retry()
+    test_full_file_answer_accepted()
+    test_attempts_are_bounded()
+    test_unplaceable_method_keeps_code()
+    test_invalid_answer_keeps_error()
+    test_usage_is_per_thread()
+
+    print("\n🎉 ALL REPAIR LOOP TESTS PASSED!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,89 @@
+"""
+Test the persistent Gemini response cache
+Runs without Gemini, Streamlit or network access
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent))
+
+from utils.response_cache import ResponseCache, normalize_problem_statement, response_cache_key
+
+TEMPLATE = "Explain this:\n{problem_statement}\n"
+
+def make_cache(max_bytes=1024 * 1024, ttl=3600):
+    """Cache in a fresh temporary directory"""
+    return ResponseCache(Path(tempfile.mkdtemp()), max_bytes, ttl)
+
+def test_key_normalization():
+    """Near-identical statements share a key; template and model changes do not"""
+    print("🧪 Testing cache keys")
+    statement = "Explain Newton's second law F=ma."
+    key = response_cache_key(TEMPLATE, "gemini-2.5-flash", statement)
+
+    assert normalize_problem_statement("  Explain   NEWTON's second law F=ma!  ") == "explain newton's second law f=ma"
+    assert response_cache_key(TEMPLATE, "gemini-2.5-flash", "explain newton's  second law f=ma") == key
+    assert response_cache_key(TEMPLATE + " ", "gemini-2.5-flash", statement) != key
+    assert response_cache_key(TEMPLATE, "gemini-2.5-pro", statement) != key
+    print("✅ Keys cover template, model and normalized statement")
+
+def test_hit_and_miss():
+    """Stored responses are returned and counted"""
+    print("🧪 Testing hits and misses")
+    cache = make_cache()
+    key = response_cache_key(TEMPLATE, "model", "Water molecule structure")
+
+    assert cache.lookup(key) is None
+    cache.store(key, "=== CODE ===\nprint('hi')", {'model': 'model'})
+    assert cache.lookup(key) == "=== CODE ===\nprint('hi')"
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+    assert stats['hit_rate'] == 0.5
+    print("✅ Hit after store, stats updated")
+
+def test_ttl_expiry():
+    """Entries older than the TTL are dropped on lookup"""
+    print("🧪 Testing TTL expiry")
+    cache = make_cache(ttl=1)
+    cache.store("old", "stale response")
+    cache.index._connect().execute("UPDATE entries SET created = ?", (time.time() - 10,))
+
+    assert cache.lookup("old") is None
+    assert cache.stats()['expired'] == 1
+    assert cache.stats()['entries'] == 0
+    print("✅ Expired response treated as a miss")
+
+def test_size_eviction():
+    """Least recently used responses are evicted past the byte budget"""
+    print("🧪 Testing size-based eviction")
+    cache = make_cache(max_bytes=2500)
+    for i in range(4):
+        cache.store(f"key{i}", "x" * 1000)
+        time.sleep(0.01)
+
+    assert cache.stats()['bytes'] <= 2500
+    assert cache.lookup("key0") is None
+    assert cache.lookup("key3") is not None
+    print("✅ Oldest responses evicted")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing Response Cache")
+    print("=" * 40)
+
+    test_key_normalization()
+    test_hit_and_miss()
+    test_ttl_expiry()
+    test_size_eviction()
+
+    print("\n🎉 ALL RESPONSE CACHE TESTS PASSED!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
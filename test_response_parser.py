@@ -0,0 +1,92 @@
+"""
+Test the incremental Gemini response parser
+Feeds a canned response in chunks of various sizes, as the streaming API would
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent))
+
+from utils.response_parser import IncrementalSectionParser, parse_gemini_response
+
+RESPONSE = '''Sure, here is the animation.
+=== LEARNING OBJECTIVES ===
+- Understand F = ma
+
+=== VISUAL DESIGN PLAN ===
+Blue block on a surface
+=== DETAILED STORYBOARD ===
+1. Intro (0-5s)
+=== HINGLISH NARRATION SCRIPT ===
+1. Dekho, yeh force hai
+=== PRODUCTION-READY CODE ===
+```python
+from manim import *
+from manim_voiceover import VoiceoverScene
+class GeneratedAnimation(VoiceoverScene):
+    def construct(self):
+        # Setup TTS (REQUIRED)
+        self.set_speech_service(GTTSService())
+        PRIMARY_COLOR = BLUE
+        with self.voiceover(text="Force") as tracker:
+            self.play(Write(Text("F = ma")), run_time=tracker.duration)
+```
+Let me know if you need changes.
+'''
+
+def stream(text, chunk_size):
+    """Feed text in fixed-size chunks; return the close events with their offsets"""
+    parser = IncrementalSectionParser()
+    events = []
+    for offset in range(0, len(text), chunk_size):
+        events += [(offset, name) for name, _ in parser.feed(text[offset:offset + chunk_size])]
+    events += [(len(text), name) for name, _ in parser.close()]
+    return parser, events
+
+def test_chunking_matches_full_parse():
+    """Any chunking yields the same sections as parsing the full response"""
+    print("🧪 Testing chunked parsing")
+    expected = parse_gemini_response(RESPONSE)
+    for chunk_size in (1, 3, 17, 256, len(RESPONSE)):
+        parser, events = stream(RESPONSE, chunk_size)
+        assert parser.sections == expected
+        assert [name for _, name in events] == ['objectives', 'design_plan', 'storyboard', 'narration', 'code']
+    print("✅ Same sections for every chunk size")
+
+def test_sections_close_early():
+    """Each section is emitted when the next header arrives, code when its fence closes"""
+    print("🧪 Testing early section close")
+    _, events = stream(RESPONSE, 1)
+    offsets = dict((name, offset) for offset, name in events)
+
+    assert offsets['objectives'] < RESPONSE.index('Blue block')
+    assert offsets['code'] < RESPONSE.index('Let me know')
+    print("✅ Sections emitted before the response ends")
+
+def test_code_is_cleaned():
+    """The emitted code has its fences removed and colors filled in"""
+    print("🧪 Testing code cleanup")
+    code = parse_gemini_response(RESPONSE)['code']
+
+    assert '```' not in code and 'Let me know' not in code
+    assert 'TEXT_COLOR = WHITE' in code
+    compile(code, '<generated>', 'exec')
+    print("✅ Code is compilable")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing Response Parser")
+    print("=" * 40)
+
+    test_chunking_matches_full_parse()
+    test_sections_close_early()
+    test_code_is_cleaned()
+
+    print("\n🎉 ALL RESPONSE PARSER TESTS PASSED!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,141 @@
+"""
+Test the partial movie segment index behind incremental re-renders
+Writes fake partial movie files to a temp directory; no Manim needed
+"""
+
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent))
+
+from utils.manim_renderer import ManimRenderer, RenderSettings
+from utils.segment_cache import SegmentCache
+
+def write_segments(partial_dir, hashes, size=100):
+    partial_dir.mkdir(parents=True, exist_ok=True)
+    for segment in hashes:
+        (partial_dir / f"{segment}.mp4").write_bytes(b'0' * size)
+
+def manim_log(reused):
+    """manim's INFO lines for animations taken from the cache"""
+    return '\n'.join(f"[10/17/26 12:00:00] INFO     Animation {i} : Using cached data (hash : {segment})"
+                     for i, segment in enumerate(reused))
+
+def test_reused_and_encoded_counted():
+    """A re-render after an edit reuses unchanged segments and encodes only the edited one"""
+    print("🧪 Testing segment reuse accounting")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SegmentCache(Path(tmp) / "index.sqlite3", max_bytes=10_000)
+        partial_dir = Path(tmp) / "animation_ab12" / "360p15" / "partial_movie_files" / "GeneratedAnimation"
+
+        first = cache.record(partial_dir, cache.snapshot(partial_dir), "")
+        assert (first.reused, first.encoded) == (0, 0)
+
+        before = cache.snapshot(partial_dir)
+        write_segments(partial_dir, ["1_1_1", "2_2_2", "3_3_3"])
+        first = cache.record(partial_dir, before, "")
+        assert (first.reused, first.encoded) == (0, 3)
+
+        # Narration of animation 2 edited: it gets a new hash, the others come from the cache
+        before = cache.snapshot(partial_dir)
+        write_segments(partial_dir, ["2_2_9"])
+        second = cache.record(partial_dir, before, manim_log(["1_1_1", "3_3_3"]))
+        assert (second.reused, second.encoded) == (2, 1)
+
+        stats = cache.stats()
+        assert stats['reused'] == 2 and stats['encoded'] == 4
+        assert stats['segments'] == 4
+    print("✅ Two reused, one re-encoded")
+
+def test_least_recently_used_segments_evicted():
+    """Past the byte budget, segments no recent render used are deleted"""
+    print("🧪 Testing segment eviction")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SegmentCache(Path(tmp) / "index.sqlite3", max_bytes=250)
+        partial_dir = Path(tmp) / "partial"
+
+        write_segments(partial_dir, ["old", "kept"])
+        cache.record(partial_dir, set(), "")
+        before = cache.snapshot(partial_dir)
+        write_segments(partial_dir, ["new"])
+        cache.record(partial_dir, before, manim_log(["kept"]))
+
+        assert cache.snapshot(partial_dir) == {"kept", "new"}
+    print("✅ Unused segment evicted")
+
+def test_named_renders_use_stable_files():
+    """A named animation always writes the same file and keeps manim's caching on"""
+    print("🧪 Testing stable naming")
+    with tempfile.TemporaryDirectory() as tmp:
+        renderer = ManimRenderer(project_root=Path(tmp))
+        first = renderer.write_scene_file("a = 1", name="ab12")
+        second = renderer.write_scene_file("a = 2", name="ab12")
+        assert first == second and second.read_text() == "a = 2"
+        assert renderer.write_scene_file("a = 1") != renderer.write_scene_file("a = 1")
+
+        settings = RenderSettings()
+        assert "--disable_caching" in renderer.build_command(first, "GeneratedAnimation", settings)
+        assert "--disable_caching" not in renderer.build_command(first, "GeneratedAnimation", settings,
+                                                                 reuse_segments=True)
+        assert renderer.partial_movie_dir(first, "GeneratedAnimation", settings).parts[-4:] == (
+            "animation_ab12", "360p15", "partial_movie_files", "GeneratedAnimation")
+
+        final = RenderSettings(resolution="1920,1080", fps=60)
+        assert renderer.stable_name("ab12", settings) == "ab12_360p15"
+        assert renderer.stable_name("ab12", final) == "ab12_1080p60"
+        assert renderer.stable_name(None, settings) is None
+    print("✅ Same file and media directory on every re-render")
+
+def test_name_locks_per_quality_and_pruned():
+    """Renders of one name and quality take turns; other qualities run alongside; idle locks go"""
+    print("🧪 Testing per-quality name locks")
+    renderer = ManimRenderer(project_root=Path(tempfile.mkdtemp()))
+    order = []
+
+    def hold(name, label, seconds):
+        with renderer._name_lock(name):
+            order.append(f"{label} start")
+            time.sleep(seconds)
+            order.append(f"{label} end")
+
+    threads = [
+        threading.Thread(target=hold, args=("ab12_360p15", "draft", 0.2)),
+        threading.Thread(target=hold, args=("ab12_1080p60", "final", 0.05)),
+    ]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join()
+    assert order == ["draft start", "final start", "final end", "draft end"]
+
+    second = threading.Thread(target=hold, args=("ab12_360p15", "again", 0))
+    with renderer._name_lock("ab12_360p15"):
+        second.start()
+        time.sleep(0.05)
+        assert order[-1] == "draft end"
+    second.join()
+    assert order[-2:] == ["again start", "again end"]
+    assert renderer._name_locks == {}
+    print("✅ Qualities render side by side and idle locks are dropped")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing Segment Cache")
+    print("=" * 40)
+
+    test_reused_and_encoded_counted()
+    test_least_recently_used_segments_evicted()
+    test_named_renders_use_stable_files()
+    test_name_locks_per_quality_and_pruned()
+
+    print("\n🎉 ALL SEGMENT CACHE TESTS PASSED!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
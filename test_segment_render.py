@@ -0,0 +1,191 @@
+"""
+Test segment planning and chunk skipping for segment-parallel rendering
+Uses a stand-in scene class; no Manim or ffmpeg needed
+"""
+
+import contextlib
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent))
+
+from config.render_config import RenderServiceConfig
+import utils.manim_renderer as manim_renderer_module
+from utils.manim_renderer import ManimRenderer, RenderSettings
+from utils.preflight import PreflightResult
+from utils.segment_render import plan_segments, render_chunks, run_parts, segment_scene_code
+
+def timeline(*sections):
+    """Dry-run style chunks from (section, duration) pairs; returns chunks and total"""
+    chunks, start = [], 1.0    # One second of animation before the first voiceover
+    for section, duration in sections:
+        chunks.append({'section': section, 'start': start})
+        start += duration
+    return chunks, start
+
+class FakeRenderer:
+    def __init__(self):
+        self._original_skipping_status = False
+        self.skip_animations = False
+
+class FakeScene:
+    """Records which animations would be drawn"""
+
+    def __init__(self):
+        self.renderer = FakeRenderer()
+        self.drawn = []
+
+    @contextlib.contextmanager
+    def voiceover(self, text=None):
+        yield text
+
+    def play(self, name):
+        if not self.renderer.skip_animations:
+            self.drawn.append(name)
+
+    def construct(self):
+        self.play("title")
+        for section in ("intro", "main", "outro"):
+            with self.voiceover(text=section):
+                self.play(section)
+                with self.voiceover(text="nested"):
+                    self.play(section + "-nested")
+            self.play(section + "-after")
+
+def test_sections_kept_whole():
+    """Each scene method becomes one part when there are enough processes"""
+    print("🧪 Testing section split")
+    chunks, total = timeline(('intro_scene', 8), ('main_content', 10), ('main_content', 10),
+                             ('conclusion', 8))
+    assert plan_segments(chunks, total, max_segments=3) == [(0, 1), (2, 3), (4, 4)]
+    print("✅ One part per section")
+
+def test_longest_section_split_when_cores_spare():
+    """Spare processes split the longest section at its most even voiceover boundary"""
+    print("🧪 Testing voiceover split")
+    chunks, total = timeline(('intro_scene', 8), ('main_content', 10), ('main_content', 10),
+                             ('main_content', 10), ('main_content', 10), ('conclusion', 8))
+    assert plan_segments(chunks, total, max_segments=4) == [(0, 1), (2, 3), (4, 5), (6, 6)]
+    assert plan_segments(chunks, total, max_segments=16) == [(0, 1), (2, 2), (3, 3), (4, 4), (5, 5), (6, 6)]
+    print("✅ Main content split across spare cores")
+
+def test_short_parts_merged():
+    """Too many sections, or parts too short to pay for a process, are merged"""
+    print("🧪 Testing merging")
+    chunks, total = timeline(('intro_scene', 8), ('main_content', 20), ('conclusion', 8))
+    assert plan_segments(chunks, total, max_segments=2) == [(0, 1), (2, 3)]
+
+    chunks, total = timeline(('intro_scene', 2), ('main_content', 2), ('conclusion', 1))
+    assert plan_segments(chunks, total, max_segments=8) == [(0, 3)]
+    assert plan_segments([], 4.0, max_segments=8) == [(0, 0)]
+    print("✅ Short parts merged")
+
+def test_only_selected_chunks_drawn():
+    """Chunks outside the range still run but are skipped; nested voiceovers stay in their chunk"""
+    print("🧪 Testing chunk skipping")
+    scene = render_chunks(FakeScene, 2, 2)()
+    scene.construct()
+    assert scene.drawn == ["main", "main-nested", "main-after"]
+    assert type(scene).__name__ == "FakeScene"
+
+    first = render_chunks(FakeScene, 0, 1)()
+    first.construct()
+    assert first.drawn == ["title", "intro", "intro-nested", "intro-after"]
+    print("✅ Only the part's own animations drawn")
+
+def test_segment_code_keeps_line_numbers():
+    """The part is the scene plus a footer, so traceback lines still match"""
+    print("🧪 Testing segment scene code")
+    code = "class GeneratedAnimation:\n    pass\n"
+    part = segment_scene_code(code, "GeneratedAnimation", 2, 4)
+    assert part.startswith(code)
+    assert "GeneratedAnimation = _render_chunks(GeneratedAnimation, 2, 4)" in part
+    compile(part, '<part>', 'exec')
+    print("✅ Footer appended after the scene")
+
+def test_max_segments_zero_from_env():
+    """MANIM_SEGMENT_MAX=0 selects sharing the cores among workers"""
+    print("🧪 Testing segment count setting")
+    saved = os.environ.get('MANIM_SEGMENT_MAX')
+    try:
+        os.environ['MANIM_SEGMENT_MAX'] = '0'
+        assert RenderServiceConfig().segment_config.max_segments == 0
+        os.environ['MANIM_SEGMENT_MAX'] = '3'
+        assert RenderServiceConfig().segment_config.max_segments == 3
+    finally:
+        if saved is None:
+            os.environ.pop('MANIM_SEGMENT_MAX', None)
+        else:
+            os.environ['MANIM_SEGMENT_MAX'] = saved
+    print("✅ Zero kept, not clamped to one")
+
+def python_part(source):
+    return [sys.executable, '-c', source]
+
+def test_failed_part_stops_the_others():
+    """One part exiting non-zero kills the parts still rendering"""
+    print("🧪 Testing failed part")
+    start = time.monotonic()
+    completed, failed = run_parts([python_part("import time; time.sleep(30)"),
+                                   python_part("import sys; sys.exit(3)")], timeout=60)
+    assert time.monotonic() - start < 10
+    assert failed.returncode == 3
+    assert completed[0].returncode < 0
+    print("✅ Sibling part killed after a failure")
+
+def test_timed_out_part_stops_the_others():
+    """A part outliving the timeout raises TimeoutExpired with every part down"""
+    print("🧪 Testing timed out part")
+    start = time.monotonic()
+    try:
+        run_parts([python_part("import time; time.sleep(30)"),
+                   python_part("import time; time.sleep(0.1)")], timeout=0.5)
+        assert False, "the slow part should time out"
+    except subprocess.TimeoutExpired:
+        pass
+    assert time.monotonic() - start < 10
+    print("✅ Timeout raised without waiting for the slow part")
+
+def test_caller_dry_run_reused():
+    """A dry run passed in plans the parts; no second dry run is made"""
+    print("🧪 Testing reused dry run")
+    original_which, original_preflight = manim_renderer_module.shutil.which, manim_renderer_module.run_preflight
+    def no_second_dry_run(*args):
+        raise AssertionError("dry run repeated")
+    try:
+        manim_renderer_module.shutil.which = lambda name: "/usr/bin/" + name
+        manim_renderer_module.run_preflight = no_second_dry_run
+        renderer = ManimRenderer(project_root=Path(tempfile.mkdtemp()), segments=4)
+        plan = PreflightResult(ok=True, estimated_duration=3.0, chunks=[{'section': 'construct', 'start': 0.0}])
+        assert renderer.render_segments("code", "GeneratedAnimation", RenderSettings(), 60,
+                                        preflight=plan) is None
+    finally:
+        manim_renderer_module.shutil.which, manim_renderer_module.run_preflight = original_which, original_preflight
+    print("✅ Parts planned from the caller's dry run")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing Segment Rendering")
+    print("=" * 40)
+
+    test_sections_kept_whole()
+    test_longest_section_split_when_cores_spare()
+    test_short_parts_merged()
+    test_only_selected_chunks_drawn()
+    test_segment_code_keeps_line_numbers()
+    test_max_segments_zero_from_env()
+    test_failed_part_stops_the_others()
+    test_timed_out_part_stops_the_others()
+    test_caller_dry_run_reused()
+
+    print("\n🎉 ALL SEGMENT RENDER TESTS PASSED!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,249 @@
+"""
+Test the TTS fallback chain's rate limiter, circuit breaker and latency ordering
+Uses fake services and a fake clock so no TTS backend, network or waiting is needed
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent))
+
+from config.tts_config import TTSQuality, TTSServiceConfig
+from utils.resilience import CircuitBreaker, ServiceGuard, TokenBucket
+from utils.voice_manager import HinglishTTSManager
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class FakeService:
+    """Succeeds or fails on demand, and counts calls"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = 0
+
+    def is_available(self):
+        return True
+
+    def synthesize(self, text, output_path, config=None):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("429 Too Many Requests")
+        with open(output_path, 'w') as f:
+            f.write(text)
+        return True
+
+class FakeXTTS(FakeService):
+    """Fake XTTS with a server client that reports no stats"""
+
+    def __init__(self):
+        super().__init__()
+        self.client = self
+
+    def stats(self):
+        return None
+
+def make_manager(clock):
+    """Manager with fake services and guards on the fake clock"""
+    manager = HinglishTTSManager()
+    manager.services = {'elevenlabs': FakeService(fail=True), 'gtts': FakeService(), 'xtts': FakeXTTS()}
+    manager.guards = {
+        name: ServiceGuard(name, failure_threshold=2, reset_timeout=30.0, clock=clock)
+        for name in manager.services
+    }
+    return manager
+
+def test_breaker_opens_and_probes():
+    """Consecutive failures open the breaker; one half-open probe decides what happens next"""
+    print("🧪 Testing circuit breaker states")
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+    clock.now = 10.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # Only one probe at a time
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 20.0
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()['times_opened'] == 2
+    print("✅ closed -> open -> half-open -> open -> half-open -> closed")
+
+def test_token_bucket_adapts():
+    """Bucket enforces its rate and halves it after a failure"""
+    print("🧪 Testing adaptive token bucket")
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, burst=2, clock=clock)
+
+    assert bucket.acquire() and bucket.acquire()
+    assert not bucket.acquire()
+    clock.now = 0.5
+    assert bucket.acquire()
+
+    bucket.on_failure()
+    assert bucket.rate == 1.0
+    bucket.on_success()
+    assert bucket.rate == 1.2
+    assert TokenBucket(rate=0).acquire()
+    print("✅ Rate enforced, decreased on failure, recovered on success")
+
+def test_fallback_skips_open_service():
+    """Once a service's breaker opens, sentences go straight to the fallback"""
+    print("🧪 Testing fallback with an open breaker")
+    clock = FakeClock()
+    manager = make_manager(clock)
+    output_dir = tempfile.mkdtemp()
+
+    for i in range(5):
+        assert manager.synthesize_speech(f"Sentence number {i}.", os.path.join(output_dir, f"{i}.wav"),
+                                         TTSQuality.PREMIUM, use_cache=False)
+
+    assert manager.services['elevenlabs'].calls == 2
+    status = manager.get_service_status()
+    assert status['elevenlabs']['breaker']['state'] == 'open'
+    # An open service drops to the end of the chain, so it isn't even tried
+    assert manager._get_services_to_try(TTSQuality.PREMIUM)[-1] == 'elevenlabs'
+    assert not manager.guards['elevenlabs'].acquire()
+
+    # After the cool-down one probe goes through
+    clock.now = 30.0
+    manager.synthesize_speech("Probe sentence.", os.path.join(output_dir, "probe.wav"),
+                              TTSQuality.PREMIUM, use_cache=False)
+    assert manager.services['elevenlabs'].calls == 3
+    print("✅ Failing service skipped until its half-open probe")
+
+class Interrupted(BaseException):
+    """Stands in for KeyboardInterrupt or a cancelled worker"""
+
+class InterruptedService(FakeService):
+    def synthesize(self, text, output_path, config=None):
+        self.calls += 1
+        raise Interrupted()
+
+def test_interrupted_probe_is_released():
+    """A half-open probe interrupted before its outcome does not leave the breaker stuck"""
+    print("🧪 Testing interrupted probe")
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0, clock=clock)
+    breaker.record_failure()
+    clock.now = 10.0
+    assert breaker.allow_request()
+    breaker.release()
+    assert breaker.allow_request()
+
+    manager = make_manager(clock)
+    manager.services['elevenlabs'] = InterruptedService()
+    guard = manager.guards['elevenlabs']
+    guard.breaker.record_failure()
+    guard.breaker.record_failure()
+    clock.now = 40.0
+    try:
+        manager.synthesize_speech("Probe sentence.", os.path.join(tempfile.mkdtemp(), "probe.wav"),
+                                  TTSQuality.PREMIUM, use_cache=False)
+        assert False, "the interruption should propagate"
+    except Interrupted:
+        pass
+    assert guard.breaker.state == CircuitBreaker.HALF_OPEN
+    assert guard.acquire()
+    print("✅ Probe slot freed after an interruption")
+
+def test_rate_limited_probe_keeps_breaker_half_open():
+    """A probe the token bucket turns away neither reopens the breaker nor uses up the probe"""
+    print("🧪 Testing rate-limited probe")
+    clock = FakeClock()
+    guard = ServiceGuard('elevenlabs', rate=1.0, burst=1, rate_wait=0.0,
+                         failure_threshold=1, reset_timeout=30.0, clock=clock)
+    assert guard.acquire()
+    guard.record(False, 0.1)
+    assert guard.breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 30.0
+    assert guard.bucket.acquire() and not guard.bucket.acquire()
+    assert not guard.acquire()
+    assert guard.breaker.state == CircuitBreaker.HALF_OPEN
+    assert guard.breaker.stats()['times_opened'] == 1
+
+    clock.now = 32.0      # the failure halved the rate to 0.5/s
+    assert guard.acquire()
+    print("✅ Breaker stays half-open while rate limited")
+
+def test_latency_orders_fallbacks():
+    """Fallbacks are tried fastest first; the preferred service still leads"""
+    print("🧪 Testing latency-aware ordering")
+    manager = make_manager(FakeClock())
+
+    assert manager._get_services_to_try(TTSQuality.FAST) == ['gtts', 'xtts', 'elevenlabs']
+    for _ in range(3):
+        manager.guards['elevenlabs'].latency.record(0.2)
+        manager.guards['xtts'].latency.record(1.5)
+    assert manager._get_services_to_try(TTSQuality.FAST) == ['gtts', 'elevenlabs', 'xtts']
+    assert manager.get_service_status()['xtts']['latency_p50'] == 1.5
+    print("✅ Fallbacks ordered by median latency")
+
+def test_malformed_env_uses_defaults():
+    """Bad TTS settings in the environment fall back to defaults instead of failing at import"""
+    print("🧪 Testing TTS settings from the environment")
+    values = {
+        'HINGLISH_TTS_RATE_BURST': 'four',
+        'HINGLISH_TTS_BREAKER_RESET': '',
+        'HINGLISH_TTS_RATE_GTTS': '0.5',
+        'HINGLISH_XTTS_BATCH_WINDOW_MS': '0',
+        'HINGLISH_TTS_HTTP_TIMEOUT': '30s',
+        'HINGLISH_TTS_CACHE_MAX_MB': '1.5',
+    }
+    saved = {name: os.environ.get(name) for name in values}
+    try:
+        os.environ.update(values)
+        config = TTSServiceConfig()
+        assert config.resilience_config.burst == 4
+        assert config.resilience_config.reset_timeout == 30.0
+        assert config.resilience_config.rate_limits['gtts'] == 0.5
+        assert config.xtts_server_config.batch_window_ms == 0
+        assert config.http_pool_config.timeout == 30.0
+        assert config.cache_max_bytes == 512 * 1024 * 1024
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    print("✅ Malformed values ignored, valid values used")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing TTS Service Resilience")
+    print("=" * 40)
+
+    test_breaker_opens_and_probes()
+    test_token_bucket_adapts()
+    test_fallback_skips_open_service()
+    test_interrupted_probe_is_released()
+    test_rate_limited_probe_keeps_breaker_half_open()
+    test_latency_orders_fallbacks()
+    test_malformed_env_uses_defaults()
+
+    print("\n🎉 ALL RESILIENCE TESTS PASSED!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
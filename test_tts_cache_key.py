@@ -0,0 +1,195 @@
+"""
+Test the versioned TTS audio cache key
+Uses a fake gTTS service so no TTS backend or network is needed
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent))
+
+from config.tts_config import TTSQuality, SubjectVoice, tts_config
+from utils.audio_cache import AudioCache
+from utils.voice_manager import HinglishTTSManager
+import utils.voice_manager as voice_manager_module
+
+class FakeGTTS:
+    """Writes the text it was asked to speak, and counts calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def is_available(self):
+        return True
+
+    def synthesize(self, text, output_path, config=None):
+        self.calls += 1
+        with open(output_path, 'w') as f:
+            f.write(f"{text}|{config.get('lang')}")
+        return True
+
+def make_manager():
+    """Manager with an isolated cache and only the fake service available"""
+    manager = HinglishTTSManager()
+    manager.cache = AudioCache(Path(tempfile.mkdtemp()), 10 * 1024 * 1024)
+    manager.services = {'gtts': FakeGTTS()}
+    manager.service_priority = ['gtts']
+    return manager
+
+def test_hit_skips_text_processing():
+    """A cache hit never touches the Hinglish processor"""
+    print("🧪 Testing cache hit path")
+    manager = make_manager()
+    output_dir = tempfile.mkdtemp()
+    text = "Force aur mass ka relation dekho."
+
+    assert manager.synthesize_speech(text, os.path.join(output_dir, "a.wav"), TTSQuality.FAST)
+
+    processor = voice_manager_module.hinglish_processor
+    original = processor.process_for_tts, processor.validate_hinglish_text
+    def fail(*args):
+        raise AssertionError("text processed on a cache hit")
+    processor.process_for_tts = processor.validate_hinglish_text = fail
+    try:
+        assert manager.synthesize_speech(text, os.path.join(output_dir, "b.wav"), TTSQuality.FAST)
+    finally:
+        processor.process_for_tts, processor.validate_hinglish_text = original
+
+    assert manager.services['gtts'].calls == 1
+    print("✅ Second request served from cache without processing")
+
+def test_config_change_invalidates():
+    """Changing the resolved service config misses instead of serving stale audio"""
+    print("🧪 Testing config-sensitive keys")
+    manager = make_manager()
+    output_dir = tempfile.mkdtemp()
+    text = "Velocity ek vector hai."
+
+    original_lang = tts_config.gtts_config.lang
+    try:
+        manager.synthesize_speech(text, os.path.join(output_dir, "hi.wav"), TTSQuality.FAST)
+        tts_config.gtts_config.lang = "en"
+        manager.synthesize_speech(text, os.path.join(output_dir, "en.wav"), TTSQuality.FAST)
+    finally:
+        tts_config.gtts_config.lang = original_lang
+
+    assert manager.services['gtts'].calls == 2
+    with open(os.path.join(output_dir, "en.wav")) as f:
+        assert f.read().endswith("|en")
+
+    # Other subjects' keys only change when their own config does
+    assert manager._generate_cache_key(text, 'gtts', SubjectVoice.PHYSICS) == \
+        manager._generate_cache_key(text, 'gtts', SubjectVoice.PHYSICS)
+    assert manager._generate_cache_key(text, 'xtts', SubjectVoice.PHYSICS) != \
+        manager._generate_cache_key(text, 'xtts', SubjectVoice.BIOLOGY)
+    print("✅ Config change re-synthesized; unrelated keys stable")
+
+class FailingService(FakeGTTS):
+    """Preferred service that is down"""
+
+    def synthesize(self, text, output_path, config=None):
+        self.calls += 1
+        raise ConnectionError("503 Service Unavailable")
+
+def test_fallback_audio_is_found_again():
+    """Audio a fallback produced is a hit next time, for single lines and batches"""
+    print("🧪 Testing cache hits on fallback audio")
+    manager = make_manager()
+    manager.services = {'elevenlabs': FailingService(), 'gtts': FakeGTTS()}
+    manager.service_priority = ['elevenlabs', 'gtts']
+    output_dir = tempfile.mkdtemp()
+    text = "Acceleration force ko mass se divide karke milta hai."
+
+    assert manager.synthesize_speech(text, os.path.join(output_dir, "a.wav"), TTSQuality.PREMIUM)
+    assert manager.services['gtts'].calls == 1
+    failed_attempts = manager.services['elevenlabs'].calls
+
+    assert manager.synthesize_speech(text, os.path.join(output_dir, "b.wav"), TTSQuality.PREMIUM)
+    assert manager.synthesize_batch([text], TTSQuality.PREMIUM)[text]
+    assert manager.services['gtts'].calls == 1
+    assert manager.services['elevenlabs'].calls == failed_attempts
+    print("✅ Fallback audio served from cache")
+
+def test_preferred_hit_costs_one_key():
+    """A hit on the preferred service hashes one key, stats the reference once and commits once"""
+    print("🧪 Testing cache hit cost")
+    manager = make_manager()
+    manager.services = {'xtts': FakeGTTS(), 'gtts': FakeGTTS()}
+    manager.service_priority = ['xtts', 'gtts']
+    output_dir = tempfile.mkdtemp()
+    text = "Momentum mass aur velocity ka product hai."
+    speaker_wav = os.path.join(output_dir, "teacher.wav")
+    with open(speaker_wav, 'wb') as f:
+        f.write(b'voice')
+
+    original_profile = dict(tts_config.voice_profiles[SubjectVoice.PHYSICS])
+    original_generate = manager._generate_cache_key
+    original_touch = manager.cache.index.touch
+    keys, touches = [], []
+    def counting_generate(*args, **kwargs):
+        keys.append(args[1])
+        return original_generate(*args, **kwargs)
+    def counting_touch(*args, **kwargs):
+        touches.append(args)
+        return original_touch(*args, **kwargs)
+    try:
+        tts_config.voice_profiles[SubjectVoice.PHYSICS]['speaker_wav'] = speaker_wav
+        assert manager.synthesize_speech(text, os.path.join(output_dir, "a.wav"), TTSQuality.HIGH,
+                                         SubjectVoice.PHYSICS)
+        manager._generate_cache_key = counting_generate
+        manager.cache.index.touch = counting_touch
+        os.utime(speaker_wav, ns=(0, 0))
+        assert manager.synthesize_speech(text, os.path.join(output_dir, "b.wav"), TTSQuality.HIGH,
+                                         SubjectVoice.PHYSICS)
+        assert keys == ['xtts'] and len(touches) == 1
+        assert manager.get_cache_stats()['hits'] == 1
+
+        # The touched reference is only re-stat'ed once its profile changes
+        manager._generate_cache_key = original_generate
+        manager._on_profile_updated(SubjectVoice.PHYSICS, [speaker_wav])
+        assert manager._deliver_cached(text, os.path.join(output_dir, "c.wav"), TTSQuality.HIGH,
+                                       SubjectVoice.PHYSICS) is None
+    finally:
+        tts_config.voice_profiles[SubjectVoice.PHYSICS] = original_profile
+    print("✅ One key, one stat, one transaction per hit")
+
+def test_cached_audio_served_while_services_are_down():
+    """Cached narration is delivered even when every breaker is open"""
+    print("🧪 Testing cache with every service down")
+    manager = make_manager()
+    output_dir = tempfile.mkdtemp()
+    text = "Energy na banti hai na khatam hoti hai."
+    assert manager.synthesize_speech(text, os.path.join(output_dir, "a.wav"), TTSQuality.PREMIUM)
+
+    for guard in manager.guards.values():
+        for _ in range(guard.breaker.failure_threshold):
+            guard.breaker.record_failure()
+    manager.services['gtts'].is_available = lambda: False
+    manager.refresh_availability()
+    assert manager._get_services_to_try(TTSQuality.PREMIUM) == []
+
+    assert manager.synthesize_speech(text, os.path.join(output_dir, "b.wav"), TTSQuality.PREMIUM)
+    assert manager.synthesize_batch([text], TTSQuality.PREMIUM)[text]
+    assert manager.services['gtts'].calls == 1
+    print("✅ Cached audio served with no service available")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing TTS Cache Keys")
+    print("=" * 40)
+
+    test_hit_skips_text_processing()
+    test_config_change_invalidates()
+    test_fallback_audio_is_found_again()
+    test_preferred_hit_costs_one_key()
+    test_cached_audio_served_while_services_are_down()
+
+    print("\n🎉 ALL TTS CACHE KEY TESTS PASSED!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
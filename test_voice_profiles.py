@@ -0,0 +1,92 @@
+"""
+Test that the TTS config singletons do no filesystem I/O until needed
+Covers configurable paths, read-only profile listing and mtime-based profile reload
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent
+sys.path.append(str(project_root))
+
+from config.tts_config import SubjectVoice
+from config.voice_profiles import VoiceProfileManager
+
+PROBE = """
+import utils.voice_manager
+from config.voice_profiles import voice_manager
+profiles = voice_manager.list_available_profiles()
+assert len(profiles) == 4, profiles
+"""
+
+def test_import_and_listing_write_nothing():
+    """Importing the TTS stack and listing profiles creates no files or directories"""
+    print("🧪 Testing import-time side effects")
+    root = Path(tempfile.mkdtemp())
+    env = dict(os.environ,
+               HINGLISH_TTS_CACHE_DIR=str(root / "audio_cache"),
+               HINGLISH_REFERENCE_VOICES_DIR=str(root / "reference_voices"))
+
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=str(project_root), env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert list(root.iterdir()) == [], f"created: {list(root.iterdir())}"
+    print("✅ Configured directories left untouched")
+
+def test_validation_is_read_only():
+    """A missing reference recording is reported without writing instructions"""
+    print("🧪 Testing read-only validation")
+    voices_dir = Path(tempfile.mkdtemp())
+    manager = VoiceProfileManager(str(voices_dir))
+
+    is_valid, status = manager.validate_reference_audio(SubjectVoice.PHYSICS)
+    assert not is_valid and "physics_teacher.wav" in status
+    assert list(voices_dir.iterdir()) == []
+
+    instructions = Path(manager.create_reference_audio_placeholder(SubjectVoice.PHYSICS))
+    assert instructions.exists() and "Dr. Physics" in instructions.read_text()
+    print("✅ Instructions only written on request")
+
+def test_profiles_reload_on_change():
+    """Edits to profiles.json are picked up; updates write it atomically"""
+    print("🧪 Testing mtime-based profile reload")
+    voices_dir = Path(tempfile.mkdtemp())
+    manager = VoiceProfileManager(str(voices_dir))
+    assert manager.get_profile(SubjectVoice.PHYSICS)["name"] == "Dr. Physics"
+
+    profiles = manager._create_default_profiles()
+    profiles["physics"]["name"] = "Dr. Edited"
+    metadata_file = voices_dir / "profiles.json"
+    metadata_file.write_text(json.dumps(profiles))
+    assert manager.get_profile(SubjectVoice.PHYSICS)["name"] == "Dr. Edited"
+
+    notified = []
+    manager.add_update_listener(lambda subject, paths: notified.append(subject))
+    manager.update_profile(SubjectVoice.PHYSICS, {"name": "Dr. Updated"})
+    assert json.loads(metadata_file.read_text())["physics"]["name"] == "Dr. Updated"
+    assert notified == [SubjectVoice.PHYSICS]
+
+    # A second manager (another process) sees the update
+    assert VoiceProfileManager(str(voices_dir)).get_profile(SubjectVoice.PHYSICS)["name"] == "Dr. Updated"
+    print("✅ Profiles reloaded after external edit and update")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing Voice Profile Loading")
+    print("=" * 40)
+
+    test_import_and_listing_write_nothing()
+    test_validation_is_read_only()
+    test_profiles_reload_on_change()
+
+    print("\n🎉 ALL VOICE PROFILE TESTS PASSED!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
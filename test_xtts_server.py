@@ -0,0 +1,276 @@
+"""
+Test the warm XTTS model server and its client
+Uses a fake engine so no Coqui TTS install is needed
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent))
+
+from utils.speaker_latents import SpeakerLatentCache
+from utils.xtts_server import XTTSClient, XTTSModelServer
+
+class FakeEngine:
+    """Stands in for XTTSEngine and records every request"""
+
+    model_id = "fake-xtts"
+    load_seconds = 0.0
+
+    def __init__(self):
+        self.calls = []
+        self.batches = []
+        self.latent_cache = SpeakerLatentCache()
+
+    def load(self, config):
+        return True
+
+    def synthesize_batch(self, items):
+        self.batches.append([text for text, _, _ in items])
+        for text, output_path, _ in items:
+            self.calls.append(text)
+            with open(output_path, 'w') as f:
+                f.write(text)
+        return [True] * len(items)
+
+def start_server(engine, batch_window=0.0, request_timeout=None):
+    """Serve on a fresh socket in a background thread, writing into a fresh output directory"""
+    socket_path = os.path.join(tempfile.mkdtemp(), "xtts.sock")
+    server = XTTSModelServer(socket_path, engine=engine, batch_window=batch_window, max_batch_size=8,
+                             output_dir=tempfile.mkdtemp(), request_timeout=request_timeout)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    client = XTTSClient(socket_path)
+    deadline = time.time() + 5
+    while not client.ping():
+        assert time.time() < deadline, "server did not start"
+        time.sleep(0.05)
+    return server, client
+
+def test_concurrent_clients_share_one_engine():
+    """Requests from many clients are served by the same warm engine"""
+    print("🧪 Testing concurrent clients")
+    engine = FakeEngine()
+    server, client = start_server(engine)
+    output_dir = server.output_dir
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda i=i: results.append(
+            client.synthesize(f"line {i}", os.path.join(output_dir, f"{i}.wav"), {})))
+        for i in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [True] * 5
+    assert sorted(engine.calls) == [f"line {i}" for i in range(5)]
+    assert client.stats()['served'] == 5
+    print("✅ Five clients served by one engine")
+
+    client.shutdown_server()
+    deadline = time.time() + 5
+    while client.ping():
+        assert time.time() < deadline, "server did not stop"
+        time.sleep(0.05)
+    print("✅ Server shut down")
+
+def test_requests_are_coalesced_by_voice():
+    """Concurrent requests are batched and split by speaker and language"""
+    print("🧪 Testing request coalescing")
+    engine = FakeEngine()
+    server, client = start_server(engine, batch_window=0.3)
+    output_dir = server.output_dir
+
+    configs = [{'speaker_wav': 'physics.wav', 'language': 'hi'}] * 4 + [{'speaker_wav': 'biology.wav', 'language': 'hi'}] * 2
+    threads = [
+        threading.Thread(target=client.synthesize,
+                         args=(f"line {i}", os.path.join(output_dir, f"{i}.wav"), config))
+        for i, config in enumerate(configs)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = client.stats()
+    assert stats['served'] == 6
+    assert stats['batches'] < 6, "requests were not coalesced"
+    # Every engine batch holds a single voice
+    for batch in engine.batches:
+        voices = {configs[int(text.split()[1])]['speaker_wav'] for text in batch}
+        assert len(voices) == 1
+    print(f"✅ 6 requests ran in {stats['batches']} batch(es), {len(engine.batches)} voice group(s)")
+    client.shutdown_server()
+
+def test_speaker_latents_are_encoded_once():
+    """Latents are reused per reference file and recomputed after invalidation"""
+    print("🧪 Testing speaker latent cache")
+    reference = os.path.join(tempfile.mkdtemp(), "physics_teacher.wav")
+    with open(reference, 'wb') as f:
+        f.write(b"reference voice")
+
+    encodings = []
+    def encode():
+        encodings.append(1)
+        return ("gpt_cond_latent", "speaker_embedding")
+
+    cache = SpeakerLatentCache()
+    for _ in range(20):
+        assert cache.get(reference, "xtts", encode) == ("gpt_cond_latent", "speaker_embedding")
+    assert len(encodings) == 1
+    assert cache.stats()['memory_hits'] == 19
+
+    # A different model needs its own latents
+    cache.get(reference, "xtts-hindi", encode)
+    assert len(encodings) == 2
+
+    assert cache.invalidate(reference) == 2
+    cache.get(reference, "xtts", encode)
+    assert len(encodings) == 3
+    print("✅ 20 lines encoded the voice once; invalidation forces a re-encode")
+
+class FakeTensor:
+    """Mutable stand-in for a torch tensor"""
+
+    def __init__(self, values):
+        self.values = list(values)
+
+    def clone(self):
+        return FakeTensor(self.values)
+
+def test_cached_latents_are_copied_per_caller():
+    """Changing the latents one caller got leaves the cached ones intact"""
+    print("🧪 Testing latent copies")
+    reference = os.path.join(tempfile.mkdtemp(), "chemistry_teacher.wav")
+    with open(reference, 'wb') as f:
+        f.write(b"reference voice")
+
+    cache = SpeakerLatentCache()
+    first, _ = cache.get(reference, "xtts", lambda: (FakeTensor([1.0, 2.0]), FakeTensor([3.0])))
+    first.values[0] = 99.0
+    second, _ = cache.get(reference, "xtts", lambda: None)
+    assert second.values == [1.0, 2.0]
+    assert second is not first
+    print("✅ In-place changes stay with the caller")
+
+class StuckEngine(FakeEngine):
+    """Never finishes a batch until released, like a hung inference thread"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def synthesize_batch(self, items):
+        self.release.wait()
+        return super().synthesize_batch(items)
+
+def test_stuck_inference_times_out():
+    """A client gets an error instead of waiting forever on a stuck inference thread"""
+    print("🧪 Testing request timeout")
+    engine = StuckEngine()
+    server, client = start_server(engine, request_timeout=0.3)
+    try:
+        started = time.time()
+        reply = client._request({'op': 'synthesize', 'text': "line",
+                                 'output_path': os.path.join(server.output_dir, "a.wav"), 'config': {}},
+                                timeout=5.0)
+        assert time.time() - started < 3
+        assert reply is not None and not reply['ok']
+        assert "timed out" in reply['error']
+    finally:
+        engine.release.set()
+        client.shutdown_server()
+    print("✅ Timed out with an error reply")
+
+def test_output_outside_cache_is_rejected():
+    """The server refuses to write anywhere but its output directory"""
+    print("🧪 Testing output path restriction")
+    engine = FakeEngine()
+    server, client = start_server(engine)
+    try:
+        outside = os.path.join(tempfile.mkdtemp(), "escape.wav")
+        sneaky = os.path.join(server.output_dir, "..", "escape.wav")
+        for path in (outside, sneaky):
+            reply = client._request({'op': 'synthesize', 'text': "line", 'output_path': path, 'config': {}})
+            assert reply is not None and not reply['ok']
+        assert not os.path.exists(outside)
+        assert not os.path.exists(os.path.realpath(sneaky))
+        assert engine.calls == []
+
+        assert client.synthesize("line", os.path.join(server.output_dir, "ok.wav"), {})
+    finally:
+        client.shutdown_server()
+    print("✅ Only the output directory is writable through the server")
+
+def test_socket_directory_is_private():
+    """The socket directory is created readable by its owner only"""
+    print("🧪 Testing socket directory permissions")
+    socket_dir = os.path.join(tempfile.mkdtemp(), "hinglish_tts")
+    client = XTTSClient(os.path.join(socket_dir, "xtts.sock"))
+    server = XTTSModelServer(client.socket_path, engine=FakeEngine(), output_dir=tempfile.mkdtemp())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    deadline = time.time() + 5
+    while not client.ping():
+        assert time.time() < deadline, "server did not start"
+        time.sleep(0.05)
+    try:
+        assert os.stat(socket_dir).st_mode & 0o777 == 0o700
+    finally:
+        client.shutdown_server()
+    print("✅ Socket directory is 0700")
+
+def test_client_without_server():
+    """A missing server is reported instead of raising"""
+    print("🧪 Testing client without server")
+    client = XTTSClient(os.path.join(tempfile.mkdtemp(), "missing.sock"))
+    assert not client.ping()
+    assert not client.ensure_server(autostart=False)
+    assert not client.synthesize("text", os.path.join(tempfile.mkdtemp(), "a.wav"), {})
+    print("✅ Unreachable server handled")
+
+def test_failed_autostart_backs_off():
+    """After a daemon fails to start, callers fall back at once until retry_after passes"""
+    print("🧪 Testing autostart backoff")
+    client = XTTSClient(os.path.join(tempfile.mkdtemp(), "dead.sock"))
+    spawns = []
+    client._spawn = lambda: spawns.append(time.time())
+
+    assert not client.ensure_server(start_timeout=0.3, retry_after=60)
+    started = time.time()
+    assert not client.ensure_server(start_timeout=0.3, retry_after=60)
+    assert time.time() - started < 0.2
+    assert len(spawns) == 1
+
+    assert not client.ensure_server(start_timeout=0.3, retry_after=0)
+    assert len(spawns) == 2
+    print("✅ Failed start remembered, retried after the backoff")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing XTTS Model Server")
+    print("=" * 40)
+
+    test_concurrent_clients_share_one_engine()
+    test_requests_are_coalesced_by_voice()
+    test_speaker_latents_are_encoded_once()
+    test_cached_latents_are_copied_per_caller()
+    test_stuck_inference_times_out()
+    test_output_outside_cache_is_rejected()
+    test_socket_directory_is_private()
+    test_client_without_server()
+    test_failed_autostart_backs_off()
+
+    print("\n🎉 ALL XTTS SERVER TESTS PASSED!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,227 @@
+"""
+Persistent Audio Cache for Synthesized Speech
+SQLite-indexed, size-bounded LRU store of TTS output. Hits are delivered as
+copy-on-write reflinks where the filesystem supports them, and as copies
+otherwise, so callers own the files they are handed.
+"""
+
+import logging
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.lru_index import LRUIndex
+
+logger = logging.getLogger(__name__)
+
+# Linux FICLONE ioctl for copy-on-write clones (btrfs, xfs, overlayfs)
+FICLONE = 0x40049409
+
+
+def _reflink(src: str, dst: str) -> bool:
+    """Clone src to dst without copying data, where the filesystem supports it"""
+    try:
+        import fcntl
+    except ImportError:
+        return False
+
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        return True
+    except OSError:
+        try:
+            os.unlink(dst)
+        except OSError:
+            pass
+        return False
+
+
+class AudioCache:
+    """Size-bounded LRU cache of audio files keyed by synthesis request"""
+
+    def __init__(self, cache_dir: Path, max_bytes: int, suffix: str = '.wav'):
+        self.cache_dir = Path(cache_dir)
+        self.suffix = suffix
+        self._index: Optional[LRUIndex] = None
+        self._max_bytes = max_bytes
+        self._init_lock = threading.Lock()
+
+    @property
+    def index(self) -> LRUIndex:
+        """Open the index on first use, adopting any unindexed cache files"""
+        if self._index is None:
+            with self._init_lock:
+                if self._index is None:
+                    self.cache_dir.mkdir(parents=True, exist_ok=True)
+                    index = LRUIndex(self.cache_dir / "index.sqlite3", self._max_bytes)
+                    if index.count() == 0:
+                        self._adopt_existing_files(index)
+                    self._index = index
+        return self._index
+
+    def _adopt_existing_files(self, index: LRUIndex) -> None:
+        """Index files left by the pre-index cache layout so they can be evicted"""
+        adopted = 0
+        for cache_file in self.cache_dir.glob(f'*{self.suffix}'):
+            index.put(cache_file.stem, str(cache_file), cache_file.stat().st_size)
+            adopted += 1
+        if adopted:
+            logger.info(f"Indexed {adopted} existing audio cache files")
+
+    def _path_for(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{self.suffix}"
+
+    def deliver(self, key: str, output_path: str, count_miss: bool = True) -> bool:
+        """Materialize the cached audio for key at output_path
+
+        Returns False (and counts a miss, unless count_miss is off) when the
+        key is not cached. A hit is recorded in a single index transaction.
+        """
+        entry = self.index.get(key, touch=False)
+        if entry is not None:
+            try:
+                method = self._clone(entry['path'], output_path)
+            except FileNotFoundError:
+                # Cache file vanished behind the index's back
+                self.index.remove(key)
+            else:
+                self.index.touch(key, {'hits': 1, **({method: 1} if method else {})})
+                return True
+
+        if count_miss:
+            self.record_miss()
+        return False
+
+    def lookup(self, key: str, count_miss: bool = True) -> Optional[str]:
+        """Return the cached file path for key, counting the hit or miss"""
+        entry = self.index.get(key, touch=False)
+        if entry and os.path.exists(entry['path']):
+            self.index.touch(key, {'hits': 1})
+            return entry['path']
+
+        if entry:
+            self.index.remove(key)
+        if count_miss:
+            self.record_miss()
+        return None
+
+    def record_miss(self) -> None:
+        """Count one miss, for callers that probed several keys with count_miss off"""
+        self.index.incr('misses')
+
+    def contains(self, key: str) -> bool:
+        """Check the index without touching LRU order or counters"""
+        return self.index.get(key, touch=False) is not None
+
+    def store(self, key: str, audio_path: str, move: bool = True) -> Optional[str]:
+        """Add a freshly synthesized file to the cache and return the cached path
+
+        With ``move`` the file is renamed into the cache; otherwise it is
+        cloned in, so the caller keeps audio_path and may still change it.
+        """
+        cache_file = self._path_for(key)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            if move:
+                try:
+                    os.replace(audio_path, cache_file)
+                except OSError:
+                    shutil.move(audio_path, cache_file)
+            else:
+                method = self._clone(audio_path, str(cache_file))
+                if method:
+                    self.index.incr(method)
+
+            size = cache_file.stat().st_size
+            self.index.put(key, str(cache_file), size)
+            self.index.incr('stored_bytes', size)
+        except Exception as e:
+            logger.warning(f"Failed to cache audio: {e}")
+            return None
+
+        self._evict(keep=key)
+        return str(cache_file)
+
+    def _clone(self, src: str, dst: str) -> Optional[str]:
+        """Reflink src to dst, falling back to a real copy; replaces dst atomically
+
+        Returns the counter to bump ('reflinked' or 'copied'), or None when
+        src already is dst. Never a hardlink: a shared inode would let anyone
+        writing to a delivered file in place rewrite the cached audio with it.
+        """
+        if os.path.abspath(src) == os.path.abspath(dst):
+            return None
+        if not os.path.exists(src):
+            raise FileNotFoundError(src)
+
+        temp_dst = f"{dst}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            if _reflink(src, temp_dst):
+                method = 'reflinked'
+            else:
+                shutil.copyfile(src, temp_dst)
+                method = 'copied'
+            os.replace(temp_dst, dst)
+            return method
+        except BaseException:
+            try:
+                os.unlink(temp_dst)
+            except OSError:
+                pass
+            raise
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        for entry in self.index.evict(keep=keep):
+            try:
+                os.unlink(entry['path'])
+            except FileNotFoundError:
+                pass
+
+    def prune(self, max_bytes: int) -> int:
+        """Evict least recently used audio down to max_bytes; returns files removed"""
+        evicted = self.index.evict(max_bytes)
+        for entry in evicted:
+            try:
+                os.unlink(entry['path'])
+            except FileNotFoundError:
+                pass
+        return len(evicted)
+
+    def clear(self) -> int:
+        """Remove every cached file and return how many were removed"""
+        entries = self.index.clear()
+        for entry in entries:
+            try:
+                os.unlink(entry['path'])
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Failed to delete cache file {entry['path']}: {e}")
+        return len(entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hits, misses, bytes and evictions since the cache was created"""
+        counters = self.index.counters()
+        hits = counters.get('hits', 0)
+        misses = counters.get('misses', 0)
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'entries': self.index.count(),
+            'bytes': self.index.total_bytes(),
+            'max_bytes': self.index.max_bytes,
+            'stored_bytes': counters.get('stored_bytes', 0),
+            'evictions': counters.get('evictions', 0),
+            'evicted_bytes': counters.get('evicted_bytes', 0),
+            'reflinked': counters.get('reflinked', 0),
+            'copied': counters.get('copied', 0),
+        }
@@ -0,0 +1,292 @@
+"""
+AST-based Repair Pipeline for Generated Scene Code
+Re-indents only code that fails to parse, rewrites undefined constants at the
+node level and injects missing color definitions, reporting each change
+"""
+
+import ast
+import io
+import logging
+import tokenize
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Constants from older Manim versions that Manim Community Edition does not define
+UNDEFINED_CONSTANTS: Dict[str, int] = {
+    'FRAME_WIDTH': 14,     # LEFT*7 to RIGHT*7 = 14 units
+    'FRAME_HEIGHT': 8,     # UP*4 to DOWN*4 = 8 units
+    'FRAME_RATE': 30,
+    'PIXEL_HEIGHT': 720,
+    'PIXEL_WIDTH': 1280,
+}
+
+# Color variables every generated animation must define, with their defaults
+REQUIRED_COLORS: List[Tuple[str, str]] = [
+    ('PRIMARY_COLOR', 'BLUE'),
+    ('SECONDARY_COLOR', 'GREEN'),
+    ('ACCENT_COLOR', 'ORANGE'),
+    ('TEXT_COLOR', 'WHITE'),
+]
+
+# Block keywords that continue the statement opened by one of the listed keywords
+CONTINUATIONS: Dict[str, Set[str]] = {
+    'elif': {'if', 'elif'},
+    'else': {'if', 'elif', 'for', 'while', 'try', 'except'},
+    'except': {'try', 'except'},
+    'finally': {'try', 'except', 'else'},
+}
+
+
+@dataclass
+class Diagnostic:
+    """One problem found in generated code, and whether it was repaired"""
+    message: str
+    line: Optional[int] = None
+    fixed: bool = True
+
+    def __str__(self) -> str:
+        location = f"line {self.line}: " if self.line else ""
+        return f"{location}{self.message}"
+
+@dataclass
+class RepairResult:
+    """Repaired code plus what was changed; valid is False if it still does not parse"""
+    code: str
+    valid: bool
+    diagnostics: List[Diagnostic] = field(default_factory=list)
+
+
+@dataclass
+class _Block:
+    opener_indent: int     # original indent of the line that opened the block
+    body_indent: int       # original indent of the block's first line
+    new_indent: int        # indent the block's lines are written at
+    keyword: str
+
+
+def _first_keyword(stripped: str) -> str:
+    if stripped.startswith('@'):
+        return 'def'
+    word = stripped.split(None, 1)[0] if stripped else ''
+    word = word.split('(', 1)[0].rstrip(':')
+    return 'def' if word == 'async' else word
+
+
+def _line_structure(lines: List[str]) -> Optional[Tuple[Set[int], Set[int], Set[int]]]:
+    """Classify physical lines as statement starts, block openers, or inside a multi-line string
+
+    Tokenizes the code with every line flush left, so broken indentation cannot
+    stop the tokenizer; returns None if the code does not tokenize at all.
+    """
+    flat = '\n'.join(line.lstrip() for line in lines) + '\n'
+    starts, openers, in_string = set(), set(), set()
+    first_line, last_token = None, None
+    try:
+        for tok in tokenize.generate_tokens(io.StringIO(flat).readline):
+            if tok.type in (tokenize.NL, tokenize.COMMENT, tokenize.INDENT, tokenize.DEDENT, tokenize.ENDMARKER):
+                continue
+            if tok.type == tokenize.NEWLINE:
+                if first_line is not None and last_token == ':':
+                    openers.add(first_line)
+                first_line, last_token = None, None
+                continue
+            if first_line is None:
+                first_line = tok.start[0] - 1
+                starts.add(first_line)
+            if tok.type == tokenize.STRING and tok.end[0] > tok.start[0]:
+                in_string.update(range(tok.start[0], tok.end[0]))
+            last_token = tok.string if tok.type == tokenize.OP else None
+    except (tokenize.TokenError, SyntaxError):
+        return None
+    return starts, openers, in_string
+
+
+def reindent(code: str) -> Optional[str]:
+    """Rebuild indentation from block structure; None if the code cannot be tokenized
+
+    Lines keep their original nesting where their indentation is informative.
+    Where it is not (code pasted flush left), `class`, `def` and
+    `else`/`elif`/`except`/`finally` close the blocks they cannot belong to.
+    """
+    lines = code.expandtabs(4).split('\n')
+    structure = _line_structure(lines)
+    if structure is None:
+        return None
+    starts, openers, in_string = structure
+
+    stack = [_Block(-1, 0, 0, '')]
+    pending: Optional[Tuple[int, str]] = None    # (opener indent, keyword) awaiting its body
+    shift = 0
+    fixed = []
+
+    for index, line in enumerate(lines):
+        stripped = line.lstrip()
+        indent = len(line) - len(stripped)
+
+        if index in in_string:
+            fixed.append(line)
+            continue
+        if index not in starts:
+            if stripped.startswith('#') and pending is not None:
+                # Comment opening a block body belongs with the body
+                fixed.append(' ' * (stack[-1].new_indent + 4) + stripped)
+            else:
+                # Blank line, comment or bracketed continuation: keep its offset from the statement
+                fixed.append(' ' * max(0, indent + shift) + stripped if stripped else '')
+            continue
+
+        keyword = _first_keyword(stripped)
+        if pending is not None:
+            opener_indent, opener_keyword = pending
+            stack.append(_Block(opener_indent, indent, stack[-1].new_indent + 4, opener_keyword))
+            pending = None
+        else:
+            # Dedent out of blocks; an indent between opener and body snaps to the nearer one
+            while len(stack) > 1 and indent < stack[-1].body_indent and (
+                    indent - stack[-1].opener_indent <= stack[-1].body_indent - indent):
+                stack.pop()
+            if keyword in ('class', 'def'):
+                while len(stack) > 1 and indent <= stack[-1].opener_indent and not (
+                        keyword == 'def' and stack[-1].keyword == 'class'):
+                    stack.pop()
+            elif keyword in CONTINUATIONS:
+                match = next((i for i in range(len(stack) - 1, 0, -1)
+                              if stack[i].keyword in CONTINUATIONS[keyword]
+                              and stack[i].opener_indent >= indent), None)
+                if match is not None:
+                    del stack[match:]
+
+        new_indent = stack[-1].new_indent
+        shift = new_indent - indent
+        fixed.append(' ' * new_indent + stripped)
+        if index in openers:
+            pending = (indent, keyword)
+
+    return '\n'.join(fixed)
+
+
+def _assigned_names(node: ast.AST) -> Set[str]:
+    """Names bound anywhere within node (assignments, parameters, imports, definitions)"""
+    names = set()
+    for child in ast.walk(node):
+        if isinstance(child, ast.Name) and isinstance(child.ctx, (ast.Store, ast.Del)):
+            names.add(child.id)
+        elif isinstance(child, ast.arg):
+            names.add(child.arg)
+        elif isinstance(child, (ast.Import, ast.ImportFrom)):
+            names.update((alias.asname or alias.name).split('.')[0] for alias in child.names)
+        elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(child.name)
+    return names
+
+
+def _module_level_names(tree: ast.Module) -> Set[str]:
+    """Names bound by top-level statements, outside any function or class body"""
+    names = set()
+    for statement in tree.body:
+        if isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(statement.name)
+        else:
+            names.update(_assigned_names(statement))
+    return names
+
+
+def _replace_span(line: str, start: int, end: int, text: str) -> str:
+    # AST column offsets count UTF-8 bytes, and narration lines are often not ASCII
+    raw = line.encode('utf-8')
+    return (raw[:start] + text.encode('utf-8') + raw[end:]).decode('utf-8')
+
+
+def _rewrite_constants(tree: ast.Module, lines: List[str], diagnostics: List[Diagnostic]) -> None:
+    """Replace loads of undefined Manim constants with their values, in place"""
+    bound = _assigned_names(tree)
+    targets = [node for node in ast.walk(tree)
+               if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load)
+               and node.id in UNDEFINED_CONSTANTS and node.id not in bound]
+
+    # Right to left, so earlier offsets on the same line stay valid
+    for node in sorted(targets, key=lambda n: (n.lineno, n.col_offset), reverse=True):
+        value = str(UNDEFINED_CONSTANTS[node.id])
+        lines[node.lineno - 1] = _replace_span(lines[node.lineno - 1], node.col_offset, node.end_col_offset, value)
+    for node in sorted(targets, key=lambda n: (n.lineno, n.col_offset)):
+        diagnostics.append(Diagnostic(f"Replaced undefined constant {node.id} with {UNDEFINED_CONSTANTS[node.id]}",
+                                      node.lineno))
+
+
+def _missing_colors(tree: ast.Module) -> List[Tuple[str, str]]:
+    """Required colors that are never defined, or used where no definition is visible"""
+    module_names = _module_level_names(tree)
+    bound = _assigned_names(tree)
+    functions = [node for node in ast.walk(tree) if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))]
+
+    missing = []
+    for name, default in REQUIRED_COLORS:
+        if name in module_names:
+            continue
+        used_unbound = any(
+            name not in _assigned_names(function) and any(
+                isinstance(node, ast.Name) and node.id == name for node in ast.walk(function))
+            for function in functions)
+        if name not in bound or used_unbound:
+            missing.append((name, default))
+    return missing
+
+
+def _inject_colors(tree: ast.Module, lines: List[str], diagnostics: List[Diagnostic]) -> List[str]:
+    """Define missing colors at module level, right after the leading imports"""
+    missing = _missing_colors(tree)
+    if not missing:
+        return lines
+
+    insert_at = 0
+    for statement in tree.body:
+        is_docstring = (isinstance(statement, ast.Expr) and isinstance(statement.value, ast.Constant)
+                        and isinstance(statement.value.value, str))
+        if not (isinstance(statement, (ast.Import, ast.ImportFrom)) or is_docstring):
+            break
+        insert_at = statement.end_lineno
+
+    block = ([''] if insert_at else []) + ['# Define color scheme (REQUIRED)'] + [f"{name} = {default}" for name, default in missing] + ['']
+    for name, default in missing:
+        diagnostics.append(Diagnostic(f"Added missing color definition {name} = {default}", insert_at + 1))
+    return lines[:insert_at] + block + lines[insert_at:]
+
+
+def repair_code(code: str) -> RepairResult:
+    """Run the repair pipeline over scene code (already stripped of markdown fences)"""
+    code = code.strip('\n')
+    diagnostics: List[Diagnostic] = []
+
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        repaired = reindent(code)
+        try:
+            if repaired is None:
+                raise e
+            tree = ast.parse(repaired)
+        except SyntaxError as final:
+            diagnostics.append(Diagnostic(f"{type(final).__name__}: {final.msg}", final.lineno, fixed=False))
+            logger.warning(f"Generated code does not parse: {final.msg} (line {final.lineno})")
+            return RepairResult(code=code, valid=False, diagnostics=diagnostics)
+        diagnostics.append(Diagnostic(f"Re-indented code that failed to parse ({e.msg})", e.lineno))
+        code = repaired
+
+    parse_diagnostics = list(diagnostics)
+    lines = code.split('\n')
+    _rewrite_constants(tree, lines, diagnostics)
+    lines = _inject_colors(tree, lines, diagnostics)
+    repaired = '\n'.join(lines)
+
+    try:
+        ast.parse(repaired)
+    except SyntaxError as e:
+        # A rewrite should never break parsing; keep the parsed code rather than guess
+        logger.warning(f"Code repair produced unparsable code, keeping the original: {e}")
+        return RepairResult(code=code, valid=True, diagnostics=parse_diagnostics)
+
+    for diagnostic in diagnostics:
+        logger.info(f"Code repair: {diagnostic}")
+    return RepairResult(code=repaired, valid=True, diagnostics=diagnostics)
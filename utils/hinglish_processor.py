@@ -3,23 +3,110 @@ Hinglish Text Processing Utilities
 Handles mixed Hindi-English text processing for TTS optimization
 """
 
+import os
 import re
-from typing import Dict, List, Tuple, Optional
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Tuple, Optional
 from dataclasses import dataclass
 import unicodedata
 
-@dataclass
+# Bump whenever processing output changes, so cached audio keyed on raw text is re-synthesized
+PROCESSOR_VERSION = 4
+
+# Patterns shared by every processor, compiled once at import
+# Sentence ends, captured so each sentence keeps its own; a period between
+# two digits is a decimal point, not an end
+_SENTENCE_SPLIT = re.compile(r'([।!?]+|(?<!\d)\.+|\.+(?!\d))')
+# One pass over a sentence finds Devanagari runs (group 1) and Latin runs (group 2)
+_SCRIPT_RUNS = re.compile(r'([\u0900-\u097F]+)|([a-zA-Z]+)')
+_WHITESPACE = re.compile(r'\s+')
+_PUNCTUATION_SPACING = re.compile(r'\s*([।!?,:;]|(?<!\d)\.|\.(?!\d))\s*')
+_UNSUPPORTED_CHARS = re.compile(r'[^\u0900-\u097F\w\s।.!?,:;()\-\'\"]+')
+_EXPLANATION_PAUSE = re.compile(r'(\w+)\s+(means|matlab|yaani)')
+_TERMINAL_PUNCTUATION = re.compile(r'[।.!?]$')
+_TERM_STRIP_CHARS = '.,!?()[]।'
+
+# Conjunctions that get a slight pause after them
+PAUSE_CONJUNCTIONS = ['और', 'aur', 'लेकिन', 'lekin', 'तो', 'to', 'इसलिए', 'isliye']
+
+
+def _alternation(words, flags: int = 0, word_boundaries: bool = False) -> re.Pattern:
+    """One regex matching any of words, longest first so overlapping keys resolve greedily"""
+    alternatives = [re.escape(word) for word in sorted(words, key=len, reverse=True)]
+    if word_boundaries:
+        # Boundaries per alternative, matching the old one-pattern-per-word behaviour
+        alternatives = [rf'\b{alternative}\b' for alternative in alternatives]
+    return re.compile('|'.join(alternatives), flags)
+
+class _Memo:
+    """Bounded LRU memo of pure function results with hit/miss counters"""
+    
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        
+        value = compute()
+        if self.maxsize > 0:
+            with self._lock:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return value
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'maxsize': self.maxsize,
+            }
+
+@dataclass(frozen=True)
 class HinglishSegment:
-    """Represents a segment of Hinglish text with language annotation"""
+    """Represents a segment of Hinglish text with language annotation
+
+    Frozen because memoized segments are shared by every caller.
+    """
     text: str
     language: str  # 'hi', 'en', or 'mixed'
     is_technical: bool = False
     pronunciation_hint: Optional[str] = None
 
 class HinglishProcessor:
-    """Processes Hinglish text for optimal TTS rendering"""
+    """Processes Hinglish text for optimal TTS rendering
+    
+    Processed text, segments and validation results are memoized in bounded
+    LRUs (memo_size entries each), since the same narration recurs across
+    re-renders and scenes.
+    """
     
-    def __init__(self):
+    def __init__(self, memo_size: int = 4096):
+        self._memos = {
+            'process_for_tts': _Memo(memo_size),
+            'segments': _Memo(memo_size),
+            'validation': _Memo(memo_size),
+        }
+        
         # Common English technical terms used in Indian education
         self.technical_terms = {
             # Physics terms
@@ -75,73 +162,111 @@ class HinglishProcessor:
             'chromosome': 'क्रोमोसोम',
             'mitochondria': 'माइटोकॉन्ड्रिया'
         }
+        
+        self.compile_rules()
+    
+    def compile_rules(self) -> None:
+        """Build one alternation regex per rewrite table; call again after editing a table"""
+        # str.replace beats a regex alternation for this short table; longest
+        # keys go first so 'क्योंकि' is not clipped by 'क्यों'
+        self._romanize_order = sorted(self.hindi_mappings.items(), key=lambda item: len(item[0]), reverse=True)
+        self._pronunciation_lookup = {term.lower(): term for term in self.pronunciation_adjustments}
+        self._pronunciation_pattern = _alternation(
+            self.pronunciation_adjustments, flags=re.IGNORECASE, word_boundaries=True
+        )
+        self._pause_pattern = _alternation(PAUSE_CONJUNCTIONS, word_boundaries=True)
+        # Memoized results were produced with the old tables
+        self.clear_memo()
+    
+    def clear_memo(self) -> None:
+        """Drop every memoized result"""
+        for memo in self._memos.values():
+            memo.clear()
+    
+    def memo_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit rates and sizes of the processed-text, segment and validation memos"""
+        return {name: memo.stats() for name, memo in self._memos.items()}
+    
+    def _classify_sentence(self, sentence: str) -> Optional[HinglishSegment]:
+        """Classify a sentence's language from a single pass over its script runs"""
+        hindi_chars = 0
+        english_chars = 0
+        for match in _SCRIPT_RUNS.finditer(sentence):
+            if match.lastindex == 1:
+                hindi_chars += match.end() - match.start()
+            else:
+                english_chars += match.end() - match.start()
+        
+        total_chars = hindi_chars + english_chars
+        if total_chars == 0:
+            return None
+        
+        hindi_ratio = hindi_chars / total_chars
+        
+        # Classify segment
+        if hindi_ratio > 0.7:
+            language = 'hi'
+        elif hindi_ratio < 0.3:
+            language = 'en'
+        else:
+            language = 'mixed'
+        
+        # Check for technical terms
+        technical_terms = self.technical_terms
+        has_technical = any(
+            word.strip(_TERM_STRIP_CHARS) in technical_terms for word in sentence.lower().split()
+        )
+        
+        return HinglishSegment(text=sentence, language=language, is_technical=has_technical)
     
     def detect_language_segments(self, text: str) -> List[HinglishSegment]:
         """Detect and segment text by language (Hindi/English/Mixed)"""
+        segments = self._memos['segments'].get_or_compute(text, lambda: self._detect_language_segments(text))
+        return list(segments)
+    
+    def _detect_language_segments(self, text: str) -> Tuple[HinglishSegment, ...]:
         segments = []
         
-        # Split by sentences first
-        sentences = re.split(r'[।.!?]+', text)
-        
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if not sentence:
+        # Split by sentences first, keeping each one's end punctuation for intonation
+        parts = _SENTENCE_SPLIT.split(text)
+        for body, end in zip(parts[0::2], parts[1::2] + ['']):
+            body = body.strip()
+            if not body:
                 continue
-                
-            # Analyze character composition
-            hindi_chars = len(re.findall(r'[\u0900-\u097F]', sentence))
-            english_chars = len(re.findall(r'[a-zA-Z]', sentence))
-            total_chars = hindi_chars + english_chars
-            
-            if total_chars == 0:
-                continue
-            
-            hindi_ratio = hindi_chars / total_chars
             
-            # Classify segment
-            if hindi_ratio > 0.7:
-                language = 'hi'
-            elif hindi_ratio < 0.3:
-                language = 'en'
-            else:
-                language = 'mixed'
-            
-            # Check for technical terms
-            words = sentence.lower().split()
-            has_technical = any(word.strip('.,!?()[]') in self.technical_terms for word in words)
-            
-            segments.append(HinglishSegment(
-                text=sentence,
-                language=language,
-                is_technical=has_technical
-            ))
+            segment = self._classify_sentence(body + end)
+            if segment is not None:
+                segments.append(segment)
         
-        return segments
+        return tuple(segments)
     
     def romanize_hindi(self, text: str) -> str:
         """Convert Hindi Devanagari text to romanized form for TTS"""
         # Simple mapping - in production, use a proper transliteration library
         romanized = text
-        
-        for hindi, roman in self.hindi_mappings.items():
-            romanized = romanized.replace(hindi, roman)
-        
+        for hindi, roman in self._romanize_order:
+            if hindi in romanized:
+                romanized = romanized.replace(hindi, roman)
         return romanized
     
     def enhance_technical_pronunciation(self, text: str) -> str:
         """Enhance pronunciation of technical terms in Hindi context"""
-        enhanced = text
+        lookup = self._pronunciation_lookup
+        adjustments = self.pronunciation_adjustments
         
-        for term, pronunciation in self.pronunciation_adjustments.items():
-            # Replace technical terms with pronunciation hints
-            pattern = r'\b' + re.escape(term) + r'\b'
-            enhanced = re.sub(pattern, f"{term} ({pronunciation})", enhanced, flags=re.IGNORECASE)
+        def hint(match: re.Match) -> str:
+            term = lookup[match.group(0).lower()]
+            return f"{term} ({adjustments[term]})"
         
-        return enhanced
+        return self._pronunciation_pattern.sub(hint, text)
     
     def process_for_tts(self, text: str, service: str = 'xtts') -> str:
         """Process Hinglish text for optimal TTS rendering"""
-        
+        return self._memos['process_for_tts'].get_or_compute(
+            (text, service), lambda: self._process_for_tts(text, service)
+        )
+    
+    def _process_for_tts(self, text: str, service: str) -> str:
         # Normalize Unicode characters
         text = unicodedata.normalize('NFKC', text)
         
@@ -176,25 +301,23 @@ class HinglishProcessor:
     def _clean_text(self, text: str) -> str:
         """Clean and normalize text"""
         # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE.sub(' ', text)
         
         # Fix punctuation spacing
-        text = re.sub(r'\s*([।.!?,:;])\s*', r'\1 ', text)
+        text = _PUNCTUATION_SPACING.sub(r'\1 ', text)
         
         # Remove special characters that might confuse TTS
-        text = re.sub(r'[^\u0900-\u097F\w\s।.!?,:;()\-\'\"]+', '', text)
+        text = _UNSUPPORTED_CHARS.sub('', text)
         
         return text.strip()
     
     def _add_natural_pauses(self, text: str) -> str:
         """Add natural pauses for better speech flow"""
         # Add slight pause after conjunctions
-        conjunctions = ['और', 'aur', 'लेकिन', 'lekin', 'तो', 'to', 'इसलिए', 'isliye']
-        for conj in conjunctions:
-            text = re.sub(f'\\b{conj}\\b', f'{conj},', text)
+        text = self._pause_pattern.sub(lambda match: match.group(0) + ',', text)
         
         # Add pause before technical explanations
-        text = re.sub(r'(\w+)\s+(means|matlab|yaani)', r'\1, \2', text)
+        text = _EXPLANATION_PAUSE.sub(r'\1, \2', text)
         
         return text
     
@@ -231,12 +354,18 @@ class HinglishProcessor:
     
     def validate_hinglish_text(self, text: str) -> Tuple[bool, List[str]]:
         """Validate Hinglish text and return issues"""
+        is_valid, issues = self._memos['validation'].get_or_compute(
+            text, lambda: self._validate_hinglish_text(text)
+        )
+        return is_valid, list(issues)
+    
+    def _validate_hinglish_text(self, text: str) -> Tuple[bool, Tuple[str, ...]]:
         issues = []
         
         # Check for empty text
         if not text.strip():
             issues.append("Text is empty")
-            return False, issues
+            return False, tuple(issues)
         
         # Check for excessive English in Hindi-focused content
         segments = self.detect_language_segments(text)
@@ -249,16 +378,23 @@ class HinglishProcessor:
         technical_segments = [s for s in segments if s.is_technical]
         for segment in technical_segments:
             words = segment.text.lower().split()
-            technical_words = [w for w in words if w.strip('.,!?()[]') in self.technical_terms]
+            technical_words = [w for w in words if w.strip(_TERM_STRIP_CHARS) in self.technical_terms]
             
             if len(technical_words) > 3:
                 issues.append(f"Segment has many technical terms - consider simplifying: {segment.text[:50]}...")
         
         # Check for proper sentence structure
-        if not re.search(r'[।.!?]$', text.strip()):
+        if not _TERMINAL_PUNCTUATION.search(text.strip()):
             issues.append("Text should end with proper punctuation")
         
-        return len(issues) == 0, issues
+        return len(issues) == 0, tuple(issues)
+
+def _memo_size_from_env(default: int = 4096) -> int:
+    """HINGLISH_PROCESSOR_MEMO_SIZE, falling back to default when unset or malformed"""
+    try:
+        return max(0, int(os.getenv('HINGLISH_PROCESSOR_MEMO_SIZE', default)))
+    except ValueError:
+        return default
 
 # Global processor instance
-hinglish_processor = HinglishProcessor()
+hinglish_processor = HinglishProcessor(memo_size=_memo_size_from_env())
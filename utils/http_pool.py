@@ -0,0 +1,118 @@
+"""
+Shared Keep-Alive HTTP Session Pool for Network TTS Services
+One pooled requests session per process, with bounded connections and a
+per-host concurrency limit, so sentences reuse warm TLS connections
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.tts_config import tts_config
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPSessionPool:
+    """Thread-safe keep-alive session with per-host concurrency limits"""
+
+    def __init__(self, pool_size: int = 8, per_host_limit: int = 4, timeout: float = 30.0):
+        self.pool_size = pool_size
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self._session = None
+        self._adapter = None
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self.requests_sent = 0
+
+    @property
+    def session(self):
+        """Create the requests session on first use"""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    # pool_block keeps connections at pool_size instead of opening throwaway extras
+                    self._adapter = HTTPAdapter(pool_connections=self.pool_size,
+                                                pool_maxsize=self.pool_size, pool_block=True)
+                    session.mount("https://", self._adapter)
+                    session.mount("http://", self._adapter)
+                    self._session = session
+        return self._session
+
+    @contextmanager
+    def _host_slot(self, url: str):
+        host = urlsplit(url).netloc
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+        with slot:
+            yield
+
+    @staticmethod
+    def rebase_url(url: str, endpoint: Optional[str]) -> str:
+        """Point url at endpoint (scheme://host:port), keeping its path and query"""
+        if not endpoint:
+            return url
+        target = urlsplit(endpoint)
+        parts = urlsplit(url)
+        return urlunsplit((target.scheme, target.netloc, parts.path, parts.query, parts.fragment))
+
+    def send(self, prepared_request, endpoint: Optional[str] = None, timeout: Optional[float] = None):
+        """Send a prepared request over a pooled connection"""
+        prepared_request.url = self.rebase_url(prepared_request.url, endpoint)
+        session = self.session
+        with self._host_slot(prepared_request.url):
+            self.requests_sent += 1
+            return session.send(prepared_request, timeout=timeout or self.timeout)
+
+    def request(self, method: str, url: str, endpoint: Optional[str] = None,
+                timeout: Optional[float] = None, **kwargs):
+        """Issue a request over a pooled connection"""
+        url = self.rebase_url(url, endpoint)
+        session = self.session
+        with self._host_slot(url):
+            self.requests_sent += 1
+            return session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Requests sent and connections opened so far"""
+        connections = 0
+        if self._adapter is not None:
+            for key in list(self._adapter.poolmanager.pools.keys()):
+                pool = self._adapter.poolmanager.pools.get(key)
+                if pool is not None:
+                    connections += pool.num_connections
+        return {
+            'requests': self.requests_sent,
+            'connections_opened': connections,
+            'pool_size': self.pool_size,
+            'per_host_limit': self.per_host_limit,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+            self._adapter = None
+
+
+def create_http_pool() -> HTTPSessionPool:
+    """Build the session pool from tts_config"""
+    cfg = tts_config.http_pool_config
+    return HTTPSessionPool(pool_size=cfg.pool_size, per_host_limit=cfg.per_host_limit, timeout=cfg.timeout)
+
+# Global session pool shared by the network TTS services
+http_pool = create_http_pool()
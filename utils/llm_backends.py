@@ -0,0 +1,191 @@
+"""
+Pluggable LLM Backends for Animation Code Generation
+Gemini for real use; a deterministic replay of recorded responses with
+configurable latency for offline load tests and benchmarks
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.render_config import render_config
+from utils.response_cache import normalize_problem_statement
+
+logger = logging.getLogger(__name__)
+
+# The generation prompt introduces the user's topic with this line
+PROBLEM_STATEMENT_MARKER = "USER PROBLEM STATEMENT:"
+
+
+def extract_problem_statement(prompt: str) -> str:
+    """The problem statement a generation prompt was built around"""
+    if PROBLEM_STATEMENT_MARKER not in prompt:
+        return prompt.strip()
+    tail = prompt.split(PROBLEM_STATEMENT_MARKER, 1)[1].lstrip('\n')
+    return tail.split('\n\n', 1)[0].strip()
+
+
+class LLMBackend(ABC):
+    """Abstract base class for LLM backends"""
+
+    model_name: str = ""
+
+    def _thread_state(self) -> threading.local:
+        # One backend serves every render and repair thread; usage is kept per thread
+        return self.__dict__.setdefault('_thread_local', threading.local())
+
+    @property
+    def last_usage(self) -> Optional[Dict[str, int]]:
+        """Token counts reported for this thread's last generate() call, when the backend reports them"""
+        return getattr(self._thread_state(), 'usage', None)
+
+    @last_usage.setter
+    def last_usage(self, usage: Optional[Dict[str, int]]) -> None:
+        self._thread_state().usage = usage
+
+    @abstractmethod
+    def generate(self, prompt: str) -> str:
+        """Return the full response text for prompt"""
+        pass
+
+    @abstractmethod
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Yield the response text for prompt in chunks as they arrive"""
+        pass
+
+    @abstractmethod
+    def is_available(self) -> bool:
+        """Check if backend can serve requests"""
+        pass
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini, configured on first use rather than at import"""
+
+    def __init__(self, model_name: str = "gemini-2.5-flash", api_key: Optional[str] = None):
+        self.model_name = model_name
+        self.api_key = api_key or os.getenv('GOOGLE_API_KEY', '')
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    import google.generativeai as genai
+                    genai.configure(api_key=self.api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def generate(self, prompt: str) -> str:
+        response = self.model.generate_content(prompt)
+        usage = getattr(response, 'usage_metadata', None)
+        self.last_usage = {
+            'prompt_tokens': usage.prompt_token_count,
+            'response_tokens': usage.candidates_token_count,
+        } if usage else None
+        return response.text
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        for chunk in self.model.generate_content(prompt, stream=True):
+            yield chunk.text
+
+    def is_available(self) -> bool:
+        return bool(self.api_key)
+
+
+class ReplayBackend(LLMBackend):
+    """Serves recorded responses with simulated latency, deterministically
+
+    Each fixture is a JSON file with ``problem_statement`` and ``response``.
+    A prompt whose (normalized) problem statement was recorded gets that
+    response; any other prompt gets a fixture chosen by hashing its
+    statement, so the same prompt always replays the same response.
+    """
+
+    def __init__(self, replay_dir: Path, latency: float = 1.0, chunk_delay: float = 0.02,
+                 chunk_size: int = 200):
+        self.replay_dir = Path(replay_dir)
+        self.model_name = "replay"
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.chunk_size = chunk_size
+        self._fixtures: Optional[List[Dict[str, str]]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def fixtures(self) -> List[Dict[str, str]]:
+        """Recorded responses, loaded on first use in a stable order"""
+        if self._fixtures is None:
+            with self._lock:
+                if self._fixtures is None:
+                    fixtures = []
+                    for path in sorted(self.replay_dir.glob('*.json')):
+                        with open(path, 'r', encoding='utf-8') as f:
+                            fixtures.append(json.load(f))
+                    self._fixtures = fixtures
+        return self._fixtures
+
+    def _response_for(self, prompt: str) -> str:
+        if not self.fixtures:
+            raise RuntimeError(f"No recorded responses in {self.replay_dir}")
+        statement = normalize_problem_statement(extract_problem_statement(prompt))
+        for fixture in self.fixtures:
+            if normalize_problem_statement(fixture['problem_statement']) == statement:
+                return fixture['response']
+        digest = int(hashlib.sha256(statement.encode('utf-8')).hexdigest(), 16)
+        return self.fixtures[digest % len(self.fixtures)]['response']
+
+    def _chunks(self, text: str) -> List[str]:
+        return [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+
+    def generate(self, prompt: str) -> str:
+        response = self._response_for(prompt)
+        # Same total time as streaming the response
+        time.sleep(self.latency + self.chunk_delay * max(0, len(self._chunks(response)) - 1))
+        return response
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        chunks = self._chunks(self._response_for(prompt))
+        time.sleep(self.latency)
+        for index, chunk in enumerate(chunks):
+            if index:
+                time.sleep(self.chunk_delay)
+            yield chunk
+
+    def is_available(self) -> bool:
+        return bool(self.fixtures)
+
+
+def record_response(replay_dir: Path, problem_statement: str, response: str, model_name: str = "") -> Path:
+    """Save a live response as a replay fixture"""
+    replay_dir = Path(replay_dir)
+    replay_dir.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r'[^a-z0-9]+', '_', normalize_problem_statement(problem_statement))[:48].strip('_')
+    digest = hashlib.sha256(normalize_problem_statement(problem_statement).encode('utf-8')).hexdigest()[:8]
+    path = replay_dir / f"{slug}_{digest}.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'problem_statement': problem_statement, 'model': model_name, 'response': response},
+                  f, indent=2, ensure_ascii=False)
+    return path
+
+
+def create_llm_backend(api_key: Optional[str] = None) -> LLMBackend:
+    """Build the configured backend from render_config"""
+    cfg = render_config.llm_config
+    if cfg.backend == "replay":
+        return ReplayBackend(Path(cfg.replay_dir), cfg.replay_latency, cfg.replay_chunk_delay, cfg.replay_chunk_size)
+    if cfg.backend != "gemini":
+        logger.warning(f"Unknown LLM backend '{cfg.backend}', using Gemini")
+    return GeminiBackend(cfg.model_name, api_key)
@@ -0,0 +1,176 @@
+"""
+SQLite-backed LRU Index for On-Disk Caches
+Tracks cached files by key with sizes and access times, persists hit/miss
+counters, and picks eviction victims once a byte budget is exceeded
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+class LRUIndex:
+    """Persistent index of cache entries with least-recently-used eviction
+
+    The index only bookkeeps; callers own the cached files and delete the
+    paths of whatever entries ``evict`` or ``clear`` hand back.
+    """
+
+    def __init__(self, db_path: Path, max_bytes: int):
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use"""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, path TEXT NOT NULL, size INTEGER NOT NULL,"
+                " created REAL NOT NULL, last_access REAL NOT NULL,"
+                " hits INTEGER NOT NULL DEFAULT 0, meta TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _row_to_entry(row: sqlite3.Row) -> Dict[str, Any]:
+        entry = dict(row)
+        entry['meta'] = json.loads(entry['meta']) if entry.get('meta') else {}
+        return entry
+
+    def get(self, key: str, touch: bool = True) -> Optional[Dict[str, Any]]:
+        """Return the entry for key, marking it most recently used"""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT * FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if touch:
+                conn.execute(
+                    "UPDATE entries SET last_access = ?, hits = hits + 1 WHERE key = ?",
+                    (time.time(), key)
+                )
+                conn.commit()
+            return self._row_to_entry(row)
+
+    def put(self, key: str, path: str, size: int, meta: Optional[Dict[str, Any]] = None) -> None:
+        """Insert or replace an entry"""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, path, size, created, last_access, hits, meta)"
+                " VALUES (?, ?, ?, ?, ?, 0, ?)",
+                (key, str(path), int(size), now, now, json.dumps(meta or {}))
+            )
+            conn.commit()
+
+    def remove(self, key: str) -> Optional[Dict[str, Any]]:
+        """Drop an entry from the index and return it"""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT * FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            conn.commit()
+            return self._row_to_entry(row)
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            row = self._connect().execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+            return int(row[0])
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0])
+
+    def evict(self, max_bytes: Optional[int] = None, keep: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Remove least recently used entries until the total fits the budget
+
+        ``keep`` is never evicted, e.g. an entry just stored and about to be
+        handed out, even when it alone is over the budget.
+        """
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        evicted = []
+
+        with self._lock:
+            conn = self._connect()
+            total = self.total_bytes()
+            if total <= budget:
+                return evicted
+
+            for row in conn.execute("SELECT * FROM entries ORDER BY last_access ASC").fetchall():
+                if total <= budget:
+                    break
+                if row['key'] == keep:
+                    continue
+                evicted.append(self._row_to_entry(row))
+                total -= row['size']
+
+            conn.executemany("DELETE FROM entries WHERE key = ?", [(e['key'],) for e in evicted])
+            conn.commit()
+
+        if evicted:
+            self.incr('evictions', len(evicted))
+            self.incr('evicted_bytes', sum(e['size'] for e in evicted))
+        return evicted
+
+    def clear(self) -> List[Dict[str, Any]]:
+        """Remove every entry and return them"""
+        with self._lock:
+            conn = self._connect()
+            entries = [self._row_to_entry(row) for row in conn.execute("SELECT * FROM entries").fetchall()]
+            conn.execute("DELETE FROM entries")
+            conn.commit()
+            return entries
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        """Bump a persistent counter such as hits or misses"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO counters (name, value) VALUES (?, ?)"
+                " ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, amount)
+            )
+            conn.commit()
+
+    def touch(self, key: str, counts: Optional[Dict[str, int]] = None) -> None:
+        """Mark key most recently used and bump counters, in one transaction"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "UPDATE entries SET last_access = ?, hits = hits + 1 WHERE key = ?",
+                (time.time(), key)
+            )
+            conn.executemany(
+                "INSERT INTO counters (name, value) VALUES (?, ?)"
+                " ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                list((counts or {}).items())
+            )
+            conn.commit()
+
+    def counters(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._connect().execute("SELECT name, value FROM counters").fetchall()
+            return {row['name']: row['value'] for row in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,446 @@
+"""
+Headless Manim Renderer
+Runs generated scene code through the manim CLI without touching any UI,
+so renders can execute on background worker threads
+"""
+
+import contextlib
+import os
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.narration_prefetch import NarrationPrefetcher, PrefetchReport
+from utils.preflight import PreflightResult, run_preflight
+from utils.render_cache import RenderCache, render_cache_key
+from utils.segment_cache import SegmentCache, SegmentReuse
+from utils.segment_render import concat_videos, plan_segments, run_parts, segment_scene_code
+
+logger = logging.getLogger(__name__)
+
+# Quality directories manim may write to, fastest preset first
+VIDEO_QUALITY_DIRS = ["480p15", "360p15", "720p30", "1080p60"]
+
+
+@dataclass
+class RenderSettings:
+    """Manim output settings for one render"""
+    quality: str = "l"            # manim -q flag: l, m, h, k
+    fps: int = 15
+    resolution: str = "480,360"
+
+    @property
+    def quality_dir(self) -> str:
+        """Directory manim names after the output height and frame rate, e.g. 360p15"""
+        return f"{self.resolution.split(',')[-1].strip()}p{self.fps}"
+
+# Output presets offered in the UI; the draft pass always uses "low"
+QUALITY_PRESETS: Dict[str, RenderSettings] = {
+    'low': RenderSettings(quality='l', fps=15, resolution='480,360'),
+    'medium': RenderSettings(quality='m', fps=30, resolution='1280,720'),
+    'high': RenderSettings(quality='h', fps=60, resolution='1920,1080'),
+}
+DRAFT_PRESET = 'low'
+
+@dataclass
+class RenderResult:
+    """Outcome of a single manim render"""
+    success: bool
+    video_path: Optional[str] = None
+    returncode: Optional[int] = None
+    stdout: str = ''
+    stderr: str = ''
+    error: Optional[str] = None
+    command: List[str] = field(default_factory=list)
+    scene_file: Optional[str] = None
+    timed_out: bool = False
+    cached: bool = False
+    elapsed: float = 0.0
+    prefetch: Optional[PrefetchReport] = None
+    segments: int = 0             # Parts rendered in parallel; 0 when rendered in one process
+    reused_segments: int = 0      # Animations taken from partial_movie_files of an earlier run
+    encoded_segments: int = 0     # Animations rendered and encoded by this run
+
+
+class ManimRenderer:
+    """Writes scene code to disk and renders it with the manim CLI"""
+
+    def __init__(self, project_root: Optional[Path] = None, timeout: int = 300,
+                 cache: Optional[RenderCache] = None,
+                 prefetcher: Optional[NarrationPrefetcher] = None,
+                 segments: int = 1, min_segment_seconds: float = 5.0,
+                 segment_cache: Optional[SegmentCache] = None):
+        self.project_root = Path(project_root) if project_root else Path(__file__).parent.parent
+        self.temp_dir = self.project_root / "temp_animations"
+        self.media_dir = self.project_root / "media" / "videos"
+        self.timeout = timeout
+        self.cache = cache
+        self.prefetcher = prefetcher
+        self.segments = segments
+        self.min_segment_seconds = min_segment_seconds
+        self.segment_cache = segment_cache
+        # Renders of one named animation at one quality share its files, so they
+        # take turns; entries are [lock, renders holding or waiting for it]
+        self._name_locks: Dict[str, list] = {}
+        self._name_locks_guard = threading.Lock()
+
+    def cache_key(self, code: str, scene_name: str, settings: RenderSettings) -> str:
+        return render_cache_key(code, scene_name, settings.quality, settings.fps, settings.resolution)
+
+    def cached_result(self, code: str, scene_name: str = "GeneratedAnimation",
+                      settings: Optional[RenderSettings] = None) -> Optional[RenderResult]:
+        """Return a finished result straight from the render cache, if present"""
+        if self.cache is None:
+            return None
+        settings = settings or RenderSettings()
+        video_path = self.cache.lookup(self.cache_key(code, scene_name, settings))
+        if video_path is None:
+            return None
+        return RenderResult(success=True, video_path=video_path, cached=True)
+
+    def write_scene_file(self, code: str, name: Optional[str] = None) -> Path:
+        """Write scene code to temp_animations, under a stable name if one is given"""
+        self.temp_dir.mkdir(exist_ok=True)
+        if name:
+            # Same file, so same media directory and partial movie files, on every re-render
+            scene_file = self.temp_dir / f"animation_{name}.py"
+        else:
+            # Timestamp alone collides when two workers start in the same second
+            scene_file = self.temp_dir / f"temp_animation_{int(time.time())}_{uuid.uuid4().hex[:6]}.py"
+        with open(scene_file, 'w', encoding='utf-8') as f:
+            f.write(code)
+        return scene_file
+
+    def build_command(self, scene_file: Path, scene_name: str,
+                      settings: Optional[RenderSettings] = None,
+                      reuse_segments: bool = False) -> List[str]:
+        """Build the manim CLI invocation (ultra-fast 480p15 by default)
+
+        With reuse_segments, manim hashes every animation and takes unchanged
+        ones from partial_movie_files instead of rendering them again.
+        """
+        settings = settings or RenderSettings()
+        cmd = [
+            "manim",
+            str(scene_file),
+            scene_name,
+            f"-q{settings.quality}",
+            "--fps", str(settings.fps),
+            "--resolution", settings.resolution
+        ]
+        if not reuse_segments:
+            cmd.insert(4, "--disable_caching")
+        return cmd
+
+    def partial_movie_dir(self, scene_file: Path, scene_name: str, settings: RenderSettings) -> Path:
+        """Where manim keeps the per-animation segments of a render"""
+        return self.media_dir / scene_file.stem / settings.quality_dir / "partial_movie_files" / scene_name
+
+    def _subprocess_env(self) -> Dict[str, str]:
+        env = dict(os.environ)
+        # Segment renders import utils.segment_render from the scene file
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(self.project_root), env.get('PYTHONPATH')]))
+        # Keep manim's log lines unwrapped so cached segment hashes can be read back
+        env['COLUMNS'] = '400'
+        return env
+
+    @staticmethod
+    def stable_name(name: Optional[str], settings: RenderSettings) -> Optional[str]:
+        """File name stem for a named animation at one quality, so qualities render side by side"""
+        return f"{name}_{settings.quality_dir}" if name else None
+
+    @contextlib.contextmanager
+    def _name_lock(self, name: Optional[str]):
+        """Hold the lock for one stable name; dropped once no render uses it"""
+        if not name:
+            yield
+            return
+        with self._name_locks_guard:
+            entry = self._name_locks.setdefault(name, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._name_locks_guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._name_locks[name]
+
+    def _record_segments(self, partial_dir: Path, before, completed: subprocess.CompletedProcess) -> SegmentReuse:
+        """Index the partial movie files of a finished manim run"""
+        if self.segment_cache is None:
+            return SegmentReuse()
+        try:
+            return self.segment_cache.record(partial_dir, before, (completed.stdout or '') + (completed.stderr or ''))
+        except Exception as e:
+            logger.warning(f"Could not update the segment index: {e}")
+            return SegmentReuse()
+
+    def find_video(self, scene_file: Path, scene_name: str,
+                   settings: Optional[RenderSettings] = None) -> Optional[Path]:
+        """Locate the rendered video, looking in the directory for settings first"""
+        base_media_dir = self.media_dir / scene_file.stem
+        quality_dirs = VIDEO_QUALITY_DIRS
+        if settings is not None:
+            quality_dirs = [settings.quality_dir] + [d for d in VIDEO_QUALITY_DIRS if d != settings.quality_dir]
+
+        for quality_dir in quality_dirs:
+            media_dir = base_media_dir / quality_dir
+            if not media_dir.exists():
+                continue
+
+            video_file = media_dir / f"{scene_name}.mp4"
+            if video_file.exists():
+                if video_file.stat().st_size > 1000:  # Ensure it's a real video file
+                    return video_file
+                logger.warning(f"Video file too small: {video_file}")
+                continue
+
+            # Try alternative file patterns
+            alt_files = list(media_dir.glob("*.mp4"))
+            if alt_files:
+                return alt_files[0]
+
+        return None
+
+    def render(self, code: str, scene_name: str = "GeneratedAnimation",
+               timeout: Optional[int] = None,
+               settings: Optional[RenderSettings] = None,
+               check_cache: bool = True,
+               name: Optional[str] = None,
+               narration: Optional[str] = None,
+               preflight: Optional[PreflightResult] = None) -> RenderResult:
+        """Render scene code and return the result; never raises
+
+        A name (one per generated animation, kept across edits) gives the scene a
+        stable file per quality, so re-renders reuse the partial movie files of
+        every animation that did not change. ``narration`` is the generated narration
+        script, prefetched alongside the code's voiceover texts. ``preflight`` is
+        a dry run of this code already done by the caller, reused to plan parts.
+        """
+        settings = settings or RenderSettings()
+        name = self.stable_name(name, settings)
+        with self._name_lock(name):
+            return self._render(code, scene_name, timeout, settings, check_cache, name, narration, preflight)
+
+    def _render(self, code: str, scene_name: str, timeout: Optional[int], settings: RenderSettings,
+                check_cache: bool, name: Optional[str], narration: Optional[str],
+                preflight: Optional[PreflightResult]) -> RenderResult:
+        start = time.time()
+        scene_file = None
+        cmd: List[str] = []
+
+        cached = self.cached_result(code, scene_name, settings) if check_cache else None
+        if cached:
+            logger.info(f"Render cache hit: {cached.video_path}")
+            cached.elapsed = time.time() - start
+            return cached
+
+        # Code that cannot compile fails here in milliseconds, not after manim starts
+        try:
+            compile(code, '<generated animation>', 'exec')
+        except SyntaxError as e:
+            return RenderResult(success=False, error=f"Scene code does not compile: {e.msg} (line {e.lineno})",
+                                elapsed=time.time() - start)
+
+        # Synthesize narration concurrently before manim would fetch it line by line
+        prefetch = None
+        if self.prefetcher is not None:
+            try:
+                prefetch = self.prefetcher.prefetch(code, narration)
+            except Exception as e:
+                logger.warning(f"Narration prefetch failed, render will synthesize inline: {e}")
+
+        if self.segments > 1:
+            segmented = self.render_segments(code, scene_name, settings, timeout or self.timeout, name,
+                                             preflight)
+            if segmented is not None:
+                segmented.prefetch = prefetch
+                segmented.elapsed = time.time() - start
+                return segmented
+
+        reuse = bool(name) and self.segment_cache is not None
+        try:
+            scene_file = self.write_scene_file(code, name)
+            partial_dir = self.partial_movie_dir(scene_file, scene_name, settings)
+            before = SegmentCache.snapshot(partial_dir) if reuse else set()
+            cmd = self.build_command(scene_file, scene_name, settings, reuse_segments=reuse)
+            logger.info(f"Running command: {' '.join(cmd)}")
+
+            completed = subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                cwd=str(self.project_root),
+                env=self._subprocess_env(),
+                timeout=timeout or self.timeout
+            )
+
+            result = RenderResult(
+                success=False,
+                returncode=completed.returncode,
+                stdout=completed.stdout or '',
+                stderr=completed.stderr or '',
+                command=cmd,
+                scene_file=str(scene_file),
+            )
+            if reuse:
+                # Segments written before a failure are reused by the next attempt too
+                reuse_tally = self._record_segments(partial_dir, before, completed)
+                result.reused_segments, result.encoded_segments = reuse_tally.reused, reuse_tally.encoded
+
+            if completed.returncode != 0:
+                result.error = f"Manim rendering failed with exit code {completed.returncode}"
+            else:
+                video_file = self.find_video(scene_file, scene_name, settings)
+                if video_file:
+                    result.success = True
+                    result.video_path = str(video_file)
+                    if self.cache is not None:
+                        result.video_path = self.cache.store(
+                            self.cache_key(code, scene_name, settings),
+                            str(video_file),
+                            # A named animation keeps its partial movie files for the next edit
+                            work_dir=None if name else self.media_dir / scene_file.stem
+                        )
+                else:
+                    result.error = "Video file not found in any quality directory"
+
+        except subprocess.TimeoutExpired:
+            result = RenderResult(
+                success=False,
+                error=f"Animation rendering timed out ({timeout or self.timeout} seconds)",
+                command=cmd,
+                scene_file=str(scene_file) if scene_file else None,
+                timed_out=True,
+            )
+        except Exception as e:
+            logger.error(f"Error running animation: {e}")
+            result = RenderResult(
+                success=False,
+                error=f"Error running animation: {e}",
+                command=cmd,
+                scene_file=str(scene_file) if scene_file else None,
+            )
+
+        result.prefetch = prefetch
+        result.elapsed = time.time() - start
+        return result
+
+    def render_segments(self, code: str, scene_name: str, settings: RenderSettings,
+                        timeout: int, name: Optional[str] = None,
+                        preflight: Optional[PreflightResult] = None) -> Optional[RenderResult]:
+        """Render the scene as parallel parts joined without re-encoding
+
+        The dry run's voiceover timeline decides where to split; a dry run the
+        caller already made of this code is used as is, otherwise one is run.
+        Returns None when the scene is too short to split or the parts cannot be
+        joined, so the caller renders it in one process instead. Parts of a named
+        animation keep their stable files and partial movie files like a whole
+        render does.
+        """
+        if shutil.which('ffmpeg') is None:
+            logger.info("ffmpeg not found, rendering in one process")
+            return None
+
+        plan = preflight if preflight is not None else run_preflight(code, scene_name)
+        if not plan.ok or plan.skipped:
+            logger.info("No dry-run timeline to split the scene at, rendering in one process")
+            return None
+        ranges = plan_segments(plan.chunks, plan.estimated_duration, self.segments, self.min_segment_seconds)
+        if len(ranges) < 2:
+            return None
+
+        reuse = bool(name) and self.segment_cache is not None
+        scene_file = self.write_scene_file(code, name)
+        part_files = []
+        for index, (first, last) in enumerate(ranges):
+            part_file = scene_file.with_name(f"{scene_file.stem}_part{index}.py")
+            part_file.write_text(segment_scene_code(code, scene_name, first, last), encoding='utf-8')
+            part_files.append(part_file)
+
+        env = self._subprocess_env()
+        partial_dirs = [self.partial_movie_dir(part_file, scene_name, settings) for part_file in part_files]
+        before = [SegmentCache.snapshot(partial_dir) if reuse else set() for partial_dir in partial_dirs]
+
+        commands = [self.build_command(part_file, scene_name, settings, reuse_segments=reuse)
+                    for part_file in part_files]
+        logger.info(f"Rendering {len(part_files)} parts in parallel, voiceover chunks {ranges}")
+        try:
+            # A part that fails or times out stops the others at once
+            completed, failed = run_parts(commands, timeout, cwd=str(self.project_root), env=env)
+        except subprocess.TimeoutExpired:
+            return RenderResult(
+                success=False,
+                error=f"Animation rendering timed out ({timeout} seconds)",
+                command=commands[0],
+                scene_file=str(scene_file),
+                timed_out=True,
+                segments=len(part_files),
+            )
+        except Exception as e:
+            logger.warning(f"Parallel render failed, rendering in one process: {e}")
+            return None
+
+        reused = encoded = 0
+        if reuse:
+            for partial_dir, snapshot, part in zip(partial_dirs, before, completed):
+                tally = self._record_segments(partial_dir, snapshot, part)
+                reused, encoded = reused + tally.reused, encoded + tally.encoded
+
+        if failed is not None:
+            # The parts are the scene plus a footer, so traceback lines match the original code
+            return RenderResult(
+                success=False,
+                returncode=failed.returncode,
+                stdout=failed.stdout or '',
+                stderr=failed.stderr or '',
+                error=f"Manim rendering failed with exit code {failed.returncode}",
+                command=failed.args,
+                scene_file=str(scene_file),
+                segments=len(part_files),
+                reused_segments=reused,
+                encoded_segments=encoded,
+            )
+
+        videos = [self.find_video(part_file, scene_name, settings) for part_file in part_files]
+        video_file = self.media_dir / scene_file.stem / settings.quality_dir / f"{scene_name}.mp4"
+        error = "Video file not found for a part" if None in videos else concat_videos(videos, video_file)
+        for part_file, video in zip(part_files, videos):
+            if not name:
+                shutil.rmtree(self.media_dir / part_file.stem, ignore_errors=True)
+            elif video is not None:
+                video.unlink(missing_ok=True)    # Keep the part's partial movie files only
+        if error:
+            logger.warning(f"Could not join rendered parts, rendering in one process: {error}")
+            return None
+
+        result = RenderResult(
+            success=True,
+            video_path=str(video_file),
+            returncode=0,
+            stdout='\n'.join(part.stdout or '' for part in completed),
+            stderr='\n'.join(part.stderr or '' for part in completed),
+            command=commands[0],
+            scene_file=str(scene_file),
+            segments=len(part_files),
+            reused_segments=reused,
+            encoded_segments=encoded,
+        )
+        if self.cache is not None:
+            result.video_path = self.cache.store(
+                self.cache_key(code, scene_name, settings),
+                str(video_file),
+                work_dir=None if name else self.media_dir / scene_file.stem
+            )
+        return result
@@ -0,0 +1,123 @@
+"""
+Local Mock TTS HTTP Server
+Answers gTTS batchexecute and ElevenLabs text-to-speech requests with fake
+audio, so the network TTS path can be exercised and benchmarked offline
+"""
+
+import argparse
+import base64
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Stand-in audio: an MPEG frame header followed by padding
+FAKE_MP3 = b'\xff\xf3\x44\xc4' + b'\x00' * 412
+
+
+class MockTTSServer:
+    """Threaded keep-alive HTTP server imitating the gTTS and ElevenLabs endpoints
+
+    connect_delay is charged once per TCP connection (standing in for the TLS
+    handshake to a real host) and response_delay once per request.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 connect_delay: float = 0.1, response_delay: float = 0.02):
+        self.connect_delay = connect_delay
+        self.response_delay = response_delay
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+                time.sleep(server.connect_delay)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                self.rfile.read(length)
+                with server._lock:
+                    server.requests += 1
+                time.sleep(server.response_delay)
+
+                if self.path.startswith('/_/TranslateWebserverUi/data/batchexecute'):
+                    audio = base64.b64encode(FAKE_MP3).decode('ascii')
+                    payload = json.dumps([[
+                        "wrb.fr", "jQ1olc", json.dumps([audio]), None, None, None, "generic"
+                    ]], separators=(',', ':'))
+                    body = f")]}}'\n\n{len(payload)}\n{payload}\n".encode('utf-8')
+                    content_type = 'application/json; charset=utf-8'
+                elif self.path.startswith('/v1/text-to-speech/'):
+                    body = FAKE_MP3
+                    content_type = 'audio/mpeg'
+                else:
+                    self.send_error(404)
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self) -> "MockTTSServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.connections = 0
+            self.requests = 0
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    """Run the mock server in the foreground"""
+    parser = argparse.ArgumentParser(description="Mock gTTS/ElevenLabs endpoint")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--connect-delay", type=float, default=0.1)
+    parser.add_argument("--response-delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    server = MockTTSServer(port=args.port, connect_delay=args.connect_delay,
+                           response_delay=args.response_delay)
+    print(f"Mock TTS server on {server.url}")
+    print(f"  export HINGLISH_GTTS_ENDPOINT={server.url}")
+    print(f"  export HINGLISH_ELEVENLABS_ENDPOINT={server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Narration Extraction Utilities
+Pulls voiceover lines out of scene code and Gemini narration scripts so
+audio can be synthesized before Manim starts rendering
+"""
+
+import ast
+import inspect
+import logging
+import re
+import textwrap
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# "1. line", "2) line", "- line", "• line"
+_SCRIPT_LINE_PREFIX = re.compile(r'^\s*(?:\d+\s*[.)]|[-*•])\s*')
+
+
+def _single_assignments(tree: ast.AST) -> Dict[str, ast.AST]:
+    """Values of names bound exactly once, by a plain ``name = value`` assignment"""
+    stores: Dict[str, int] = {}
+    values: Dict[str, ast.AST] = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+            stores[node.id] = stores.get(node.id, 0) + 1
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            values[node.targets[0].id] = node.value
+    return {name: value for name, value in values.items() if stores.get(name) == 1}
+
+
+def _literal_text(node: ast.AST, names: Optional[Dict[str, ast.AST]] = None) -> Optional[str]:
+    """String value of a node known before the scene runs, or None
+
+    Covers string constants (including implicit concatenation), f-strings
+    without replacement fields, ``+`` between such strings, and names bound
+    once to one of them.
+    """
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.JoinedStr):
+        parts = [_literal_text(value) for value in node.values]
+        return None if None in parts else ''.join(parts)
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        left, right = _literal_text(node.left, names), _literal_text(node.right, names)
+        return None if left is None or right is None else left + right
+    if isinstance(node, ast.Name) and names and node.id in names:
+        return _literal_text(names[node.id])
+    return None
+
+
+def _voiceover_text_nodes(tree: ast.AST) -> List[ast.AST]:
+    """The text argument of every ``self.voiceover(...)`` call, in source order"""
+    calls = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call):
+            continue
+        func = node.func
+        if not (isinstance(func, ast.Attribute) and func.attr == 'voiceover'
+                and isinstance(func.value, ast.Name) and func.value.id == 'self'):
+            continue
+
+        text_node = None
+        for keyword in node.keywords:
+            if keyword.arg == 'text':
+                text_node = keyword.value
+        if text_node is None and node.args:
+            text_node = node.args[0]
+        if text_node is not None:
+            calls.append((node.lineno, node.col_offset, text_node))
+
+    # ast.walk is breadth-first; report lines in the order they are spoken in the file
+    return [text_node for _, _, text_node in sorted(calls, key=lambda call: call[:2])]
+
+
+def _parse(code: str) -> Optional[ast.AST]:
+    try:
+        return ast.parse(code)
+    except SyntaxError as e:
+        logger.warning(f"Cannot extract narration from unparseable code: {e}")
+        return None
+
+
+def extract_voiceover_texts(code: str) -> List[str]:
+    """Collect every statically known ``self.voiceover(text=...)`` string in source order
+
+    Texts built at run time (f-strings with fields, variables assigned more
+    than once, calls) cannot be known before the scene runs and are skipped;
+    they are synthesized during the render as before.
+    """
+    tree = _parse(code)
+    if tree is None:
+        return []
+    names = _single_assignments(tree)
+    texts = [_literal_text(node, names) for node in _voiceover_text_nodes(tree)]
+    return [text for text in texts if text and text.strip()]
+
+
+def count_voiceovers(code: str) -> int:
+    """Number of ``self.voiceover(...)`` calls, whether or not their text is known"""
+    tree = _parse(code)
+    return len(_voiceover_text_nodes(tree)) if tree is not None else 0
+
+
+def extract_scene_narration(scene_cls: type) -> List[str]:
+    """Voiceover texts from a scene class and the scene bases it inherits code from"""
+    texts = []
+    for cls in scene_cls.__mro__:
+        if cls.__module__.startswith(('manim', 'builtins')):
+            continue
+        try:
+            source = textwrap.dedent(inspect.getsource(cls))
+        except (OSError, TypeError):
+            continue
+        texts.extend(extract_voiceover_texts(source))
+    return list(dict.fromkeys(texts))
+
+
+def parse_narration_script(script: str) -> List[str]:
+    """Split the HINGLISH NARRATION SCRIPT section into individual lines"""
+    lines = []
+    for raw_line in script.splitlines():
+        line = _SCRIPT_LINE_PREFIX.sub('', raw_line).strip()
+        line = line.strip('"“”\'')
+        if line and not line.startswith('['):
+            lines.append(line)
+    return lines
@@ -0,0 +1,178 @@
+"""
+Pre-Render Narration Prefetch Stage
+Statically extracts voiceover texts from generated scene code and warms the
+scene's speech-service cache concurrently before the manim subprocess starts,
+so network TTS latency is no longer paid serially mid-render
+"""
+
+import ast
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.render_config import render_config
+from utils.narration import count_voiceovers, extract_voiceover_texts, parse_narration_script
+
+logger = logging.getLogger(__name__)
+
+# manim-voiceover appends to a shared cache.json; serialize our appends
+_cache_json_lock = threading.Lock()
+
+
+@dataclass
+class PrefetchReport:
+    """What the prefetch stage did for one scene"""
+    service: Optional[str] = None
+    texts: List[str] = field(default_factory=list)
+    cached: int = 0
+    synthesized: int = 0
+    failed: int = 0
+    skipped_reason: Optional[str] = None
+    elapsed: float = 0.0
+
+
+def find_speech_service(code: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Return the class name and literal kwargs passed to self.set_speech_service(...)"""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                and node.func.attr == 'set_speech_service' and node.args):
+            continue
+
+        service_call = node.args[0]
+        if not isinstance(service_call, ast.Call):
+            return None
+
+        func = service_call.func
+        name = func.id if isinstance(func, ast.Name) else getattr(func, 'attr', None)
+        kwargs = {}
+        for keyword in service_call.keywords:
+            if keyword.arg is None:
+                continue
+            try:
+                kwargs[keyword.arg] = ast.literal_eval(keyword.value)
+            except ValueError:
+                # Non-literal argument: the service cannot be rebuilt faithfully
+                return name, None
+        return name, kwargs
+
+    return None
+
+
+def narration_texts(code: str, script: Optional[str] = None) -> List[str]:
+    """Lines to pre-synthesize: the code's known voiceover texts, then the script's other lines"""
+    texts = extract_voiceover_texts(code)
+    if script and len(texts) < count_voiceovers(code):
+        texts += parse_narration_script(script)
+    # Same whitespace normalization manim-voiceover applies, so duplicates collapse
+    return list(dict.fromkeys(" ".join(text.split()) for text in texts))
+
+
+class NarrationPrefetcher:
+    """Warms the TTS cache for every literal voiceover line of a scene"""
+
+    def __init__(self, project_root: Optional[Path] = None, max_workers: int = 8):
+        self.project_root = Path(project_root) if project_root else Path(__file__).parent.parent
+        # manim renders with cwd=project_root, so its voiceover cache lands here
+        self.voiceover_cache_dir = self.project_root / "media" / "voiceovers"
+        self.max_workers = max_workers
+
+    def prefetch(self, code: str, script: Optional[str] = None) -> PrefetchReport:
+        """Extract narration from scene code and synthesize every uncached line
+
+        ``script`` is the HINGLISH NARRATION SCRIPT section. Its lines are added
+        when some voiceover texts are only known at run time, since the script
+        is then the best guess at what the scene will say.
+        """
+        start = time.time()
+        report = PrefetchReport(texts=narration_texts(code, script))
+
+        service_spec = find_speech_service(code)
+        if not report.texts or service_spec is None:
+            report.skipped_reason = "no literal voiceover texts or speech service found"
+        else:
+            report.service, kwargs = service_spec
+            if kwargs is None:
+                report.skipped_reason = f"{report.service} is configured with non-literal arguments"
+            elif report.service == 'GTTSService':
+                self._prefetch_gtts(report, kwargs)
+            else:
+                report.skipped_reason = f"no prefetch support for {report.service}"
+
+        report.elapsed = time.time() - start
+        if report.skipped_reason:
+            logger.info(f"Narration prefetch skipped: {report.skipped_reason}")
+        else:
+            logger.info(
+                f"Narration prefetch: {report.synthesized} synthesized, {report.cached} cached, "
+                f"{report.failed} failed in {report.elapsed:.1f}s"
+            )
+        return report
+
+    def _prefetch_gtts(self, report: PrefetchReport, kwargs: Dict[str, Any]) -> None:
+        """Populate manim-voiceover's GTTSService cache exactly as a render would"""
+        if kwargs.get('global_speed', 1) != 1 or kwargs.get('transcription_model'):
+            # Speed adjustment and transcription happen in manim-voiceover's
+            # post-processing, which the render still has to do itself
+            report.skipped_reason = "speech service post-processing is enabled"
+            return
+
+        try:
+            from manim_voiceover.defaults import DEFAULT_VOICEOVER_CACHE_JSON_FILENAME
+            from manim_voiceover.helper import append_to_json_file, remove_bookmarks
+            from manim_voiceover.services.gtts import GTTSService
+        except ImportError as e:
+            report.skipped_reason = f"manim-voiceover not available: {e}"
+            return
+
+        cache_dir = self.voiceover_cache_dir
+        service = GTTSService(cache_dir=str(cache_dir), **kwargs)
+
+        pending = []
+        for text in report.texts:
+            input_data = {"input_text": remove_bookmarks(text), "service": "gtts"}
+            if service.get_cached_result(input_data, cache_dir) is not None:
+                report.cached += 1
+            else:
+                pending.append(text)
+
+        if not pending:
+            return
+
+        entries = []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as pool:
+            futures = {
+                pool.submit(service.generate_from_text, text, cache_dir=cache_dir): text
+                for text in pending
+            }
+            for future in as_completed(futures):
+                try:
+                    entries.append(future.result())
+                except Exception as e:
+                    logger.warning(f"Prefetch failed for '{futures[future][:40]}': {e}")
+                    report.failed += 1
+
+        with _cache_json_lock:
+            for entry in entries:
+                entry["final_audio"] = entry["original_audio"]
+                append_to_json_file(cache_dir / DEFAULT_VOICEOVER_CACHE_JSON_FILENAME, entry)
+        report.synthesized = len(entries)
+
+
+def create_narration_prefetcher() -> Optional[NarrationPrefetcher]:
+    """Build the prefetch stage from render_config, or None when disabled"""
+    cfg = render_config.prefetch_config
+    if not cfg.enabled:
+        return None
+    return NarrationPrefetcher(max_workers=cfg.max_workers)
@@ -0,0 +1,332 @@
+"""
+Pre-flight Dry Run for Generated Scenes
+Imports the scene in a sandboxed worker process and runs construct() against a
+null renderer with frame writing, TTS and LaTeX stubbed, so doomed renders are
+rejected in about a second instead of occupying a render worker
+"""
+
+import contextlib
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.render_config import PROJECT_ROOT, render_config
+from utils.segment_render import current_section
+
+logger = logging.getLogger(__name__)
+
+# The worker prints its report on a line starting with this marker
+RESULT_MARKER = "PREFLIGHT_RESULT "
+
+# Speaking rate used to estimate narration length without synthesizing it
+WORDS_PER_SECOND = 2.5
+
+BOOKMARK_PATTERN = re.compile(r"<bookmark\s+mark\s*=\s*['\"]([^'\"]+)['\"]\s*/>")
+
+
+@dataclass
+class PreflightResult:
+    """Outcome of dry-running one scene"""
+    ok: bool
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    error_line: Optional[int] = None      # Line in the scene code that raised
+    estimated_duration: float = 0.0       # Seconds of video, narration estimated from word count
+    animation_count: int = 0              # play() animations, not counting waits
+    voiceover_count: int = 0
+    skipped: bool = False                 # Manim unavailable; nothing was checked
+    elapsed: float = 0.0
+    traceback: str = ''
+    chunks: List[Dict[str, Any]] = field(default_factory=list)  # Top-level voiceovers: section, start time
+
+
+# ---------------------------------------------------------------------------
+# Parent side
+# ---------------------------------------------------------------------------
+
+def _limit_resources(memory_mb: int, cpu_seconds: int):
+    """preexec_fn capping the worker's address space and CPU time"""
+    def apply():
+        import resource
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds))
+    return apply
+
+
+def _parse_worker_output(stdout: str) -> Optional[PreflightResult]:
+    """The report from the worker's last marker line, if it got that far"""
+    for line in reversed(stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            try:
+                return PreflightResult(**json.loads(line[len(RESULT_MARKER):]))
+            except (ValueError, TypeError) as e:
+                logger.warning(f"Unreadable pre-flight report: {e}")
+                return None
+    return None
+
+
+def run_preflight(code: str, scene_name: str = "GeneratedAnimation",
+                  timeout: Optional[int] = None, memory_mb: Optional[int] = None) -> PreflightResult:
+    """Dry-run scene code in a sandboxed subprocess; never raises"""
+    start = time.time()
+    cfg = render_config.preflight_config
+    timeout = timeout or cfg.timeout
+    memory_mb = memory_mb or cfg.memory_mb
+
+    try:
+        compile(code, '<generated animation>', 'exec')
+    except SyntaxError as e:
+        return PreflightResult(ok=False, errors=[f"SyntaxError: {e.msg}"], error_line=e.lineno,
+                               elapsed=time.time() - start)
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(PROJECT_ROOT), env.get('PYTHONPATH')]))
+    env['OMP_NUM_THREADS'] = env['OPENBLAS_NUM_THREADS'] = '1'   # Keep thread stacks inside the memory cap
+
+    with tempfile.TemporaryDirectory(prefix="preflight_") as work_dir:
+        scene_file = Path(work_dir) / "scene.py"
+        scene_file.write_text(code, encoding='utf-8')
+        cmd = [sys.executable, str(Path(__file__).resolve()), str(scene_file), scene_name]
+        try:
+            completed = subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                cwd=work_dir,
+                env=env,
+                timeout=timeout,
+                preexec_fn=_limit_resources(memory_mb, timeout + 1) if os.name == 'posix' else None,
+            )
+        except subprocess.TimeoutExpired:
+            return PreflightResult(
+                ok=False,
+                errors=[f"Dry run did not finish within {timeout} seconds (endless loop or very heavy scene?)"],
+                elapsed=time.time() - start,
+            )
+        except Exception as e:
+            logger.warning(f"Could not start pre-flight worker, skipping dry run: {e}")
+            return PreflightResult(ok=True, skipped=True, warnings=[f"Dry run unavailable: {e}"],
+                                   elapsed=time.time() - start)
+
+    result = _parse_worker_output(completed.stdout)
+    if result is None:
+        # Killed before reporting: memory cap, CPU cap or a hard crash
+        stderr_tail = (completed.stderr or '').strip().splitlines()[-1:] or ['no output']
+        result = PreflightResult(
+            ok=False,
+            errors=[f"Dry-run worker exited with code {completed.returncode}: {stderr_tail[0]}"],
+            traceback=(completed.stderr or '')[-4000:],
+        )
+    result.elapsed = time.time() - start
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Worker side (runs in the sandboxed subprocess)
+# ---------------------------------------------------------------------------
+
+class EstimatedTracker:
+    """Stands in for manim-voiceover's VoiceoverTracker, timed by word count"""
+
+    def __init__(self, scene, text: str):
+        self.scene = scene
+        self.data = {'input_text': text}
+        self.start_t = scene.renderer.time
+        words = BOOKMARK_PATTERN.sub(lambda m: f" \0{m.group(1)} ", text).split()
+        self.bookmarks: Dict[str, float] = {}
+        spoken = 0
+        for word in words:
+            if word.startswith('\0'):
+                self.bookmarks[word[1:]] = spoken / WORDS_PER_SECOND
+            else:
+                spoken += 1
+        self.duration = max(1.0, spoken / WORDS_PER_SECOND)
+        self.end_t = self.start_t + self.duration
+
+    def get_remaining_duration(self, buff: float = 0.0) -> float:
+        return max(self.end_t - self.scene.renderer.time + buff, 0)
+
+    def time_until_bookmark(self, mark: str, buff: float = 0, limit: Optional[float] = None) -> float:
+        if mark not in self.bookmarks:
+            raise Exception(f"There is no <bookmark mark='{mark}' />")
+        remaining = self.start_t + self.bookmarks[mark] - self.scene.renderer.time + buff
+        if limit is not None:
+            remaining = min(limit, remaining)
+        return max(remaining, 0)
+
+
+def _tex_problems(expression: str) -> Optional[str]:
+    """Structural LaTeX mistakes that are certain to fail compilation"""
+    depth = 0
+    for char in re.sub(r'\\[{}]', '', expression):
+        depth += {'{': 1, '}': -1}.get(char, 0)
+        if depth < 0:
+            return "unbalanced '}'"
+    if depth:
+        return "unbalanced '{'"
+    begins = re.findall(r'\\begin\{([^}]*)\}', expression)
+    ends = re.findall(r'\\end\{([^}]*)\}', expression)
+    if sorted(begins) != sorted(ends):
+        return "\\begin and \\end environments do not match"
+    return None
+
+
+def _install_stubs(scene_file: Path, stats: Dict[str, Any]):
+    """Patch manim and manim-voiceover so construct() renders, writes and speaks nothing"""
+    work_dir = scene_file.parent
+    import manim
+    from manim import config
+    from manim.renderer.cairo_renderer import CairoRenderer
+    from manim.animation.animation import Wait
+
+    logging.getLogger("manim").setLevel(logging.ERROR)
+    config.media_dir = str(work_dir / "media")
+    config.disable_caching = True
+    config.write_to_movie = False
+    config.save_last_frame = False
+
+    class NullFileWriter:
+        """Accepts every file-writer call and writes nothing"""
+
+        def __init__(self, *args, **kwargs):
+            self.sections = []
+
+        def __getattr__(self, name):
+            return lambda *args, **kwargs: None
+
+    class NullRenderer(CairoRenderer):
+        """Jumps each animation from its start to its end state; draws no frames"""
+
+        def init_scene(self, scene):
+            self.file_writer = NullFileWriter()
+
+        def play(self, scene, *args, **kwargs):
+            scene.compile_animation_data(*args, **kwargs)
+            scene.begin_animations()
+            scene.finish_animations()
+            self.num_plays += 1
+            self.time += scene.duration
+            stats['animation_count'] += sum(not isinstance(a, Wait) for a in scene.animations)
+
+        def update_frame(self, *args, **kwargs):
+            pass
+
+        def render(self, *args, **kwargs):
+            pass
+
+        def scene_finished(self, scene):
+            pass
+
+    # LaTeX: check structure, then stand in an SVG with roughly one glyph per symbol
+    def tex_to_svg_file(expression, environment=None, tex_template=None):
+        problem = _tex_problems(expression)
+        if problem:
+            raise ValueError(f"LaTeX error in {expression!r}: {problem}")
+        glyphs = max(1, len(re.sub(r'\\(left|right|frac|sqrt|text|mathrm|quad|qquad)\b|\\[,;!]|[\s{}^_&$]', '',
+                                   re.sub(r'\\[a-zA-Z]+', 'x', expression))))
+        svg_file = work_dir / f"tex_{abs(hash(expression))}.svg"
+        if not svg_file.exists():
+            paths = ''.join(f'<path d="M{i * 10} 0h8v10h-8z"/>' for i in range(glyphs))
+            svg_file.write_text(f'<svg xmlns="http://www.w3.org/2000/svg" width="{glyphs * 10}" height="10" '
+                                f'viewBox="0 0 {glyphs * 10} 10">{paths}</svg>')
+        return svg_file
+
+    from manim.utils import tex_file_writing
+    tex_file_writing.tex_to_svg_file = tex_to_svg_file
+    tex_module = sys.modules.get('manim.mobject.text.tex_mobject')
+    if tex_module is not None and hasattr(tex_module, 'tex_to_svg_file'):
+        tex_module.tex_to_svg_file = tex_to_svg_file
+
+    # TTS: no synthesis; narration lasts as long as its words take to say
+    try:
+        from manim_voiceover import VoiceoverScene
+    except ImportError:
+        VoiceoverScene = None    # A scene that needs it fails on import and is reported
+    if VoiceoverScene is not None:
+        def set_speech_service(self, speech_service, create_subcaption=True):
+            self.speech_service = speech_service
+
+        @contextlib.contextmanager
+        def voiceover(self, text=None, ssml=None, **kwargs):
+            if text is None and ssml is None:
+                raise ValueError("Please specify either a voiceover text or SSML string.")
+            tracker = EstimatedTracker(self, text if text is not None else ssml)
+            stats['voiceover_count'] += 1
+            depth = getattr(self, '_preflight_voiceover_depth', 0)
+            if depth == 0:
+                # Where a segment-parallel render may split the scene
+                stats['chunks'].append({'section': current_section(str(scene_file)),
+                                        'start': round(self.renderer.time, 2)})
+            self._preflight_voiceover_depth = depth + 1
+            try:
+                yield tracker
+            finally:
+                remaining = tracker.get_remaining_duration()
+                if remaining > 0:
+                    self.wait(remaining)
+                self._preflight_voiceover_depth = depth
+
+        VoiceoverScene.set_speech_service = set_speech_service
+        VoiceoverScene.voiceover = voiceover
+
+    return NullRenderer
+
+
+def _dry_run(scene_file: Path, scene_name: str) -> Dict[str, Any]:
+    """Import the scene and run construct() under the stubs; returns the report"""
+    report = asdict(PreflightResult(ok=False))
+    try:
+        import manim  # noqa: F401
+    except ImportError as e:
+        report.update(ok=True, skipped=True, warnings=[f"Manim is not installed, dry run skipped ({e})"])
+        return report
+
+    import runpy
+    try:
+        null_renderer = _install_stubs(scene_file, report)
+        namespace = runpy.run_path(str(scene_file), run_name="preflight_scene")
+        scene_class = namespace.get(scene_name)
+        if scene_class is None:
+            report['errors'].append(f"Scene class '{scene_name}' is not defined")
+            return report
+
+        scene = scene_class(renderer=null_renderer())
+        scene.setup()
+        scene.construct()
+        scene.tear_down()
+
+        report['ok'] = True
+        report['estimated_duration'] = round(scene.renderer.time, 2)
+        if report['animation_count'] == 0:
+            report['warnings'].append("Scene plays no animations")
+    except BaseException as e:
+        frames = [frame for frame in traceback.extract_tb(e.__traceback__) if frame.filename == str(scene_file)]
+        report['errors'].append(f"{type(e).__name__}: {e}")
+        report['error_line'] = frames[-1].lineno if frames else None
+        report['traceback'] = ''.join(traceback.format_exception(type(e), e, e.__traceback__))[-4000:]
+    return report
+
+
+def _worker_main(argv: List[str]) -> int:
+    scene_file, scene_name = Path(argv[0]), argv[1]
+    # Anything the scene prints must not be mistaken for the report
+    with contextlib.redirect_stdout(sys.stderr):
+        report = _dry_run(scene_file, scene_name)
+    print(RESULT_MARKER + json.dumps(report), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_worker_main(sys.argv[1:]))
@@ -0,0 +1,156 @@
+"""
+Content-Addressed Render Cache
+Maps a normalized hash of generated scene code plus render settings to the
+finished MP4, so re-rendering identical Gemini output returns immediately
+"""
+
+import hashlib
+import io
+import logging
+import os
+import shutil
+import tokenize
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.render_config import render_config
+from utils.lru_index import LRUIndex
+
+logger = logging.getLogger(__name__)
+
+# Bump when the key recipe changes so stale entries stop matching
+RENDER_CACHE_KEY_VERSION = 2
+
+
+def normalize_scene_code(code: str) -> str:
+    """Normalize code so cosmetic differences hash identically
+
+    Comments, blank lines, indentation width and spacing between tokens do not
+    change what Manim renders, so the code is reduced to its token stream.
+    String tokens are kept verbatim: narration or Text bodies that differ only
+    in whitespace still render differently.
+    """
+    code = code.replace('\r\n', '\n').replace('\r', '\n')
+
+    parts = []
+    try:
+        for tok in tokenize.generate_tokens(io.StringIO(code).readline):
+            if tok.type in (tokenize.COMMENT, tokenize.NL, tokenize.ENDMARKER):
+                continue
+            if tok.type == tokenize.NEWLINE:
+                parts.append('\n')
+            elif tok.type == tokenize.INDENT:
+                parts.append('<indent>')
+            elif tok.type == tokenize.DEDENT:
+                parts.append('<dedent>')
+            else:
+                parts.append(tok.string)
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        # Unparseable code is hashed as written; stripping it line by line could merge string contents
+        return code
+    # NUL never occurs inside a token, so distinct token streams never join to the same text
+    return '\0'.join(parts)
+
+
+def render_cache_key(code: str, scene_name: str, quality: str, fps: int, resolution: str) -> str:
+    """Build the content address for a render"""
+    content = '\0'.join([
+        f"v{RENDER_CACHE_KEY_VERSION}",
+        normalize_scene_code(code),
+        scene_name,
+        quality,
+        str(fps),
+        resolution,
+    ])
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class RenderCache:
+    """Size-bounded LRU cache of rendered videos under media/videos"""
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.index = LRUIndex(self.cache_dir / "index.sqlite3", max_bytes)
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Return the cached video path for key, counting the hit or miss"""
+        entry = self.index.get(key)
+        if entry and os.path.exists(entry['path']):
+            self.index.incr('hits')
+            return entry['path']
+
+        if entry:
+            # File was removed behind our back; forget it
+            self.index.remove(key)
+        self.index.incr('misses')
+        return None
+
+    def store(self, key: str, video_path: str, work_dir: Optional[Path] = None) -> str:
+        """Move a fresh render into the cache and return its cached path
+
+        ``work_dir`` is the render's own media directory; once the video has
+        been moved out it only holds partial movie files and is removed so
+        media/videos stays within the cache budget.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        cached_file = self.cache_dir / f"{key}.mp4"
+
+        try:
+            os.replace(video_path, cached_file)
+        except OSError:
+            # Different filesystem: fall back to a copy
+            shutil.copy2(video_path, cached_file)
+
+        self.index.put(key, str(cached_file), cached_file.stat().st_size)
+
+        if work_dir is not None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        # The new video is being returned, so it is not a candidate even when over budget
+        self._evict(keep=key)
+        return str(cached_file)
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        for entry in self.index.evict(keep=keep):
+            try:
+                os.unlink(entry['path'])
+            except FileNotFoundError:
+                pass
+            logger.info(f"Evicted cached render {entry['key'][:12]} ({entry['size']:,} bytes)")
+
+    def clear(self) -> int:
+        """Remove every cached render and return how many were removed"""
+        entries = self.index.clear()
+        for entry in entries:
+            try:
+                os.unlink(entry['path'])
+            except FileNotFoundError:
+                pass
+        return len(entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current occupancy"""
+        counters = self.index.counters()
+        hits = counters.get('hits', 0)
+        misses = counters.get('misses', 0)
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'evictions': counters.get('evictions', 0),
+            'entries': self.index.count(),
+            'bytes': self.index.total_bytes(),
+            'max_bytes': self.index.max_bytes,
+        }
+
+
+def create_render_cache() -> Optional[RenderCache]:
+    """Build the render cache from render_config, or None when disabled"""
+    cfg = render_config.cache_config
+    if not cfg.enabled:
+        return None
+    return RenderCache(Path(cfg.cache_dir), cfg.max_bytes)
@@ -0,0 +1,390 @@
+"""
+Background Render Job Queue
+Bounded worker pool that runs Manim renders off the Streamlit script thread.
+Jobs get IDs so the UI can submit, poll status and fetch results across reruns.
+"""
+
+import os
+import queue
+import threading
+import time
+import uuid
+import logging
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, List, Optional, Any, Tuple
+
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.render_config import render_config
+from utils.manim_renderer import ManimRenderer, RenderResult, RenderSettings
+from utils.narration_prefetch import create_narration_prefetcher
+from utils.preflight import PreflightResult
+from utils.render_cache import create_render_cache
+from utils.segment_cache import create_segment_cache
+
+logger = logging.getLogger(__name__)
+
+class JobStatus(Enum):
+    """Lifecycle states of a render job"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    TIMED_OUT = "timed_out"
+    CANCELLED = "cancelled"
+
+FINISHED_STATUSES = {JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.TIMED_OUT, JobStatus.CANCELLED}
+
+@dataclass
+class RenderJob:
+    """A single queued render request"""
+    job_id: str
+    code: str
+    scene_name: str
+    timeout: int
+    settings: RenderSettings = field(default_factory=RenderSettings)
+    # Progressive rendering: after this (draft) job succeeds, the same code is
+    # re-queued in the background at final_settings as job follow_up_id
+    final_settings: Optional[RenderSettings] = None
+    follow_up_id: Optional[str] = None
+    follow_up_skipped: bool = False  # The final pass could not be queued (background queue full)
+    background: bool = False
+    name: Optional[str] = None     # Stable animation name; re-renders reuse unchanged segments
+    narration: Optional[str] = None  # Narration script, prefetched with the code's voiceover texts
+    preflight: Optional[PreflightResult] = None  # Dry run of code already made; plans segmented renders
+    status: JobStatus = JobStatus.QUEUED
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[RenderResult] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds spent running (or running so far)"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+class RenderJobQueue:
+    """Bounded render queue served by a fixed pool of worker threads"""
+
+    def __init__(
+        self,
+        renderer: Optional[ManimRenderer] = None,
+        max_workers: Optional[int] = None,
+        max_queue_depth: Optional[int] = None,
+        job_timeout: Optional[int] = None,
+        job_retention: Optional[int] = None
+    ):
+        cfg = render_config.queue_config
+        self.max_workers = max_workers or cfg.max_workers
+        self.max_queue_depth = max_queue_depth or cfg.max_queue_depth
+        self.job_timeout = job_timeout or cfg.job_timeout
+        self.job_retention = job_retention or cfg.job_retention
+        segment_cfg = render_config.segment_config
+        segments = 1
+        if segment_cfg.enabled and not render_config.preflight_config.enabled:
+            # Split points come from the dry run's voiceover timeline
+            logger.info("Pre-flight dry run disabled (MANIM_PREFLIGHT=0), rendering each scene in one process")
+        elif segment_cfg.enabled:
+            # Cores are shared among workers so concurrent jobs do not oversubscribe the box
+            segments = segment_cfg.max_segments or max(1, (os.cpu_count() or 1) // self.max_workers)
+        self.renderer = renderer or ManimRenderer(
+            timeout=self.job_timeout,
+            cache=create_render_cache(),
+            prefetcher=create_narration_prefetcher(),
+            segments=segments,
+            min_segment_seconds=segment_cfg.min_segment_seconds,
+            segment_cache=create_segment_cache()
+        )
+
+        self._pending: "queue.Queue[str]" = queue.Queue(maxsize=self.max_queue_depth)
+        # Final-quality passes; workers take them only when no interactive job waits
+        self._background: "queue.Queue[str]" = queue.Queue(maxsize=self.max_queue_depth)
+        self._jobs: Dict[str, RenderJob] = {}
+        self._lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+        self._shutdown = threading.Event()
+
+    def _ensure_workers(self) -> None:
+        """Start the worker pool on first use so importing stays cheap"""
+        with self._lock:
+            self._workers = [w for w in self._workers if w.is_alive()]
+            while len(self._workers) < self.max_workers:
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"render-worker-{len(self._workers)}",
+                    daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def submit(self, code: str, scene_name: str = "GeneratedAnimation",
+               timeout: Optional[int] = None,
+               settings: Optional[RenderSettings] = None,
+               final_settings: Optional[RenderSettings] = None,
+               name: Optional[str] = None,
+               narration: Optional[str] = None,
+               preflight: Optional[PreflightResult] = None) -> Optional[str]:
+        """Queue a render and return its job ID, or None if the queue is full
+
+        With final_settings (different from settings), the job is a fast draft:
+        once it succeeds, a background job at final_settings is queued and its
+        ID is stored on the draft as follow_up_id. Jobs with the same name render
+        the same animation and reuse each other's unchanged segments.
+        """
+        self._prune_finished()
+
+        settings = settings or RenderSettings()
+        job = RenderJob(
+            job_id=uuid.uuid4().hex[:12],
+            code=code,
+            scene_name=scene_name,
+            timeout=timeout or self.job_timeout,
+            settings=settings,
+            final_settings=final_settings if final_settings != settings else None,
+            name=name,
+            narration=narration,
+            preflight=preflight,
+        )
+        return self._enqueue(job)
+
+    def _enqueue(self, job: RenderJob) -> Optional[str]:
+        """Serve a job from the render cache or put it on its queue"""
+        # Identical scenes come straight back from the render cache
+        cached = self.renderer.cached_result(job.code, job.scene_name, job.settings)
+        if cached is not None:
+            job.status = JobStatus.SUCCEEDED
+            job.started_at = job.finished_at = time.time()
+            job.result = cached
+            with self._lock:
+                self._jobs[job.job_id] = job
+            logger.info(f"Render job {job.job_id} served from cache")
+            self._queue_follow_up(job)
+            return job.job_id
+
+        self._ensure_workers()
+        with self._lock:
+            if job.background and job.name:
+                self._cancel_superseded(job)
+            self._jobs[job.job_id] = job
+        try:
+            (self._background if job.background else self._pending).put_nowait(job.job_id)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.job_id]
+            logger.warning(f"Render queue full ({self.max_queue_depth} jobs waiting)")
+            return None
+
+        logger.info(f"Queued {'background ' if job.background else ''}render job {job.job_id}")
+        return job.job_id
+
+    def _cancel_superseded(self, job: RenderJob) -> None:
+        """Cancel queued final passes of the same animation; the new one replaces them"""
+        for other in self._jobs.values():
+            if other.background and other.name == job.name and other.status == JobStatus.QUEUED:
+                other.status = JobStatus.CANCELLED
+                other.finished_at = time.time()
+                self._drop_queued(other)
+                logger.info(f"Background render job {other.job_id} superseded by {job.job_id}")
+
+    def _drop_queued(self, job: RenderJob) -> None:
+        """Take a cancelled job's ID off its queue so it stops holding a slot"""
+        source = self._background if job.background else self._pending
+        with source.mutex:
+            try:
+                source.queue.remove(job.job_id)
+            except ValueError:
+                # A worker already took it and will skip it
+                return
+            source.unfinished_tasks -= 1
+            if source.unfinished_tasks == 0:
+                source.all_tasks_done.notify_all()
+            source.not_full.notify()
+
+    def _queue_follow_up(self, job: RenderJob) -> None:
+        """After a successful draft, queue the same scene at its final settings"""
+        with self._lock:
+            final_settings = job.final_settings
+        if final_settings is None:
+            return
+        follow_up = RenderJob(
+            job_id=uuid.uuid4().hex[:12],
+            code=job.code,
+            scene_name=job.scene_name,
+            timeout=job.timeout,
+            settings=final_settings,
+            background=True,
+            name=job.name,
+            narration=job.narration,
+            preflight=job.preflight,
+        )
+        follow_up_id = self._enqueue(follow_up)
+        with self._lock:
+            job.follow_up_id = follow_up_id
+            job.follow_up_skipped = follow_up_id is None
+            cancelled = job.final_settings is None
+        if follow_up_id is None:
+            logger.warning(f"Final pass of render job {job.job_id} skipped: background queue full")
+        if cancelled and follow_up_id:
+            # The draft was cancelled while its final pass was being queued
+            self.cancel(follow_up_id)
+
+    def get_job(self, job_id: str) -> Optional[RenderJob]:
+        """Look up a job by ID"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def get_result(self, job_id: str) -> Optional[RenderResult]:
+        """Return the render result once the job has finished"""
+        job = self.get_job(job_id)
+        if job and job.done:
+            return job.result
+        return None
+
+    def queue_position(self, job_id: str) -> int:
+        """Number of queued jobs submitted ahead of this one (0 when running or done)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job.status != JobStatus.QUEUED:
+                return 0
+            # Interactive jobs always go first; background jobs wait for all of them
+            return sum(
+                1 for other in self._jobs.values()
+                if other.status == JobStatus.QUEUED and other is not job and (
+                    (not other.background and (job.background or other.submitted_at < job.submitted_at))
+                    or (other.background and job.background and other.submitted_at < job.submitted_at))
+            )
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not started yet, together with its final pass
+
+        A draft's final pass is cancelled whether or not the draft itself has
+        started: a running draft still finishes but queues no final pass, and a
+        final pass already queued is cancelled. Returns True if anything was
+        cancelled.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return False
+            cancelled = False
+            if job.status == JobStatus.QUEUED:
+                job.status = JobStatus.CANCELLED
+                job.finished_at = time.time()
+                self._drop_queued(job)
+                cancelled = True
+            if job.final_settings is not None and not job.done:
+                job.final_settings = None
+                cancelled = True
+            follow_up_id = job.follow_up_id
+        if follow_up_id:
+            cancelled = self.cancel(follow_up_id) or cancelled
+        return cancelled
+
+    def _next_job_id(self) -> Optional[Tuple[str, "queue.Queue[str]"]]:
+        """Next job to run and the queue it came from; interactive jobs first"""
+        for source in (self._pending, self._background):
+            try:
+                return source.get_nowait(), source
+            except queue.Empty:
+                pass
+        try:
+            return self._pending.get(timeout=0.5), self._pending
+        except queue.Empty:
+            return None
+
+    def _worker_loop(self) -> None:
+        """Pull jobs off the queue and render them until shutdown"""
+        while not self._shutdown.is_set():
+            next_job = self._next_job_id()
+            if next_job is None:
+                continue
+            job_id, source = next_job
+
+            try:
+                job = self.get_job(job_id)
+                if job is None:
+                    continue
+
+                with self._lock:
+                    if job.status != JobStatus.QUEUED:
+                        continue
+                    job.status = JobStatus.RUNNING
+                    job.started_at = time.time()
+
+                self._run_job(job)
+            finally:
+                source.task_done()
+
+    def _run_job(self, job: RenderJob) -> None:
+        """Render one job and record its final status"""
+        logger.info(f"Rendering job {job.job_id}")
+        try:
+            # submit() already consulted the render cache
+            result = self.renderer.render(job.code, job.scene_name, timeout=job.timeout,
+                                          settings=job.settings, check_cache=False, name=job.name,
+                                          narration=job.narration, preflight=job.preflight)
+        except Exception as e:
+            logger.error(f"Render job {job.job_id} crashed: {e}")
+            result = RenderResult(success=False, error=str(e))
+
+        # Queue the final pass before the draft reads as done, so pollers see follow_up_id
+        if result.success:
+            self._queue_follow_up(job)
+
+        with self._lock:
+            job.result = result
+            job.finished_at = time.time()
+            if result.success:
+                job.status = JobStatus.SUCCEEDED
+            elif result.timed_out:
+                job.status = JobStatus.TIMED_OUT
+            else:
+                job.status = JobStatus.FAILED
+
+        logger.info(f"Render job {job.job_id} finished: {job.status.value} in {job.elapsed:.1f}s")
+
+    def _prune_finished(self) -> None:
+        """Forget finished jobs older than the retention window"""
+        cutoff = time.time() - self.job_retention
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.done and job.finished_at and job.finished_at < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of queue occupancy for status displays"""
+        with self._lock:
+            counts = {status.value: 0 for status in JobStatus}
+            for job in self._jobs.values():
+                counts[job.status.value] += 1
+            alive = sum(1 for w in self._workers if w.is_alive())
+
+        return {
+            'workers': alive,
+            'max_workers': self.max_workers,
+            'max_queue_depth': self.max_queue_depth,
+            'job_timeout': self.job_timeout,
+            **counts
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop workers after their current job"""
+        self._shutdown.set()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+# Global render queue instance (workers start on first submit)
+render_queue = RenderJobQueue()
@@ -0,0 +1,341 @@
+"""
+Bounded LLM Repair Loop for Failing Scenes
+Sends the failing code and its trimmed traceback back to the LLM with a short
+repair prompt, re-validates the fix and retries a bounded number of times
+"""
+
+import ast
+import logging
+import re
+import textwrap
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.render_config import render_config
+from utils.code_repair import repair_code
+from utils.llm_backends import LLMBackend
+from utils.preflight import PreflightResult, run_preflight
+from utils.response_parser import strip_code_fences
+
+logger = logging.getLogger(__name__)
+
+# Deliberately short: the long generation template is not resent
+REPAIR_PROMPT = """This Manim Community Edition scene (using manim-voiceover) failed.
+
+ERROR:
+{error}
+
+CODE:
+```python
+{code}
+```
+
+Fix the error and return ONLY the complete corrected code in a single ```python block.
+Change as little as possible. Keep the class name "{scene_name}", the voiceover blocks
+and the PRIMARY_COLOR, SECONDARY_COLOR, ACCENT_COLOR and TEXT_COLOR variables.
+Do not use MathTex, Tex, FRAME_WIDTH or FRAME_HEIGHT."""
+
+# When the error points into one method, only that method is asked back
+METHOD_REPAIR_PROMPT = """This Manim Community Edition scene (using manim-voiceover) failed.
+The error is in the method `{function}`.
+
+ERROR:
+{error}
+
+CODE:
+```python
+{code}
+```
+
+Fix the error and return ONLY the corrected `{function}` method, starting with
+`def {function}(`, in a single ```python block. Change as little as possible.
+Do not use MathTex, Tex, FRAME_WIDTH or FRAME_HEIGHT."""
+
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;]*[A-Za-z]')
+
+# Frame locations in plain ("File "x.py", line 5") and rich ("x.py:5 in") tracebacks
+FRAME_PATTERNS = [
+    re.compile(r'File "([^"]+)", line (\d+)'),
+    re.compile(r'([^\s│]+\.py):(\d+) in '),
+]
+LIBRARY_PATH = re.compile(r'site-packages|dist-packages|[\\/]lib[\\/]python')
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token) for backends that report none"""
+    return max(1, len(text) // 4)
+
+
+def trim_traceback(error_text: str, max_lines: int = 25) -> str:
+    """The part of manim's stderr that explains the failure: the last traceback, tail first"""
+    lines = [ANSI_ESCAPE.sub('', line).rstrip() for line in error_text.splitlines()]
+    # Progress bars and blank lines carry no information for the fix
+    lines = [line for line in lines if line.strip() and '%|' not in line]
+    starts = [i for i, line in enumerate(lines) if 'Traceback (most recent call last)' in line]
+    if starts:
+        lines = lines[starts[-1]:]
+    if len(lines) > max_lines:
+        lines = lines[:1] + ['...'] + lines[-(max_lines - 2):]
+    return '\n'.join(lines)
+
+
+def error_line(error_text: str) -> Optional[int]:
+    """Line in the scene code an error points at: its innermost non-library frame"""
+    frames = []
+    for line in error_text.splitlines():
+        for pattern in FRAME_PATTERNS:
+            frames += [(path, int(number)) for path, number in pattern.findall(line)
+                       if not LIBRARY_PATH.search(path)]
+    if frames:
+        return frames[-1][1]
+    # Pre-flight and syntax errors carry "(line N)" instead of a traceback
+    match = re.search(r'\(line (\d+)\)', error_text)
+    return int(match.group(1)) if match else None
+
+
+def _enclosing_function(tree: ast.Module, line: int) -> Optional[ast.FunctionDef]:
+    """The method (or top-level function) whose source contains line"""
+    for parent in [tree] + [node for node in tree.body if isinstance(node, ast.ClassDef)]:
+        for node in parent.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+                if start <= line <= node.end_lineno:
+                    return node
+    return None
+
+
+def _splice_function(code: str, target: ast.FunctionDef, replacement: str) -> Optional[str]:
+    """Replace target's source in code with the same-named function from replacement"""
+    try:
+        tree = ast.parse(textwrap.dedent(replacement))
+    except SyntaxError:
+        return None
+    new_function = next((node for node in ast.walk(tree)
+                         if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == target.name), None)
+    if new_function is None:
+        return None
+
+    new_lines = textwrap.dedent(replacement).split('\n')
+    new_start = min([new_function.lineno] + [d.lineno for d in new_function.decorator_list])
+    body = textwrap.dedent('\n'.join(new_lines[new_start - 1:new_function.end_lineno])).split('\n')
+
+    lines = code.split('\n')
+    start = min([target.lineno] + [d.lineno for d in target.decorator_list])
+    indent = ' ' * target.col_offset
+    return '\n'.join(lines[:start - 1] + [indent + line if line else '' for line in body] + lines[target.end_lineno:])
+
+
+def scene_problems(code: str, scene_name: str = "GeneratedAnimation") -> Optional[str]:
+    """Missing pieces every generated scene needs, as an error message"""
+    missing = [label for needle, label in [
+        (f'class {scene_name}', f"class {scene_name}"),
+        ('self.set_speech_service', "TTS setup (self.set_speech_service)"),
+        ('self.voiceover(', "voiceover blocks (with self.voiceover(...))"),
+    ] if needle not in code]
+    return f"Missing required {', '.join(missing)}" if missing else None
+
+
+def preflight_error(result: PreflightResult) -> Optional[str]:
+    """A failed dry run as an error message for the repair prompt"""
+    if result.ok:
+        return None
+    location = f" (line {result.error_line})" if result.error_line else ""
+    message = f"{result.errors[0] if result.errors else 'Dry run failed'}{location}"
+    return f"{message}\n{result.traceback}" if result.traceback else message
+
+
+def validate_with_preflight(code: str, scene_name: str = "GeneratedAnimation") -> Optional[str]:
+    """Static checks, then the sandboxed dry run; returns the first error or None"""
+    return scene_problems(code, scene_name) or preflight_error(run_preflight(code, scene_name))
+
+
+@dataclass
+class RepairAttempt:
+    """One repair call to the LLM and whether its code passed validation"""
+    attempt: int
+    scope: str                         # "method" or "file": what the LLM was asked to return
+    prompt_tokens: int
+    response_tokens: int
+    latency: float
+    success: bool
+    error: Optional[str] = None        # What still failed after this attempt
+
+    @property
+    def tokens(self) -> int:
+        return self.prompt_tokens + self.response_tokens
+
+@dataclass
+class RepairOutcome:
+    """Result of a repair loop: the last code tried and every attempt made"""
+    success: bool
+    code: str
+    attempts: List[RepairAttempt] = field(default_factory=list)
+
+    @property
+    def tokens(self) -> int:
+        return sum(attempt.tokens for attempt in self.attempts)
+
+    @property
+    def latency(self) -> float:
+        return sum(attempt.latency for attempt in self.attempts)
+
+
+class RepairStats:
+    """Thread-safe running totals per attempt number (1st try, 2nd try, ...)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._attempts: Dict[int, Dict[str, float]] = {}
+        self._loops = 0
+        self._repaired = 0
+
+    def record(self, outcome: RepairOutcome) -> None:
+        with self._lock:
+            self._loops += 1
+            self._repaired += int(outcome.success)
+            for attempt in outcome.attempts:
+                totals = self._attempts.setdefault(
+                    attempt.attempt, {'tries': 0, 'successes': 0, 'tokens': 0, 'latency': 0.0})
+                totals['tries'] += 1
+                totals['successes'] += int(attempt.success)
+                totals['tokens'] += attempt.tokens
+                totals['latency'] += attempt.latency
+
+    def summary(self) -> Dict[str, Any]:
+        """Success rate, mean tokens and mean latency per attempt number"""
+        with self._lock:
+            per_attempt = {
+                number: {
+                    'tries': int(totals['tries']),
+                    'success_rate': totals['successes'] / totals['tries'],
+                    'mean_tokens': totals['tokens'] / totals['tries'],
+                    'mean_latency': totals['latency'] / totals['tries'],
+                }
+                for number, totals in sorted(self._attempts.items())
+            }
+            return {
+                'loops': self._loops,
+                'repaired': self._repaired,
+                'success_rate': self._repaired / self._loops if self._loops else 0.0,
+                'attempts': per_attempt,
+            }
+
+
+class RepairLoop:
+    """Asks the LLM to fix failing scene code until it validates or attempts run out"""
+
+    def __init__(self, backend: LLMBackend, validate: Callable[[str], Optional[str]],
+                 max_attempts: int = 3, max_traceback_lines: int = 25,
+                 scene_name: str = "GeneratedAnimation", stats: Optional[RepairStats] = None):
+        self.backend = backend
+        self.validate = validate
+        self.max_attempts = max_attempts
+        self.max_traceback_lines = max_traceback_lines
+        self.scene_name = scene_name
+        self.stats = stats
+
+    def build_prompt(self, code: str, error: str, function: Optional[str] = None) -> str:
+        error = trim_traceback(error, self.max_traceback_lines)
+        if function:
+            return METHOD_REPAIR_PROMPT.format(error=error, code=code, function=function)
+        return REPAIR_PROMPT.format(error=error, code=code, scene_name=self.scene_name)
+
+    def _failing_function(self, code: str, error: str) -> Optional[ast.FunctionDef]:
+        line = error_line(error)
+        if line is None:
+            return None
+        try:
+            return _enclosing_function(ast.parse(code), line)
+        except SyntaxError:
+            return None
+
+    def _apply(self, code: str, target: Optional[ast.FunctionDef], response: str) -> Optional[str]:
+        """The full scene code a response stands for, or None for a method that cannot be placed"""
+        answer = strip_code_fences(response)
+        if target is not None and f'class {self.scene_name}' not in answer:
+            return _splice_function(code, target, answer)
+        return answer
+
+    def run(self, code: str, error: str,
+            on_attempt: Optional[Callable[[RepairAttempt], None]] = None) -> RepairOutcome:
+        """Repair code that failed with error; never raises"""
+        outcome = RepairOutcome(success=False, code=code)
+
+        for number in range(1, self.max_attempts + 1):
+            # Ask for just the failing method when the error points into one
+            target = self._failing_function(outcome.code, error)
+            prompt = self.build_prompt(outcome.code, error, target.name if target else None)
+            start = time.perf_counter()
+            try:
+                response = self.backend.generate(prompt)
+            except Exception as e:
+                logger.warning(f"Repair attempt {number} could not reach the LLM: {e}")
+                attempt = RepairAttempt(number, 'method' if target else 'file', estimate_tokens(prompt), 0,
+                                        time.perf_counter() - start, success=False, error=f"LLM call failed: {e}")
+                outcome.attempts.append(attempt)
+                if on_attempt:
+                    on_attempt(attempt)
+                break
+            latency = time.perf_counter() - start
+
+            usage = self.backend.last_usage or {}
+            applied = self._apply(outcome.code, target, response)
+            if applied is None:
+                # A lone fragment would replace the whole scene; keep the code we had
+                new_error = f"The answer did not contain a `{target.name}` method that could replace the failing one"
+            else:
+                repaired = repair_code(applied)
+                if repaired.valid:
+                    new_error = self.validate(repaired.code)
+                    outcome.code = repaired.code
+                    # Only an accepted answer's error describes the code the next prompt shows
+                    error = new_error
+                else:
+                    new_error = '; '.join(str(d) for d in repaired.diagnostics if not d.fixed)
+
+            attempt = RepairAttempt(
+                attempt=number,
+                scope='method' if target else 'file',
+                prompt_tokens=usage.get('prompt_tokens') or estimate_tokens(prompt),
+                response_tokens=usage.get('response_tokens') or estimate_tokens(response),
+                latency=latency,
+                success=new_error is None,
+                error=new_error,
+            )
+            outcome.attempts.append(attempt)
+            if on_attempt:
+                on_attempt(attempt)
+            logger.info(f"Repair attempt {number}: {'fixed' if attempt.success else new_error} "
+                        f"({attempt.tokens} tokens, {latency:.1f}s)")
+
+            if attempt.success:
+                outcome.success = True
+                break
+
+        if self.stats is not None:
+            self.stats.record(outcome)
+        return outcome
+
+
+def create_repair_loop(backend: LLMBackend, scene_name: str = "GeneratedAnimation",
+                       validate: Optional[Callable[[str], Optional[str]]] = None) -> RepairLoop:
+    """Build a repair loop from render_config, validating with the pre-flight dry run"""
+    cfg = render_config.repair_config
+    return RepairLoop(
+        backend,
+        validate or (lambda code: validate_with_preflight(code, scene_name)),
+        max_attempts=cfg.max_attempts,
+        max_traceback_lines=cfg.max_traceback_lines,
+        scene_name=scene_name,
+        stats=repair_stats,
+    )
+
+
+# Global statistics instance
+repair_stats = RepairStats()
@@ -0,0 +1,257 @@
+"""
+Rate Limiting, Circuit Breaking and Latency Tracking for TTS Services
+Lets the fallback chain skip a throttled or failing service immediately
+instead of paying a full failed attempt on every sentence
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.tts_config import tts_config
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Adaptive token bucket: halves its rate on failure, recovers additively on success"""
+
+    def __init__(self, rate: float, burst: int = 4, clock: Callable[[], float] = time.monotonic):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._cond = threading.Condition()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.max_rate <= 0
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout: float = 0.0) -> bool:
+        """Take one token, waiting up to timeout seconds for it"""
+        if self.unlimited:
+            return True
+        deadline = self._clock() + timeout
+        with self._cond:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+                remaining = deadline - self._clock()
+                if wait > remaining:
+                    return False
+                self._cond.wait(wait)
+
+    def on_success(self) -> None:
+        """Additive increase back towards the configured rate"""
+        if self.unlimited:
+            return
+        with self._cond:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+    def on_failure(self) -> None:
+        """Multiplicative decrease, down to an eighth of the configured rate"""
+        if self.unlimited:
+            return
+        with self._cond:
+            self._refill()
+            self.rate = max(self.max_rate / 8, self.rate / 2)
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half-open probe after a cool-down"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 half_open_max_calls: int = 1, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state, reporting an expired open breaker as half-open"""
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Whether a call may go through now; in half-open only a few probes may"""
+        with self._lock:
+            if self._state == self.OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probes = 0
+            if self._state == self.HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    return False
+                self._probes += 1
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            if self._state != self.CLOSED:
+                logger.info("Circuit closed after successful probe")
+            self._state = self.CLOSED
+
+    def release(self) -> None:
+        """Give back an admitted half-open probe whose call ended without an outcome"""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.times_opened += 1
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            retry_in = max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                'times_opened': self.times_opened,
+                'retry_in': retry_in if state == self.OPEN else 0.0,
+            }
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies with percentile queries"""
+
+    def __init__(self, window: int = 100):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Nearest-rank percentile in seconds, or None before any sample"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        rank = min(len(samples), max(1, math.ceil(p / 100 * len(samples)))) - 1
+        return samples[rank]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class ServiceGuard:
+    """Rate limiter, circuit breaker and latency tracker for one TTS service"""
+
+    def __init__(self, name: str, rate: float = 0.0, burst: int = 4, rate_wait: float = 2.0,
+                 failure_threshold: int = 3, reset_timeout: float = 30.0, latency_window: int = 100,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.rate_wait = rate_wait
+        self.bucket = TokenBucket(rate, burst, clock=clock)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout, clock=clock)
+        self.latency = LatencyTracker(latency_window)
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """False while the breaker is open and not yet due for a probe"""
+        return self.breaker.state != CircuitBreaker.OPEN
+
+    def acquire(self) -> bool:
+        """Admit one call, or reject it so the caller falls back at once"""
+        if not self.breaker.allow_request():
+            reason = 'circuit open'
+        elif not self.bucket.acquire(self.rate_wait):
+            # The admitted probe never ran, so it says nothing about the service
+            self.breaker.release()
+            reason = 'rate limited'
+        else:
+            return True
+        with self._lock:
+            self.rejected += 1
+        logger.info(f"Skipping {self.name}: {reason}")
+        return False
+
+    def release(self) -> None:
+        """Free an admitted call that was never recorded, so a probe slot is not lost"""
+        self.breaker.release()
+
+    def record(self, success: bool, elapsed: float) -> None:
+        """Feed the outcome of an admitted call back into all three"""
+        with self._lock:
+            self.calls += 1
+            if not success:
+                self.failures += 1
+        if success:
+            self.latency.record(elapsed)
+            self.breaker.record_success()
+            self.bucket.on_success()
+        else:
+            self.breaker.record_failure()
+            self.bucket.on_failure()
+
+    def stats(self) -> Dict[str, Any]:
+        """Breaker state, latency percentiles, rate and call counts"""
+        return {
+            'breaker': self.breaker.stats(),
+            'latency_p50': self.latency.percentile(50),
+            'latency_p95': self.latency.percentile(95),
+            'latency_samples': len(self.latency),
+            'rate_limit': None if self.bucket.unlimited else round(self.bucket.rate, 3),
+            'calls': self.calls,
+            'failures': self.failures,
+            'rejected': self.rejected,
+        }
+
+
+def create_service_guard(name: str) -> ServiceGuard:
+    """Build a service guard from tts_config"""
+    cfg = tts_config.resilience_config
+    return ServiceGuard(
+        name,
+        rate=cfg.rate_limits.get(name, 0.0),
+        burst=cfg.burst,
+        rate_wait=cfg.rate_wait,
+        failure_threshold=cfg.failure_threshold,
+        reset_timeout=cfg.reset_timeout,
+        latency_window=cfg.latency_window,
+    )
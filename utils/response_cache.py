@@ -0,0 +1,142 @@
+"""
+Persistent Cache of Gemini Responses
+Maps prompt template, model name and normalized problem statement to the
+generated response, so repeated topics skip the LLM round trip
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.render_config import render_config
+from utils.lru_index import LRUIndex
+
+logger = logging.getLogger(__name__)
+
+# Bump when the key recipe changes so stale entries stop matching
+RESPONSE_CACHE_KEY_VERSION = 1
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_problem_statement(statement: str) -> str:
+    """Normalize a problem statement so near-identical phrasings share a key
+
+    Unicode compatibility forms, letter case, runs of whitespace and
+    trailing punctuation do not change what is being asked.
+    """
+    statement = unicodedata.normalize('NFKC', statement).casefold()
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    return statement.rstrip(' .!?;:')
+
+
+def response_cache_key(prompt_template: str, model_name: str, problem_statement: str) -> str:
+    """Build the cache key; any edit to the template text acts as a new template version"""
+    template_version = hashlib.sha256(prompt_template.encode('utf-8')).hexdigest()
+    content = '\0'.join([
+        f"v{RESPONSE_CACHE_KEY_VERSION}",
+        template_version,
+        model_name,
+        normalize_problem_statement(problem_statement),
+    ])
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of LLM responses with a time-to-live"""
+
+    def __init__(self, cache_dir: Path, max_bytes: int, ttl: int):
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.index = LRUIndex(self.cache_dir / "index.sqlite3", max_bytes)
+
+    def _forget(self, key: str) -> None:
+        entry = self.index.remove(key)
+        if entry:
+            try:
+                os.unlink(entry['path'])
+            except FileNotFoundError:
+                pass
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Return the cached response text for key, counting the hit or miss"""
+        entry = self.index.get(key)
+        if entry and time.time() - entry['created'] > self.ttl:
+            self._forget(key)
+            self.index.incr('expired')
+            entry = None
+
+        if entry:
+            try:
+                with open(entry['path'], 'r', encoding='utf-8') as f:
+                    text = json.load(f)['text']
+                self.index.incr('hits')
+                return text
+            except (OSError, ValueError, KeyError):
+                # File was removed or damaged behind our back; forget it
+                self._forget(key)
+        self.index.incr('misses')
+        return None
+
+    def store(self, key: str, text: str, meta: Optional[Dict[str, Any]] = None) -> None:
+        """Save a response, then evict down to the byte budget"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        cached_file = self.cache_dir / f"{key}.json"
+        temp_file = cached_file.with_suffix('.json.tmp')
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({'text': text, **(meta or {})}, f, ensure_ascii=False)
+        os.replace(temp_file, cached_file)
+
+        self.index.put(key, str(cached_file), cached_file.stat().st_size, meta)
+        for entry in self.index.evict():
+            try:
+                os.unlink(entry['path'])
+            except FileNotFoundError:
+                pass
+
+    def clear(self) -> int:
+        """Remove every cached response and return how many were removed"""
+        entries = self.index.clear()
+        for entry in entries:
+            try:
+                os.unlink(entry['path'])
+            except FileNotFoundError:
+                pass
+        return len(entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current occupancy"""
+        counters = self.index.counters()
+        hits = counters.get('hits', 0)
+        misses = counters.get('misses', 0)
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'expired': counters.get('expired', 0),
+            'evictions': counters.get('evictions', 0),
+            'entries': self.index.count(),
+            'bytes': self.index.total_bytes(),
+            'max_bytes': self.index.max_bytes,
+        }
+
+
+def create_response_cache() -> Optional[ResponseCache]:
+    """Build the response cache from render_config, or None when disabled"""
+    cfg = render_config.response_cache_config
+    if not cfg.enabled:
+        return None
+    return ResponseCache(Path(cfg.cache_dir), cfg.max_bytes, cfg.ttl)
+
+# Global response cache instance
+response_cache = create_response_cache()
@@ -0,0 +1,116 @@
+"""
+Incremental Parser for Sectioned Gemini Responses
+Splits `=== ... ===` sections out of a streamed response as they close, so
+the UI can show each one (and validate the code) before the rest arrives
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.code_repair import RepairResult, repair_code
+
+logger = logging.getLogger(__name__)
+
+# Section headers the prompt asks for, in the order they are generated
+SECTION_HEADERS = [
+    ('=== LEARNING OBJECTIVES ===', 'objectives'),
+    ('=== VISUAL DESIGN PLAN ===', 'design_plan'),
+    ('=== DETAILED STORYBOARD ===', 'storyboard'),
+    ('=== HINGLISH NARRATION SCRIPT ===', 'narration'),
+    ('=== PRODUCTION-READY CODE ===', 'code'),
+]
+
+
+def strip_code_fences(code: str) -> str:
+    """Return the contents of the first markdown code block, or the text unchanged"""
+    if '```python' in code:
+        return code.split('```python')[1].split('```')[0]
+    if '```' in code:
+        return code.split('```')[1].split('```')[0]
+    return code
+
+
+def clean_generated_code(code: str) -> str:
+    """Strip markdown fences and repair common issues in generated scene code"""
+    return repair_code(strip_code_fences(code)).code
+
+
+class IncrementalSectionParser:
+    """Feed response chunks in; get back each section as soon as it closes
+
+    A section closes when the next header arrives or the response ends; the
+    code section also closes as soon as its fenced block does.
+    """
+
+    def __init__(self):
+        self.sections: Dict[str, str] = {name: '' for _, name in SECTION_HEADERS}
+        self._buffer = ''
+        self._current: Optional[str] = None
+        self._code_fences = 0
+        self._code_done = False
+        # Outcome of repairing the code section, once it has closed
+        self.repair: Optional[RepairResult] = None
+
+    def _close_current(self) -> List[Tuple[str, str]]:
+        name, self._current = self._current, None
+        if name is None or (name == 'code' and self._code_done):
+            return []
+        if name == 'code':
+            self._code_done = True
+            if self.sections['code']:
+                self.repair = repair_code(strip_code_fences(self.sections['code']))
+                self.sections['code'] = self.repair.code
+        return [(name, self.sections[name])]
+
+    def _process_line(self, raw_line: str) -> List[Tuple[str, str]]:
+        line = raw_line.strip()
+
+        for header, name in SECTION_HEADERS:
+            if header in line:
+                closed = self._close_current()
+                self._current = name
+                return closed
+
+        if self._current is None:
+            return []
+        if self._current == 'code':
+            if self._code_done:
+                return []
+            # Code keeps its indentation; the repair pipeline only touches it if it fails to parse
+            self.sections['code'] += raw_line.rstrip() + '\n'
+            self._code_fences += line.count('```')
+            if self._code_fences >= 2:
+                # Fenced block finished; later lines never reach the code
+                return self._close_current()
+            return []
+
+        if line:
+            self.sections[self._current] += line + '\n'
+        return []
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """Consume a chunk and return the (name, text) of sections it closed"""
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split('\n')
+        closed = []
+        for line in lines:
+            closed.extend(self._process_line(line))
+        return closed
+
+    def close(self) -> List[Tuple[str, str]]:
+        """Flush the end of the response and return the sections it closed"""
+        closed = self._process_line(self._buffer) if self._buffer else []
+        self._buffer = ''
+        return closed + self._close_current()
+
+
+def parse_gemini_response(content: str) -> Dict[str, str]:
+    """Parse a complete response into its sections"""
+    parser = IncrementalSectionParser()
+    parser.feed(content)
+    parser.close()
+    return parser.sections
@@ -0,0 +1,98 @@
+"""
+Partial Movie Segment Index
+Keeps manim's per-animation partial movie files for stably named animations
+across runs, so a re-render after an edit re-encodes only the animations whose
+hash changed, and evicts the least recently used segments past a byte budget
+"""
+
+import logging
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.render_config import render_config
+from utils.lru_index import LRUIndex
+
+logger = logging.getLogger(__name__)
+
+# manim logs this for every animation it takes from partial_movie_files
+CACHED_PATTERN = re.compile(r"Using cached data \(hash\s*:\s*(\w+)\)")
+
+
+@dataclass
+class SegmentReuse:
+    """How one render used the partial movie files of its animation"""
+    reused: int = 0      # Animations taken unchanged from an earlier run
+    encoded: int = 0     # Animations rendered and encoded this run
+
+
+class SegmentCache:
+    """LRU index over partial movie files, keyed by their manim hash and directory"""
+
+    def __init__(self, index_path: Path, max_bytes: int):
+        self.index = LRUIndex(Path(index_path), max_bytes)
+
+    @staticmethod
+    def snapshot(partial_dir: Path) -> Set[str]:
+        """Hashes of the segments already in a partial movie directory"""
+        if not partial_dir.exists():
+            return set()
+        return {path.stem for path in partial_dir.glob("*.mp4")}
+
+    def record(self, partial_dir: Path, before: Set[str], output: str) -> SegmentReuse:
+        """Index the segments a render produced or reused and evict past the budget
+
+        ``before`` is the snapshot taken before manim started and ``output`` its
+        log, which names every segment taken from the cache.
+        """
+        after = self.snapshot(partial_dir)
+        reused = set(CACHED_PATTERN.findall(output)) & after
+        encoded = after - before
+
+        for segment in after:
+            path = partial_dir / f"{segment}.mp4"
+            key = str(path)
+            if segment in encoded or self.index.get(key, touch=segment in reused) is None:
+                try:
+                    self.index.put(key, str(path), path.stat().st_size)
+                except FileNotFoundError:
+                    continue
+
+        self.index.incr('reused', len(reused))
+        self.index.incr('encoded', len(encoded))
+        self._evict()
+        if reused or encoded:
+            logger.info(f"Partial movie segments: {len(reused)} reused, {len(encoded)} encoded ({partial_dir})")
+        return SegmentReuse(reused=len(reused), encoded=len(encoded))
+
+    def _evict(self) -> None:
+        for entry in self.index.evict():
+            try:
+                os.unlink(entry['path'])
+            except FileNotFoundError:
+                pass    # manim prunes its own cache past max_files_cached
+
+    def stats(self) -> Dict[str, Any]:
+        """Reuse counters and disk use for status displays"""
+        counters = self.index.counters()
+        reused, encoded = counters.get('reused', 0), counters.get('encoded', 0)
+        return {
+            'reused': reused,
+            'encoded': encoded,
+            'reuse_rate': reused / (reused + encoded) if reused + encoded else 0.0,
+            'segments': self.index.count(),
+            'bytes': self.index.total_bytes(),
+        }
+
+
+def create_segment_cache() -> Optional[SegmentCache]:
+    """Build the segment index from render_config, or None when disabled"""
+    cfg = render_config.segment_cache_config
+    if not cfg.enabled:
+        return None
+    return SegmentCache(Path(cfg.index_path), cfg.max_bytes)
@@ -0,0 +1,222 @@
+"""
+Segment-Parallel Rendering Helpers
+Splits a generated scene at its top-level voiceover blocks so contiguous runs of
+blocks can render in separate manim processes, then joins the parts with
+ffmpeg's concat demuxer without re-encoding
+"""
+
+import contextlib
+import logging
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Appended to a copy of the scene; line numbers in tracebacks stay those of the original
+SEGMENT_FOOTER = '''
+
+# Segment render: only voiceover chunks {first}-{last} are drawn, the rest is replayed without output
+from utils.segment_render import render_chunks as _render_chunks
+{scene_name} = _render_chunks({scene_name}, {first}, {last})
+'''
+
+
+def current_section(scene_file: str) -> str:
+    """Name of the scene method construct() is currently inside, e.g. intro_scene"""
+    names = []
+    frame = sys._getframe(1)
+    while frame is not None:
+        if frame.f_code.co_filename == scene_file:
+            names.append(frame.f_code.co_name)
+        frame = frame.f_back
+    if 'construct' not in names:
+        return names[-1] if names else ''
+    index = names.index('construct')
+    return names[index - 1] if index > 0 else 'construct'
+
+
+def render_chunks(scene_class, first: int, last: int):
+    """Subclass scene_class so that only voiceover chunks first..last are rendered
+
+    Chunk k starts when the k-th top-level voiceover block opens and lasts until
+    the next one opens; animations before the first voiceover are chunk 0.
+    Chunks outside the range still run, so every mobject reaches the state it has
+    at the boundary, but manim skips them as it does animations before ``-n``:
+    no frames, no sound, and the renderer clock stands still, so the part's
+    audio starts at zero together with its video.
+    """
+    class SegmentScene(scene_class):
+        _chunk = 0
+        _voiceover_depth = 0
+
+        def _apply_skipping(self):
+            skip = not first <= self._chunk <= last
+            # CairoRenderer.play() resets skip_animations from this before every animation
+            self.renderer._original_skipping_status = skip
+            self.renderer.skip_animations = skip
+
+        def play(self, *args, **kwargs):
+            self._apply_skipping()
+            return super().play(*args, **kwargs)
+
+        @contextlib.contextmanager
+        def voiceover(self, *args, **kwargs):
+            if self._voiceover_depth == 0:
+                self._chunk += 1
+                self._apply_skipping()    # Before the block adds its sound
+            self._voiceover_depth += 1
+            try:
+                with super().voiceover(*args, **kwargs) as tracker:
+                    yield tracker
+            finally:
+                self._voiceover_depth -= 1
+
+    # manim picks scenes by class name and defining module
+    SegmentScene.__name__ = SegmentScene.__qualname__ = scene_class.__name__
+    SegmentScene.__module__ = scene_class.__module__
+    return SegmentScene
+
+
+def segment_scene_code(code: str, scene_name: str, first: int, last: int) -> str:
+    """Scene code that renders only voiceover chunks first..last"""
+    return code.rstrip('\n') + SEGMENT_FOOTER.format(scene_name=scene_name, first=first, last=last)
+
+
+def plan_segments(chunks: Sequence[Dict[str, Any]], total_duration: float, max_segments: int,
+                  min_seconds: float = 5.0) -> List[Tuple[int, int]]:
+    """Group voiceover chunks into at most max_segments contiguous (first, last) ranges
+
+    ``chunks`` are the top-level voiceover blocks from the dry run, each with the
+    scene method it runs in and its start time. Sections (intro_scene,
+    main_content, ...) stay whole where possible; parts shorter than min_seconds
+    are merged into a neighbour, and while processes are spare the longest
+    section is split at its most even voiceover boundary.
+    """
+    count = len(chunks)
+    if count == 0 or max_segments < 2:
+        return [(0, count)]
+
+    starts = [chunk['start'] for chunk in chunks] + [max(total_duration, chunks[-1]['start'])]
+    durations = [starts[i + 1] - starts[i] for i in range(count)]
+    durations[0] += starts[0]     # Animations before the first voiceover go with it
+
+    groups: List[List[int]] = []  # [first index, last index] into chunks
+    for index, chunk in enumerate(chunks):
+        if groups and chunks[index - 1]['section'] == chunk['section']:
+            groups[-1][1] = index
+        else:
+            groups.append([index, index])
+
+    def length(group: List[int]) -> float:
+        return sum(durations[group[0]:group[1] + 1])
+
+    while len(groups) > 1:
+        shortest = min(range(len(groups)), key=lambda i: length(groups[i]))
+        if len(groups) <= max_segments and length(groups[shortest]) >= min_seconds:
+            break
+        neighbours = [i for i in (shortest - 1, shortest + 1) if 0 <= i < len(groups)]
+        neighbour = min(neighbours, key=lambda i: length(groups[i]))
+        low, high = sorted((shortest, neighbour))
+        groups[low:high + 1] = [[groups[low][0], groups[high][1]]]
+
+    while len(groups) < max_segments:
+        splittable = [group for group in groups if group[1] > group[0]]
+        if not splittable:
+            break
+        group = max(splittable, key=length)
+        half = length(group) / 2
+        split = min(range(group[0] + 1, group[1] + 1),
+                    key=lambda i: abs(sum(durations[group[0]:i]) - half))
+        left, right = [group[0], split - 1], [split, group[1]]
+        if min(length(left), length(right)) < min_seconds:
+            break
+        position = groups.index(group)
+        groups[position:position + 1] = [left, right]
+
+    # Chunk numbers are 1-based; the first part also takes chunk 0
+    return [(0 if i == 0 else group[0] + 1, group[1] + 1) for i, group in enumerate(groups)]
+
+
+def run_parts(commands: Sequence[List[str]], timeout: float,
+              **popen_kwargs) -> Tuple[List[subprocess.CompletedProcess], Optional[subprocess.CompletedProcess]]:
+    """Run part renders side by side; returns every part and the first one that failed
+
+    One failed part fails the whole render, so the other parts are killed as
+    soon as one exits non-zero, and when one outlives the shared timeout
+    (TimeoutExpired is raised once every part is down). Killed parts report a
+    negative return code.
+    """
+    processes = []
+    try:
+        for cmd in commands:
+            processes.append(subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                              text=True, **popen_kwargs))
+    except BaseException:
+        for process in processes:
+            process.kill()
+            process.wait()
+        raise
+
+    deadline = time.monotonic() + timeout
+
+    def wait(process: subprocess.Popen) -> subprocess.CompletedProcess:
+        stdout, stderr = process.communicate(timeout=max(0.0, deadline - time.monotonic()))
+        return subprocess.CompletedProcess(process.args, process.returncode, stdout, stderr)
+
+    failed = None
+    with ThreadPoolExecutor(max_workers=len(processes)) as pool:
+        futures = [pool.submit(wait, process) for process in processes]
+        try:
+            for future in as_completed(futures):
+                if future.exception() is not None:
+                    break
+                if future.result().returncode != 0:
+                    failed = future.result()
+                    break
+        finally:
+            for process in processes:
+                if process.poll() is None:
+                    process.kill()
+
+    timed_out = next((future.exception() for future in futures
+                      if isinstance(future.exception(), subprocess.TimeoutExpired)), None)
+    if timed_out is not None:
+        for process, future in zip(processes, futures):
+            if future.exception() is not None:
+                process.communicate()    # Reap the killed part and close its pipes
+        raise timed_out
+    return [future.result() for future in futures], failed
+
+
+def concat_videos(videos: Sequence[Path], output: Path, timeout: int = 120) -> Optional[str]:
+    """Join rendered parts into output with stream copy; returns an error message or None
+
+    The parts come from the same manim settings and each carries narration, so
+    their streams match and the concat demuxer can copy them unchanged.
+    """
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        return "ffmpeg not found"
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    list_file = output.with_suffix('.concat.txt')
+    escaped = (str(Path(video).resolve()).replace("'", "'\\''") for video in videos)
+    list_file.write_text(''.join(f"file '{path}'\n" for path in escaped), encoding='utf-8')
+
+    cmd = [ffmpeg, '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', str(list_file),
+           '-c', 'copy', '-movflags', '+faststart', str(output)]
+    try:
+        completed = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except (subprocess.TimeoutExpired, OSError) as e:
+        return f"ffmpeg concat failed: {e}"
+    finally:
+        list_file.unlink(missing_ok=True)
+
+    if completed.returncode != 0 or not output.exists():
+        return f"ffmpeg concat failed: {(completed.stderr or '').strip()[-500:]}"
+    return None
@@ -0,0 +1,157 @@
+"""
+XTTS Speaker Conditioning Latent Cache
+Keeps the latents computed from each reference recording in memory and on
+disk, keyed by the recording's content hash, so a voice is encoded only once
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def file_content_hash(path: str) -> str:
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _copy_latents(latents: Any) -> Any:
+    """Per-caller copies of cached tensors, so in-place ops cannot corrupt the cache"""
+    if isinstance(latents, tuple):
+        return tuple(value.clone() if hasattr(value, 'clone') else value for value in latents)
+    return latents
+
+
+class SpeakerLatentCache:
+    """Memory and disk cache of (gpt_cond_latent, speaker_embedding) per reference file"""
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._latents: Dict[str, Any] = {}
+        # path -> (mtime_ns, size, content hash); avoids rehashing unchanged files
+        self._file_hashes: Dict[str, Tuple[int, int, str]] = {}
+        # content hash -> cache keys derived from it (one per model)
+        self._hash_keys: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _content_hash(self, speaker_wav: str) -> str:
+        path = os.path.abspath(speaker_wav)
+        stat = os.stat(path)
+        with self._lock:
+            known = self._file_hashes.get(path)
+        if known and known[:2] == (stat.st_mtime_ns, stat.st_size):
+            return known[2]
+
+        content_hash = file_content_hash(path)
+        with self._lock:
+            self._file_hashes[path] = (stat.st_mtime_ns, stat.st_size, content_hash)
+        return content_hash
+
+    @staticmethod
+    def _key(model_id: str, content_hash: str) -> str:
+        # Latents depend on the model's encoder as well as the recording
+        return hashlib.sha256(f"{model_id}:{content_hash}".encode()).hexdigest()
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        return self.cache_dir / f"{key}.pt" if self.cache_dir else None
+
+    def get(self, speaker_wav: str, model_id: str, compute: Callable[[], Any]) -> Any:
+        """Return cached latents for speaker_wav, computing and storing them on a miss
+
+        Every caller gets its own copy of the tensors; the cache keeps the originals.
+        """
+        content_hash = self._content_hash(speaker_wav)
+        key = self._key(model_id, content_hash)
+
+        with self._lock:
+            self._hash_keys.setdefault(content_hash, set()).add(key)
+            if key in self._latents:
+                self.memory_hits += 1
+                return _copy_latents(self._latents[key])
+
+        latents = self._load_from_disk(key)
+        if latents is not None:
+            with self._lock:
+                self.disk_hits += 1
+                self._latents[key] = latents
+            return _copy_latents(latents)
+
+        latents = compute()
+        with self._lock:
+            self.misses += 1
+            self._latents[key] = latents
+        self._save_to_disk(key, latents)
+        return _copy_latents(latents)
+
+    def _load_from_disk(self, key: str) -> Optional[Any]:
+        disk_path = self._disk_path(key)
+        if disk_path is None or not disk_path.exists():
+            return None
+        try:
+            import torch
+            data = torch.load(disk_path, map_location='cpu')
+            return data['gpt_cond_latent'], data['speaker_embedding']
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable speaker latents {disk_path}: {e}")
+            return None
+
+    def _save_to_disk(self, key: str, latents: Any) -> None:
+        disk_path = self._disk_path(key)
+        if disk_path is None:
+            return
+        try:
+            import torch
+            gpt_cond_latent, speaker_embedding = latents
+            disk_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = disk_path.with_suffix(f".{os.getpid()}.tmp")
+            torch.save({'gpt_cond_latent': gpt_cond_latent, 'speaker_embedding': speaker_embedding}, temp_path)
+            os.replace(temp_path, disk_path)
+        except Exception as e:
+            logger.warning(f"Failed to persist speaker latents: {e}")
+
+    def invalidate(self, speaker_wav: Optional[str] = None) -> int:
+        """Forget latents for one reference file (or all of them); returns entries dropped"""
+        with self._lock:
+            if speaker_wav is None:
+                dropped = {key for keys in self._hash_keys.values() for key in keys}
+                self._latents.clear()
+                self._file_hashes.clear()
+                self._hash_keys.clear()
+            else:
+                known = self._file_hashes.pop(os.path.abspath(speaker_wav), None)
+                if known is None:
+                    return 0
+                dropped = self._hash_keys.pop(known[2], set())
+                for key in dropped:
+                    self._latents.pop(key, None)
+
+        for key in dropped:
+            disk_path = self._disk_path(key)
+            if disk_path is not None:
+                try:
+                    disk_path.unlink()
+                except FileNotFoundError:
+                    pass
+        if dropped:
+            logger.info(f"Invalidated {len(dropped)} cached speaker latent(s)")
+        return len(dropped)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._latents),
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+            }
@@ -4,50 +4,88 @@ Handles XTTS v2, gTTS, and ElevenLabs with intelligent fallback
 """
 
 import os
+import re
+import json
+import time
+import base64
 import hashlib
 import logging
-from typing import Optional, Dict, Any, Union, List
+import shutil
+from typing import Optional, Dict, Any, Union, List, Iterator, Callable, Tuple
 from pathlib import Path
 import tempfile
 from abc import ABC, abstractmethod
-
-# Import TTS services
-try:
-    import TTS
-    from TTS.api import TTS as CoquiTTS
-    XTTS_AVAILABLE = True
-except ImportError:
-    XTTS_AVAILABLE = False
-    logging.warning("Coqui TTS not available. Install with: pip install TTS")
-
-try:
-    import gtts
-    from gtts import gTTS
-    GTTS_AVAILABLE = True
-except ImportError:
-    GTTS_AVAILABLE = False
-    logging.warning("gTTS not available. Install with: pip install gtts")
-
-try:
-    import elevenlabs
-    from elevenlabs import generate, save
-    ELEVENLABS_AVAILABLE = True
-except ImportError:
-    ELEVENLABS_AVAILABLE = False
-    logging.warning("ElevenLabs not available. Install with: pip install elevenlabs")
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+import importlib.util
+import threading
+from functools import lru_cache
 
 import sys
-from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from config.tts_config import TTSQuality, SubjectVoice, tts_config
 from config.voice_profiles import voice_manager
-from utils.hinglish_processor import hinglish_processor
+from utils.hinglish_processor import hinglish_processor, PROCESSOR_VERSION
+from utils.audio_cache import AudioCache
+from utils.http_pool import HTTPSessionPool, http_pool
+from utils.resilience import ServiceGuard, create_service_guard
+from utils.xtts_server import XTTSClient, XTTSEngine
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bump when the cache key layout changes
+CACHE_KEY_VERSION = 2
+
+# Config fields that never affect the audio
+_UNKEYED_CONFIG_FIELDS = {'api_key', 'style_description'}
+
+# gTTS batchexecute responses carry each audio part base64-encoded on a jQ1olc line
+_GTTS_AUDIO_PATTERN = re.compile(r'jQ1olc","\[\\"(.*)\\"]')
+
+ELEVENLABS_TTS_URL = "https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+
+# Install hints for the optional TTS backends, by import name
+_BACKEND_INSTALL_HINTS = {
+    'TTS': 'pip install TTS',
+    'gtts': 'pip install gtts',
+    'requests': 'pip install requests',
+}
+
+
+@lru_cache(maxsize=None)
+def backend_installed(module: str) -> bool:
+    """Whether an optional backend is importable, without importing it
+    
+    Backends are imported on first synthesis: Coqui TTS alone pulls in
+    torch, which would cost every importer of this module seconds.
+    """
+    try:
+        installed = importlib.util.find_spec(module) is not None
+    except (ImportError, ValueError):
+        installed = False
+    if not installed:
+        logger.warning(f"{module} not available. Install with: {_BACKEND_INSTALL_HINTS.get(module, f'pip install {module}')}")
+    return installed
+
+@dataclass
+class AudioChunk:
+    """One synthesized sentence of a streamed narration line"""
+    index: int
+    text: str
+    audio_path: Optional[str]
+    audio: Any = None        # Decoded pydub AudioSegment
+    start: float = 0.0       # Offset in the stitched audio (seconds)
+    duration: float = 0.0
+    service: Optional[str] = None  # Service whose audio this is
+
+def _load_audio(path: str):
+    """Decode any service's output (wav or mp3) into a pydub AudioSegment"""
+    from pydub import AudioSegment
+    return AudioSegment.from_file(path)
+
 class TTSServiceBase(ABC):
     """Abstract base class for TTS services"""
     
@@ -62,36 +100,26 @@ class TTSServiceBase(ABC):
         pass
 
 class XTTSService(TTSServiceBase):
-    """Coqui XTTS v2 service with Hindi fine-tuning support"""
+    """Coqui XTTS v2 service with Hindi fine-tuning support
+    
+    Synthesis is delegated to the warm model server (utils/xtts_server.py)
+    so every process shares one loaded model. With the server disabled the
+    model is loaded in-process as before.
+    """
     
     def __init__(self):
-        self.model = None
-        self.model_loaded = False
-        
-    def _load_model(self, config: Dict[str, Any]) -> bool:
-        """Load XTTS model with configuration"""
-        if not XTTS_AVAILABLE:
-            return False
-            
-        try:
-            if config.get('use_finetuned_model', True):
-                # Try to load fine-tuned Hindi model
-                model_path = config.get('finetuned_model_path', 'Abhinay45/XTTS-Hindi-finetuned')
-                logger.info(f"Loading fine-tuned XTTS model: {model_path}")
-                self.model = CoquiTTS(model_path)
-            else:
-                # Load default multilingual model
-                model_name = config.get('model_name', 'tts_models/multilingual/multi-dataset/xtts_v2')
-                logger.info(f"Loading default XTTS model: {model_name}")
-                self.model = CoquiTTS(model_name)
-                
-            self.model_loaded = True
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to load XTTS model: {e}")
-            self.model_loaded = False
-            return False
+        self.server_config = tts_config.xtts_server_config
+        self.client = XTTSClient(self.server_config.socket_path, self.server_config.request_timeout)
+        self.engine = None
+        voice_manager.add_update_listener(self._on_profile_updated)
+    
+    def _on_profile_updated(self, subject: SubjectVoice, reference_paths: List[str]) -> None:
+        """Drop conditioning latents computed from a changed reference recording"""
+        for reference_path in reference_paths:
+            if self.engine is not None:
+                self.engine.latent_cache.invalidate(reference_path)
+            if self.server_config.enabled:
+                self.client.invalidate_latents(reference_path)
     
     def synthesize(self, text: str, output_path: str, **kwargs) -> bool:
         """Synthesize speech using XTTS"""
@@ -100,49 +128,81 @@ class XTTSService(TTSServiceBase):
             
         config = kwargs.get('config', {})
         
-        # Load model if not already loaded
-        if not self.model_loaded:
-            if not self._load_model(config):
-                return False
+        if self.server_config.enabled:
+            if self.client.ensure_server(
+                autostart=self.server_config.autostart and backend_installed('TTS'),
+                start_timeout=self.server_config.start_timeout,
+                retry_after=self.server_config.retry_after
+            ):
+                return self._synthesize_on_server(text, output_path, config)
+            logger.warning("XTTS server unavailable, loading the model in-process")
         
-        try:
-            # Get speaker reference audio
-            speaker_wav = config.get('speaker_wav')
-            if speaker_wav and not os.path.exists(speaker_wav):
-                logger.warning(f"Speaker reference audio not found: {speaker_wav}")
-                speaker_wav = None
-            
-            # Synthesize speech
-            if speaker_wav:
-                # Voice cloning mode
-                self.model.tts_to_file(
-                    text=text,
-                    file_path=output_path,
-                    speaker_wav=speaker_wav,
-                    language=config.get('language', 'hi'),
-                    split_sentences=config.get('enable_text_splitting', True)
-                )
-            else:
-                # Default voice mode
-                self.model.tts_to_file(
-                    text=text,
-                    file_path=output_path,
-                    language=config.get('language', 'hi'),
-                    split_sentences=config.get('enable_text_splitting', True)
-                )
-            
-            return os.path.exists(output_path)
-            
-        except Exception as e:
-            logger.error(f"XTTS synthesis failed: {e}")
+        if not backend_installed('TTS'):
             return False
+        
+        # Load model if not already loaded
+        if self.engine is None:
+            self.engine = XTTSEngine()
+        return self.engine.synthesize(text, output_path, config)
+    
+    def _synthesize_on_server(self, text: str, output_path: str, config: Dict[str, Any]) -> bool:
+        """The server only writes inside the audio cache, so stage its output there"""
+        staging_dir = os.path.join(tts_config.cache_dir, "xtts_staging")
+        os.makedirs(staging_dir, exist_ok=True)
+        with tempfile.NamedTemporaryFile(suffix='.wav', dir=staging_dir, delete=False) as temp_file:
+            temp_path = temp_file.name
+        try:
+            if not self.client.synthesize(text, temp_path, config):
+                return False
+            shutil.move(temp_path, output_path)
+            return True
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
     
     def is_available(self) -> bool:
-        """Check if XTTS is available"""
-        return XTTS_AVAILABLE
+        """Check if XTTS is available locally or through a running server"""
+        if backend_installed('TTS'):
+            return True
+        return self.server_config.enabled and self.client.ping()
 
 class GTTSService(TTSServiceBase):
-    """Google Text-to-Speech service"""
+    """Google Text-to-Speech service
+    
+    gTTS splits text into ~100 character parts and opens a new connection
+    for each. Here the parts are sent concurrently over the shared
+    keep-alive pool and written back in order.
+    """
+    
+    def __init__(self, pool: Optional[HTTPSessionPool] = None):
+        self.pool = pool or http_pool
+    
+    def _fetch_part(self, prepared_request) -> bytes:
+        """Send one gTTS part request and decode its audio"""
+        response = self.pool.send(prepared_request, endpoint=tts_config.http_pool_config.gtts_endpoint)
+        response.raise_for_status()
+        
+        audio = b''
+        for line in response.text.splitlines():
+            if 'jQ1olc' in line:
+                match = _GTTS_AUDIO_PATTERN.search(line)
+                if not match:
+                    raise ValueError("gTTS response contained no audio")
+                audio += base64.b64decode(match.group(1).encode('ascii'))
+        return audio
+    
+    def _fetch_parts(self, tts) -> Optional[List[bytes]]:
+        """Fetch every part over the pool, or None if gTTS's request API has changed"""
+        try:
+            prepared_requests = tts._prepare_requests()
+            if len(prepared_requests) == 1:
+                return [self._fetch_part(prepared_requests[0])]
+            with ThreadPoolExecutor(max_workers=min(len(prepared_requests), self.pool.per_host_limit)) as pool:
+                return list(pool.map(self._fetch_part, prepared_requests))
+        except (AttributeError, TypeError, ValueError) as e:
+            # _prepare_requests and the response format are gTTS internals
+            logger.warning(f"Pooled gTTS request failed ({e}), using gTTS.write_to_fp")
+            return None
     
     def synthesize(self, text: str, output_path: str, **kwargs) -> bool:
         """Synthesize speech using gTTS"""
@@ -152,19 +212,25 @@ class GTTSService(TTSServiceBase):
         config = kwargs.get('config', {})
         
         try:
-            # Process text for gTTS
-            processed_text = hinglish_processor.process_for_tts(text, 'gtts')
+            from gtts import gTTS
             
-            # Create gTTS object
+            # Text arrives already processed for gTTS by the manager
             tts = gTTS(
-                text=processed_text,
+                text=text,
                 lang=config.get('lang', 'hi'),
                 slow=config.get('slow', False),
-                domain=config.get('domain', 'com')
+                tld=config.get('domain', 'com')
             )
             
+            parts = self._fetch_parts(tts)
+            
             # Save audio
-            tts.save(output_path)
+            with open(output_path, 'wb') as f:
+                if parts is None:
+                    tts.write_to_fp(f)
+                else:
+                    for part in parts:
+                        f.write(part)
             return os.path.exists(output_path)
             
         except Exception as e:
@@ -173,10 +239,13 @@ class GTTSService(TTSServiceBase):
     
     def is_available(self) -> bool:
         """Check if gTTS is available"""
-        return GTTS_AVAILABLE
+        return backend_installed('gtts')
 
 class ElevenLabsService(TTSServiceBase):
-    """ElevenLabs TTS service"""
+    """ElevenLabs TTS service, called over its REST API through the shared HTTP pool"""
+    
+    def __init__(self, pool: Optional[HTTPSessionPool] = None):
+        self.pool = pool or http_pool
     
     def synthesize(self, text: str, output_path: str, **kwargs) -> bool:
         """Synthesize speech using ElevenLabs"""
@@ -191,18 +260,28 @@ class ElevenLabsService(TTSServiceBase):
             return False
         
         try:
-            # Set API key
-            elevenlabs.set_api_key(api_key)
-            
             # Generate audio
-            audio = generate(
-                text=text,
-                voice=config.get('voice_id', 'pNInz6obpgDQGcFmaJgB'),
-                model=config.get('model_id', 'eleven_multilingual_v2')
+            response = self.pool.request(
+                'POST',
+                ELEVENLABS_TTS_URL.format(voice_id=config.get('voice_id', 'pNInz6obpgDQGcFmaJgB')),
+                endpoint=tts_config.http_pool_config.elevenlabs_endpoint,
+                headers={'xi-api-key': api_key, 'Accept': 'audio/mpeg'},
+                json={
+                    'text': text,
+                    'model_id': config.get('model_id', 'eleven_multilingual_v2'),
+                    'voice_settings': {
+                        'stability': config.get('stability', 0.5),
+                        'similarity_boost': config.get('similarity_boost', 0.75),
+                        'style': config.get('style', 0.0),
+                        'use_speaker_boost': config.get('use_speaker_boost', True),
+                    },
+                }
             )
+            response.raise_for_status()
             
             # Save audio
-            save(audio, output_path)
+            with open(output_path, 'wb') as f:
+                f.write(response.content)
             return os.path.exists(output_path)
             
         except Exception as e:
@@ -211,7 +290,7 @@ class ElevenLabsService(TTSServiceBase):
     
     def is_available(self) -> bool:
         """Check if ElevenLabs is available"""
-        return ELEVENLABS_AVAILABLE and (
+        return backend_installed('requests') and (
             os.getenv('ELEVENLABS_API_KEY') is not None
         )
 
@@ -226,33 +305,107 @@ class HinglishTTSManager:
         }
         
         self.cache_dir = Path(tts_config.cache_dir)
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache = AudioCache(self.cache_dir, tts_config.cache_max_bytes)
         
         # Service priority order for fallback
         self.service_priority = ['xtts', 'elevenlabs', 'gtts']
+        
+        # Rate limit, circuit breaker and latency window per service
+        self.guards: Dict[str, ServiceGuard] = {name: create_service_guard(name) for name in self.services}
+        
+        # Availability is probed at most once per TTL (XTTS may ping its server)
+        self.availability_ttl = tts_config.availability_ttl
+        self._available: Optional[List[str]] = None
+        self._available_at = 0.0
+        self._available_lock = threading.Lock()
+        
+        # Reference recording size and mtime by path, for cache keys
+        self._speaker_stats: Dict[str, Optional[List[int]]] = {}
+        voice_manager.add_update_listener(self._on_profile_updated)
     
-    def _generate_cache_key(self, text: str, quality: TTSQuality, subject: SubjectVoice) -> str:
-        """Generate cache key for audio file"""
-        content = f"{text}_{quality.value}_{subject.value}"
-        return hashlib.md5(content.encode()).hexdigest()
+    def _on_profile_updated(self, subject: SubjectVoice, reference_paths: List[str]) -> None:
+        """Re-stat changed reference recordings, so their cache keys change"""
+        for reference_path in reference_paths:
+            self._speaker_stats.pop(reference_path, None)
     
-    def _get_cached_audio(self, cache_key: str) -> Optional[str]:
-        """Get cached audio file if exists"""
-        cache_file = self.cache_dir / f"{cache_key}.wav"
-        if cache_file.exists():
-            return str(cache_file)
-        return None
+    def _speaker_stat(self, speaker_wav: str) -> Optional[List[int]]:
+        """Size and mtime of a reference recording, stat'ed once until its profile changes"""
+        if speaker_wav not in self._speaker_stats:
+            try:
+                stat = os.stat(speaker_wav)
+                self._speaker_stats[speaker_wav] = [stat.st_size, stat.st_mtime_ns]
+            except OSError:
+                self._speaker_stats[speaker_wav] = None
+        return self._speaker_stats[speaker_wav]
     
-    def _save_to_cache(self, cache_key: str, audio_path: str) -> None:
-        """Save audio to cache"""
-        cache_file = self.cache_dir / f"{cache_key}.wav"
+    def _generate_cache_key(self, text: str, service_name: str, subject: SubjectVoice,
+                            streamed: bool = False) -> str:
+        """Versioned cache key for raw text synthesized by one service
         
-        # Copy audio file to cache
-        import shutil
-        try:
-            shutil.copy2(audio_path, cache_file)
-        except Exception as e:
-            logger.warning(f"Failed to cache audio: {e}")
+        Covers the service's resolved config (voice, temperature, speed, ...),
+        the reference recording it clones and the text processor version, so
+        a change to any of them misses exactly the affected entries. A line
+        stitched from streamed sentences sounds different from one synthesized
+        whole, so it gets its own key.
+        """
+        service_config = tts_config.get_config_for_service(service_name, subject)
+        keyed_config = {k: v for k, v in service_config.items() if k not in _UNKEYED_CONFIG_FIELDS}
+        
+        speaker_wav = service_config.get('speaker_wav')
+        if speaker_wav:
+            keyed_config['speaker_wav_stat'] = self._speaker_stat(speaker_wav)
+        
+        content = json.dumps({
+            'version': CACHE_KEY_VERSION,
+            'processor': PROCESSOR_VERSION,
+            'service': service_name,
+            'config': keyed_config,
+            'text': text,
+            **({'streamed': True} if streamed else {}),
+        }, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(content.encode()).hexdigest()
+    
+    def _from_cache(self, text: str, quality: TTSQuality, subject: SubjectVoice,
+                    fetch: Callable[[str], Any], streamed: bool = False,
+                    count_miss: bool = True) -> Tuple[Any, Optional[str]]:
+        """First hit of fetch over text's cache keys, and the service it was cached under
+        
+        The preferred service's key is tried first, so the usual hit costs one
+        key hash and one index transaction. Audio is stored under the service
+        that actually produced it, which may be a fallback, so only after that
+        miss are the other services' keys computed and tried. Availability is
+        not consulted: cached audio is served even while every service is down. fetch gets a key
+        and must not count misses; one miss is counted if nothing hits, unless
+        count_miss is off.
+        """
+        preferred = self._get_service_for_quality(quality)
+        
+        def names():
+            yield preferred
+            for name in self.service_priority + [n for n in self.services if n not in self.service_priority]:
+                if name != preferred:
+                    yield name
+        
+        for name in names():
+            result = fetch(self._generate_cache_key(text, name, subject, streamed))
+            if result:
+                return result, name
+        if count_miss:
+            self.cache.record_miss()
+        return None, None
+    
+    def _deliver_cached(self, text: str, output_path: str, quality: TTSQuality, subject: SubjectVoice,
+                        streamed: bool = False, count_miss: bool = True) -> Optional[str]:
+        """Copy text's cached audio to output_path; returns its service, or None on a miss"""
+        return self._from_cache(
+            text, quality, subject,
+            lambda key: self.cache.deliver(key, output_path, count_miss=False), streamed, count_miss
+        )[1]
+    
+    def _lookup_cached(self, text: str, quality: TTSQuality,
+                       subject: SubjectVoice) -> Tuple[Optional[str], Optional[str]]:
+        """Cached audio path for text and its service, or (None, None) on a miss"""
+        return self._from_cache(text, quality, subject, lambda key: self.cache.lookup(key, count_miss=False))
     
     def _get_service_for_quality(self, quality: TTSQuality) -> str:
         """Get preferred service for quality level"""
@@ -264,8 +417,113 @@ class HinglishTTSManager:
         return service_map.get(quality, 'gtts')
     
     def _get_available_services(self) -> List[str]:
-        """Get list of available TTS services"""
-        return [name for name, service in self.services.items() if service.is_available()]
+        """Get list of available TTS services, re-probed once the TTL has passed"""
+        with self._available_lock:
+            now = time.monotonic()
+            if self._available is None or now - self._available_at >= self.availability_ttl:
+                self._available = [name for name, service in self.services.items() if service.is_available()]
+                self._available_at = now
+            return list(self._available)
+    
+    def refresh_availability(self) -> List[str]:
+        """Re-probe every service now, e.g. after setting an API key or starting a server"""
+        with self._available_lock:
+            self._available = None
+        return self._get_available_services()
+    
+    def _get_services_to_try(self, quality: TTSQuality) -> List[str]:
+        """Available services ordered by preference for this quality level
+        
+        The quality's preferred service leads while its circuit is closed;
+        fallbacks follow fastest first by median latency, services without
+        samples keep service_priority order, and services with an open
+        circuit go last.
+        """
+        preferred_service = self._get_service_for_quality(quality)
+        available_services = self._get_available_services()
+        
+        def order(service: str):
+            guard = self.guards[service]
+            p50 = guard.latency.percentile(50)
+            priority = self.service_priority.index(service) if service in self.service_priority else len(self.service_priority)
+            return (
+                not guard.available,
+                service != preferred_service,
+                p50 if p50 is not None else float('inf'),
+                priority,
+            )
+        
+        return sorted(available_services, key=order)
+    
+    def _synthesize_with_fallback(
+        self,
+        text: str,
+        output_path: str,
+        quality: TTSQuality,
+        subject: SubjectVoice
+    ) -> Optional[str]:
+        """Try each service in preference order; returns the name of the one that succeeded
+        
+        Text is processed once per service with that service's rules, and each
+        service gets its own resolved configuration.
+        """
+        services_to_try = self._get_services_to_try(quality)
+        
+        if not services_to_try:
+            logger.error("No TTS services available")
+            return None
+        
+        # Try each service
+        for service_name in services_to_try:
+            guard = self.guards[service_name]
+            if not guard.acquire():
+                continue
+            logger.info(f"Attempting synthesis with {service_name}")
+            
+            temp_path = None
+            started = time.monotonic()
+            recorded = False
+            try:
+                service = self.services[service_name]
+                service_config = tts_config.get_config_for_service(service_name, subject)
+                processed_text = hinglish_processor.process_for_tts(text, service_name)
+                
+                # Create temporary file for synthesis
+                with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
+                    temp_path = temp_file.name
+                
+                started = time.monotonic()
+                success = service.synthesize(
+                    processed_text, 
+                    temp_path,
+                    config=service_config
+                ) and os.path.exists(temp_path)
+                guard.record(success, time.monotonic() - started)
+                recorded = True
+                
+                if success:
+                    # Move to final output path
+                    shutil.move(temp_path, output_path)
+                    
+                    logger.info(f"Successfully synthesized with {service_name}")
+                    return service_name
+                    
+            except Exception as e:
+                logger.error(f"Service {service_name} failed: {e}")
+                if not recorded:
+                    guard.record(False, time.monotonic() - started)
+                    recorded = True
+                
+            finally:
+                # Interrupted before an outcome: free the breaker's probe slot
+                if not recorded:
+                    guard.release()
+                # Clean up temp file
+                if temp_path and os.path.exists(temp_path):
+                    os.unlink(temp_path)
+        
+        logger.error("All TTS services failed")
+        return None
     
     def synthesize_speech(
         self, 
@@ -273,7 +531,9 @@ class HinglishTTSManager:
         output_path: str,
         quality: TTSQuality = TTSQuality.HIGH,
         subject: SubjectVoice = SubjectVoice.GENERAL,
-        use_cache: bool = True
+        use_cache: bool = True,
+        stream: bool = False,
+        on_chunk: Optional[Callable[[AudioChunk], None]] = None
     ) -> bool:
         """
         Synthesize speech with intelligent service selection and fallback
@@ -284,89 +544,225 @@ class HinglishTTSManager:
             quality: TTS quality level
             subject: Subject area for voice selection
             use_cache: Whether to use audio caching
+            stream: On a cache miss, synthesize sentence by sentence (see synthesize_stream)
+            on_chunk: Called with each sentence's chunk as it becomes ready when streaming,
+                so its duration is known before later sentences finish; a cached
+                line arrives as a single chunk
             
         Returns:
             bool: Success status
         """
         
-        # Validate and process text
+        # Cache hits cost one key hash and one index transaction, with no text processing.
+        # A streamed request is happy with the whole line (e.g. prefetched) too.
+        if use_cache:
+            variants = [False, True] if stream else [False]
+            for streamed in variants:
+                service_name = self._deliver_cached(text, output_path, quality, subject, streamed=streamed,
+                                                    count_miss=streamed == variants[-1])
+                if service_name:
+                    logger.info(f"Using cached {service_name} audio for '{text[:40]}'")
+                    if stream and on_chunk:
+                        audio = _load_audio(output_path)
+                        on_chunk(AudioChunk(0, text, output_path, audio, 0.0, len(audio) / 1000, service_name))
+                    return True
+        
+        # Validate text
         is_valid, issues = hinglish_processor.validate_hinglish_text(text)
         if not is_valid:
             logger.warning(f"Text validation issues: {issues}")
         
-        # Process text for TTS
-        processed_text = hinglish_processor.process_for_tts(text)
-        
-        # Check cache first
-        if use_cache:
-            cache_key = self._generate_cache_key(processed_text, quality, subject)
-            cached_audio = self._get_cached_audio(cache_key)
-            if cached_audio:
-                logger.info(f"Using cached audio: {cache_key}")
-                import shutil
-                shutil.copy2(cached_audio, output_path)
-                return True
-        
-        # Get service configuration
-        service_config = tts_config.get_service_config(quality, subject)
-        preferred_service = self._get_service_for_quality(quality)
+        if stream:
+            services = self._synthesize_streaming(text, output_path, quality, subject, on_chunk)
+            if not services:
+                return False
+            # A line stitched from several services' audio has no single key;
+            # its sentences are cached individually, so re-stitching is cheap
+            service_name = services[0] if len(services) == 1 else None
+        else:
+            service_name = self._synthesize_with_fallback(text, output_path, quality, subject)
+            if not service_name:
+                return False
         
-        # Try preferred service first, then fallback
-        available_services = self._get_available_services()
+        # Clone the fresh audio into the cache, under the service that produced it
+        if use_cache and service_name:
+            self.cache.store(self._generate_cache_key(text, service_name, subject, streamed=stream),
+                             output_path, move=False)
+        return True
+    
+    def _synthesize_into_cache(
+        self,
+        text: str,
+        quality: TTSQuality,
+        subject: SubjectVoice
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Synthesize one text straight into the cache; returns the cached path and service"""
+        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
+            temp_path = temp_file.name
         
-        if not available_services:
-            logger.error("No TTS services available")
-            return False
+        try:
+            service_name = self._synthesize_with_fallback(text, temp_path, quality, subject)
+            if not service_name:
+                return None, None
+            return self.cache.store(self._generate_cache_key(text, service_name, subject), temp_path), service_name
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+    
+    def _synthesize_sentence(self, sentence: str, quality: TTSQuality,
+                             subject: SubjectVoice) -> Tuple[Optional[str], Optional[str]]:
+        """Cached audio path and service for one sentence, synthesizing it on a miss"""
+        cached_path, service_name = self._lookup_cached(sentence, quality, subject)
+        if cached_path:
+            return cached_path, service_name
+        return self._synthesize_into_cache(sentence, quality, subject)
+    
+    def synthesize_stream(
+        self,
+        text: str,
+        quality: TTSQuality = TTSQuality.HIGH,
+        subject: SubjectVoice = SubjectVoice.GENERAL,
+        max_workers: Optional[int] = None
+    ) -> Iterator[AudioChunk]:
+        """
+        Synthesize a narration line sentence by sentence, yielding chunks in order
         
-        # Order services by preference
-        services_to_try = []
-        if preferred_service in available_services:
-            services_to_try.append(preferred_service)
+        Sentences come from HinglishProcessor.detect_language_segments, each
+        keeping its end punctuation so questions still rise, and are
+        synthesized concurrently (and cached individually). Each chunk is
+        yielded as soon as it and every sentence before it are ready, with its
+        decoded audio, offset and duration, so playback and timing can start
+        long before the last sentence finishes.
+        """
+        sentences = [segment.text for segment in hinglish_processor.detect_language_segments(text)]
+        if not sentences:
+            return
         
-        # Add remaining services as fallback
-        for service in self.service_priority:
-            if service in available_services and service != preferred_service:
-                services_to_try.append(service)
+        services_to_try = self._get_services_to_try(quality)
+        if services_to_try and services_to_try[0] == 'xtts':
+            server_config = tts_config.xtts_server_config
+            workers = server_config.max_batch_size if server_config.enabled else 1
+        else:
+            workers = max_workers or tts_config.batch_workers
         
-        # Try each service
-        for service_name in services_to_try:
-            logger.info(f"Attempting synthesis with {service_name}")
-            
-            service = self.services[service_name]
-            
-            # Create temporary file for synthesis
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                temp_path = temp_file.name
+        with ThreadPoolExecutor(max_workers=min(workers, len(sentences))) as pool:
+            futures = [pool.submit(self._synthesize_sentence, sentence, quality, subject) for sentence in sentences]
             
-            try:
-                success = service.synthesize(
-                    processed_text, 
-                    temp_path,
-                    config=service_config
-                )
+            start = 0.0
+            for index, (sentence, future) in enumerate(zip(sentences, futures)):
+                audio_path, service_name, audio = None, None, None
+                try:
+                    audio_path, service_name = future.result()
+                    audio = _load_audio(audio_path) if audio_path else None
+                except Exception as e:
+                    logger.error(f"Streaming synthesis failed for '{sentence[:40]}': {e}")
                 
-                if success and os.path.exists(temp_path):
-                    # Move to final output path
-                    import shutil
-                    shutil.move(temp_path, output_path)
-                    
-                    # Cache the result
-                    if use_cache:
-                        self._save_to_cache(cache_key, output_path)
-                    
-                    logger.info(f"Successfully synthesized with {service_name}")
-                    return True
-                    
-            except Exception as e:
-                logger.error(f"Service {service_name} failed: {e}")
-                
-            finally:
-                # Clean up temp file
-                if os.path.exists(temp_path):
-                    os.unlink(temp_path)
+                duration = len(audio) / 1000 if audio is not None else 0.0
+                yield AudioChunk(index, sentence, audio_path, audio, start, duration, service_name)
+                start += duration
+    
+    def _synthesize_streaming(
+        self,
+        text: str,
+        output_path: str,
+        quality: TTSQuality,
+        subject: SubjectVoice,
+        on_chunk: Optional[Callable[[AudioChunk], None]] = None
+    ) -> Optional[List[str]]:
+        """Stitch streamed sentence chunks, in order, into one WAV at output_path
         
-        logger.error("All TTS services failed")
-        return False
+        Returns the services whose audio was used, in order of first use, or
+        None on failure. output_path is replaced in one step, so a reader
+        (or a cached file it was cloned from) never sees a partial write.
+        """
+        stitched = None
+        services: List[str] = []
+        for chunk in self.synthesize_stream(text, quality, subject):
+            if chunk.audio is None:
+                logger.error(f"Sentence {chunk.index + 1} failed; aborting streamed synthesis")
+                return None
+            if on_chunk:
+                on_chunk(chunk)
+            if chunk.service and chunk.service not in services:
+                services.append(chunk.service)
+            stitched = chunk.audio if stitched is None else stitched + chunk.audio
+        
+        if stitched is None:
+            return None
+        
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        with tempfile.NamedTemporaryFile(suffix='.wav', dir=output_dir, delete=False) as temp_file:
+            temp_path = temp_file.name
+        try:
+            stitched.export(temp_path, format='wav')
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+        return services
+    
+    def synthesize_batch(
+        self,
+        texts: List[str],
+        quality: TTSQuality = TTSQuality.HIGH,
+        subject: SubjectVoice = SubjectVoice.GENERAL,
+        max_workers: Optional[int] = None
+    ) -> Dict[str, Optional[str]]:
+        """
+        Synthesize many narration lines at once, e.g. every voiceover of a scene
+        
+        Texts are deduplicated and checked against the cache in one pass; only
+        misses are synthesized, fanned out over a thread pool. XTTS misses are
+        sent to the model server together so it can coalesce them into
+        batches; an in-process XTTS model runs them one after another.
+        
+        Args:
+            texts: Narration lines to synthesize
+            quality: TTS quality level
+            subject: Subject area for voice selection
+            max_workers: Thread pool size for network services
+            
+        Returns:
+            Dict mapping each text to its cached audio path (None if synthesis failed)
+        """
+        unique_texts = list(dict.fromkeys(text for text in texts if text and text.strip()))
+        
+        results: Dict[str, Optional[str]] = {}
+        misses: List[str] = []
+        
+        # Bulk cache check
+        services_to_try = self._get_services_to_try(quality)
+        for text in unique_texts:
+            cached_path = self._lookup_cached(text, quality, subject)[0]
+            if cached_path:
+                results[text] = cached_path
+            else:
+                misses.append(text)
+        
+        logger.info(f"Batch synthesis: {len(results)} cached, {len(misses)} to synthesize")
+        if not misses:
+            return results
+        
+        if services_to_try and services_to_try[0] == 'xtts':
+            server_config = tts_config.xtts_server_config
+            workers = server_config.max_batch_size if server_config.enabled else 1
+        else:
+            workers = max_workers or tts_config.batch_workers
+        
+        with ThreadPoolExecutor(max_workers=min(workers, len(misses))) as pool:
+            futures = {
+                pool.submit(self._synthesize_into_cache, text, quality, subject): text
+                for text in misses
+            }
+            for future in as_completed(futures):
+                text = futures[future]
+                try:
+                    results[text] = future.result()[0]
+                except Exception as e:
+                    logger.error(f"Batch synthesis failed for '{text[:40]}': {e}")
+                    results[text] = None
+        
+        return results
     
     def get_service_status(self) -> Dict[str, Dict[str, Any]]:
         """Get status of all TTS services"""
@@ -383,31 +779,34 @@ class HinglishTTSManager:
             if name == 'xtts':
                 service_info['features'] = ['voice_cloning', 'multilingual', 'high_quality']
                 service_info['requirements'] = 'pip install TTS'
+                service_info['server'] = service.client.stats()
                 
             elif name == 'gtts':
                 service_info['features'] = ['fast', 'simple', 'reliable']
                 service_info['requirements'] = 'pip install gtts'
+                service_info['http_pool'] = http_pool.stats()
                 
             elif name == 'elevenlabs':
                 service_info['features'] = ['premium_quality', 'voice_cloning', 'api_key_required']
-                service_info['requirements'] = 'pip install elevenlabs + API key'
+                service_info['requirements'] = 'pip install requests + API key'
                 service_info['api_key_set'] = bool(os.getenv('ELEVENLABS_API_KEY'))
             
+            service_info.update(self.guards[name].stats())
             status[name] = service_info
         
         return status
     
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get audio cache hits, misses, bytes and evictions"""
+        return self.cache.stats()
+    
+    def prune_cache(self, max_bytes: int) -> int:
+        """Evict least recently used audio down to max_bytes and return files removed"""
+        return self.cache.prune(max_bytes)
+    
     def clear_cache(self) -> int:
         """Clear audio cache and return number of files removed"""
-        cache_files = list(self.cache_dir.glob('*.wav'))
-        
-        for cache_file in cache_files:
-            try:
-                cache_file.unlink()
-            except Exception as e:
-                logger.warning(f"Failed to delete cache file {cache_file}: {e}")
-        
-        return len(cache_files)
+        return self.cache.clear()
 
 # Global TTS manager instance
 tts_manager = HinglishTTSManager()
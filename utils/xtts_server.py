@@ -0,0 +1,500 @@
+"""
+Warm XTTS Model Server
+Long-lived local daemon that loads the Coqui XTTS model once and serves
+synthesis requests over a Unix socket, so concurrent renders share one model
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.tts_config import tts_config
+from utils.speaker_latents import SpeakerLatentCache
+
+logger = logging.getLogger(__name__)
+
+
+def _ensure_private_dir(socket_path: str) -> None:
+    """Create the directory holding the socket and its lock, marker and log files, for this user only"""
+    os.makedirs(os.path.dirname(os.path.abspath(socket_path)), mode=0o700, exist_ok=True)
+
+
+class XTTSEngine:
+    """Holds one loaded XTTS model and synthesizes with it"""
+
+    def __init__(self, latent_cache: Optional[SpeakerLatentCache] = None):
+        self.model = None
+        self.model_id: Optional[str] = None
+        self.load_seconds = 0.0
+        self.latent_cache = latent_cache or SpeakerLatentCache(Path(tts_config.speaker_latents_dir))
+
+    @staticmethod
+    def _model_id(config: Dict[str, Any]) -> str:
+        if config.get('use_finetuned_model', True):
+            return config.get('finetuned_model_path', 'Abhinay45/XTTS-Hindi-finetuned')
+        return config.get('model_name', 'tts_models/multilingual/multi-dataset/xtts_v2')
+
+    def load(self, config: Dict[str, Any]) -> bool:
+        """Load the model named by config unless it is already loaded"""
+        model_id = self._model_id(config)
+        if self.model is not None and self.model_id == model_id:
+            return True
+
+        try:
+            from TTS.api import TTS as CoquiTTS
+        except ImportError:
+            logger.error("Coqui TTS not available. Install with: pip install TTS")
+            return False
+
+        try:
+            logger.info(f"Loading XTTS model: {model_id}")
+            start = time.time()
+            self.model = CoquiTTS(model_id)
+            self.model_id = model_id
+            self.load_seconds = time.time() - start
+            logger.info(f"XTTS model loaded in {self.load_seconds:.1f}s")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to load XTTS model: {e}")
+            self.model = None
+            self.model_id = None
+            return False
+
+    @staticmethod
+    def _speaker_wav(config: Dict[str, Any]) -> Optional[str]:
+        speaker_wav = config.get('speaker_wav')
+        if speaker_wav and not os.path.exists(speaker_wav):
+            logger.warning(f"Speaker reference audio not found: {speaker_wav}")
+            return None
+        return speaker_wav
+
+    def conditioning_latents(self, speaker_wav: str):
+        """XTTS (gpt_cond_latent, speaker_embedding) for a reference recording, encoded once per file"""
+        return self.latent_cache.get(
+            speaker_wav,
+            self.model_id,
+            lambda: self.model.synthesizer.tts_model.get_conditioning_latents(audio_path=[speaker_wav])
+        )
+
+    def synthesize(self, text: str, output_path: str, config: Dict[str, Any]) -> bool:
+        """Synthesize text to output_path, loading the model on first use"""
+        return self.synthesize_batch([(text, output_path, config)])[0]
+
+    def synthesize_batch(self, items: List[Tuple[str, str, Dict[str, Any]]]) -> List[bool]:
+        """Synthesize (text, output_path, config) items that share one voice and language
+
+        Conditioning latents are computed once for the whole batch and every
+        item is decoded against them; each item keeps its own sampling settings.
+        """
+        first_config = items[0][2]
+        if not self.load(first_config):
+            return [False] * len(items)
+
+        speaker_wav = self._speaker_wav(first_config)
+        tts_model = getattr(self.model.synthesizer, 'tts_model', None)
+        if not speaker_wav or not hasattr(tts_model, 'get_conditioning_latents'):
+            # Default voice mode has no reference to condition on
+            return [self._synthesize_default(text, output_path, config) for text, output_path, config in items]
+
+        try:
+            gpt_cond_latent, speaker_embedding = self.conditioning_latents(speaker_wav)
+        except Exception as e:
+            logger.error(f"XTTS conditioning failed for {speaker_wav}: {e}")
+            return [False] * len(items)
+
+        results = []
+        for text, output_path, config in items:
+            try:
+                output = tts_model.inference(
+                    text,
+                    config.get('language', 'hi'),
+                    gpt_cond_latent,
+                    speaker_embedding,
+                    temperature=config.get('temperature', 0.75),
+                    length_penalty=config.get('length_penalty', 1.0),
+                    repetition_penalty=config.get('repetition_penalty', 5.0),
+                    top_k=config.get('top_k', 50),
+                    top_p=config.get('top_p', 0.85),
+                    speed=config.get('speed', 1.0),
+                    enable_text_splitting=config.get('enable_text_splitting', True),
+                )
+                self.model.synthesizer.save_wav(output['wav'], output_path)
+                results.append(os.path.exists(output_path))
+            except Exception as e:
+                logger.error(f"XTTS synthesis failed: {e}")
+                results.append(False)
+        return results
+
+    def _synthesize_default(self, text: str, output_path: str, config: Dict[str, Any]) -> bool:
+        try:
+            self.model.tts_to_file(
+                text=text,
+                file_path=output_path,
+                language=config.get('language', 'hi'),
+                split_sentences=config.get('enable_text_splitting', True)
+            )
+            return os.path.exists(output_path)
+        except Exception as e:
+            logger.error(f"XTTS synthesis failed: {e}")
+            return False
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+@dataclass
+class SynthesisRequest:
+    """One queued request, completed by the inference thread"""
+    text: str
+    output_path: str
+    config: Dict[str, Any]
+    done: threading.Event = field(default_factory=threading.Event)
+    success: bool = False
+    error: Optional[str] = None
+    abandoned: bool = False
+
+
+class XTTSModelServer:
+    """Serves synthesis over a Unix socket from a single warm model
+
+    Connection handler threads only parse requests and wait; one inference
+    thread owns the model. It coalesces whatever arrives within a short
+    window (up to max_batch_size requests) and runs each voice/language
+    group as one batch. Output is only written inside output_dir (the audio
+    cache), and a client waits at most request_timeout for its result.
+    """
+
+    def __init__(self, socket_path: str, engine: Optional[XTTSEngine] = None,
+                 preload_config: Optional[Dict[str, Any]] = None,
+                 batch_window: Optional[float] = None,
+                 max_batch_size: Optional[int] = None,
+                 output_dir: Optional[str] = None,
+                 request_timeout: Optional[float] = None):
+        cfg = tts_config.xtts_server_config
+        self.socket_path = socket_path
+        self.output_dir = os.path.realpath(output_dir or tts_config.cache_dir)
+        self.request_timeout = cfg.request_timeout if request_timeout is None else request_timeout
+        self.engine = engine or XTTSEngine()
+        self.preload_config = preload_config
+        self.batch_window = cfg.batch_window_ms / 1000 if batch_window is None else batch_window
+        self.max_batch_size = max_batch_size or cfg.max_batch_size
+        self.requests: "queue.Queue[Optional[SynthesisRequest]]" = queue.Queue()
+        self.started_at = time.time()
+        self.served = 0
+        self.failed = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self.busy_seconds = 0.0
+        self._server: Optional[_UnixServer] = None
+        self._inference_thread: Optional[threading.Thread] = None
+
+    def submit(self, text: str, output_path: str, config: Dict[str, Any]) -> SynthesisRequest:
+        request = SynthesisRequest(text=text, output_path=output_path, config=config)
+        self.requests.put(request)
+        return request
+
+    def _allowed_output(self, output_path: str) -> Optional[str]:
+        """Resolved output_path if it lies inside output_dir, else None"""
+        resolved = os.path.realpath(output_path)
+        if os.path.commonpath([resolved, self.output_dir]) != self.output_dir or resolved == self.output_dir:
+            return None
+        return resolved
+
+    def _collect_batch(self, first: SynthesisRequest) -> Tuple[List[SynthesisRequest], bool]:
+        """Gather requests arriving within the batch window; returns (batch, stop)"""
+        batch = [first]
+        deadline = time.time() + self.batch_window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.time()
+            try:
+                request = self.requests.get(timeout=remaining) if remaining > 0 else self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                return batch, True
+            batch.append(request)
+        return batch, False
+
+    @staticmethod
+    def _group_key(request: SynthesisRequest) -> Tuple[str, str, str]:
+        config = request.config
+        return (XTTSEngine._model_id(config), config.get('speaker_wav') or '', config.get('language', 'hi'))
+
+    def _run_batch(self, batch: List[SynthesisRequest]) -> None:
+        # Clients that gave up waiting no longer want their audio
+        batch = [request for request in batch if not request.abandoned]
+        if not batch:
+            return
+
+        groups: Dict[Tuple[str, str, str], List[SynthesisRequest]] = {}
+        for request in batch:
+            groups.setdefault(self._group_key(request), []).append(request)
+
+        start = time.time()
+        for group in groups.values():
+            try:
+                results = self.engine.synthesize_batch(
+                    [(request.text, request.output_path, request.config) for request in group]
+                )
+            except Exception as e:
+                logger.error(f"XTTS batch failed: {e}")
+                results = [False] * len(group)
+
+            for request, success in zip(group, results):
+                request.success = success
+                if success:
+                    self.served += 1
+                else:
+                    request.error = "XTTS synthesis failed"
+                    self.failed += 1
+                request.done.set()
+
+        elapsed = time.time() - start
+        self.busy_seconds += elapsed
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(batch))
+        logger.info(
+            f"XTTS batch of {len(batch)} in {len(groups)} voice group(s): "
+            f"{elapsed:.2f}s ({len(batch) / elapsed if elapsed else 0:.2f} sentences/s)"
+        )
+
+    def _inference_loop(self) -> None:
+        if self.preload_config:
+            self.engine.load(self.preload_config)
+
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+
+            batch, stop = self._collect_batch(request)
+            self._run_batch(batch)
+            if stop:
+                return
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'pid': os.getpid(),
+            'uptime': time.time() - self.started_at,
+            'model': self.engine.model_id,
+            'model_load_seconds': self.engine.load_seconds,
+            'queue_depth': self.requests.qsize(),
+            'served': self.served,
+            'failed': self.failed,
+            'batches': self.batches,
+            'mean_batch_size': (self.served + self.failed) / self.batches if self.batches else 0.0,
+            'largest_batch': self.largest_batch,
+            'busy_seconds': self.busy_seconds,
+            'speaker_latents': self.engine.latent_cache.stats(),
+            'sentences_per_second': self.served / self.busy_seconds if self.busy_seconds else 0.0,
+        }
+
+    def handle(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer one decoded client message"""
+        op = message.get('op')
+        if op == 'ping':
+            return {'ok': True}
+        if op == 'stats':
+            return {'ok': True, 'stats': self.stats()}
+        if op == 'shutdown':
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {'ok': True}
+        if op == 'invalidate_latents':
+            return {'ok': True, 'dropped': self.engine.latent_cache.invalidate(message.get('speaker_wav'))}
+        if op == 'synthesize':
+            output_path = self._allowed_output(message['output_path'])
+            if output_path is None:
+                return {'ok': False, 'error': f"output_path must be inside {self.output_dir}"}
+            request = self.submit(message['text'], output_path, message.get('config', {}))
+            if not request.done.wait(self.request_timeout):
+                request.abandoned = True
+                logger.error(f"XTTS request not done within {self.request_timeout:.0f}s; reporting a timeout")
+                return {'ok': False, 'error': f"XTTS synthesis timed out after {self.request_timeout:.0f}s"}
+            return {'ok': request.success, 'error': request.error}
+        return {'ok': False, 'error': f"Unknown op: {op}"}
+
+    def serve_forever(self) -> None:
+        """Bind the socket and serve until shutdown is requested"""
+        _ensure_private_dir(self.socket_path)
+        if os.path.exists(self.socket_path):
+            # Only reached when no live server answered; the socket is stale
+            os.unlink(self.socket_path)
+
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        reply = server.handle(json.loads(line))
+                    except Exception as e:
+                        reply = {'ok': False, 'error': str(e)}
+                    self.wfile.write((json.dumps(reply) + '\n').encode('utf-8'))
+                    self.wfile.flush()
+
+        self._server = _UnixServer(self.socket_path, Handler)
+        self._inference_thread = threading.Thread(target=self._inference_loop, name="xtts-inference", daemon=True)
+        self._inference_thread.start()
+
+        logger.info(f"XTTS server listening on {self.socket_path} (pid {os.getpid()})")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            self.requests.put(None)
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+
+    def shutdown(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+
+
+class XTTSClient:
+    """Thin client for the XTTS model server"""
+
+    def __init__(self, socket_path: str, request_timeout: float = 300.0):
+        self.socket_path = socket_path
+        self.request_timeout = request_timeout
+
+    def _request(self, message: Dict[str, Any], timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Send one message and return the decoded reply, or None if the server is unreachable"""
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(timeout or self.request_timeout)
+                sock.connect(self.socket_path)
+                sock.sendall((json.dumps(message) + '\n').encode('utf-8'))
+                with sock.makefile('rb') as reply:
+                    line = reply.readline()
+            return json.loads(line) if line else None
+        except (OSError, ValueError):
+            return None
+
+    def ping(self) -> bool:
+        reply = self._request({'op': 'ping'}, timeout=2.0)
+        return bool(reply and reply.get('ok'))
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        reply = self._request({'op': 'stats'}, timeout=2.0)
+        return reply.get('stats') if reply else None
+
+    def shutdown_server(self) -> bool:
+        return self._request({'op': 'shutdown'}, timeout=2.0) is not None
+
+    def invalidate_latents(self, speaker_wav: Optional[str] = None) -> bool:
+        """Make the server re-encode speaker_wav (or every voice) on next use"""
+        return self._request({'op': 'invalidate_latents', 'speaker_wav': speaker_wav}, timeout=2.0) is not None
+
+    def synthesize(self, text: str, output_path: str, config: Dict[str, Any]) -> bool:
+        """Synthesize on the server; output_path must be inside the server's audio cache directory"""
+        reply = self._request({
+            'op': 'synthesize',
+            'text': text,
+            'output_path': os.path.abspath(output_path),
+            'config': config,
+        })
+        if reply is None:
+            logger.error("XTTS server did not answer the synthesis request")
+            return False
+        if not reply.get('ok'):
+            logger.error(f"XTTS server synthesis failed: {reply.get('error')}")
+            return False
+        return os.path.exists(output_path)
+
+    def _spawn(self) -> None:
+        """Start the daemon as a detached process logging next to the socket"""
+        logger.info(f"Starting XTTS model server on {self.socket_path}")
+        with open(f"{self.socket_path}.log", 'ab') as log_file:
+            subprocess.Popen(
+                [sys.executable, str(Path(__file__).resolve()), '--socket', self.socket_path],
+                cwd=str(Path(__file__).parent.parent),
+                stdin=subprocess.DEVNULL,
+                stdout=log_file,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+
+    def _failed_recently(self, retry_after: float) -> bool:
+        """Whether a start attempt, from any process, failed less than retry_after seconds ago"""
+        try:
+            return time.time() - os.path.getmtime(f"{self.socket_path}.failed") < retry_after
+        except OSError:
+            return False
+
+    def ensure_server(self, autostart: bool = True, start_timeout: float = 60.0,
+                      retry_after: float = 300.0) -> bool:
+        """Return True once a server answers, spawning the daemon if allowed
+
+        A failed start is remembered in a marker file next to the socket, so
+        for retry_after seconds every caller falls back at once instead of
+        waiting start_timeout again.
+        """
+        if self.ping():
+            return True
+        if not autostart or self._failed_recently(retry_after):
+            return False
+
+        # Several render processes may race to start the daemon; only one spawns it
+        import fcntl
+        _ensure_private_dir(self.socket_path)
+        with open(f"{self.socket_path}.lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            if self.ping():
+                return True
+            if self._failed_recently(retry_after):
+                return False
+
+            self._spawn()
+            deadline = time.time() + start_timeout
+            while time.time() < deadline:
+                if self.ping():
+                    try:
+                        os.unlink(f"{self.socket_path}.failed")
+                    except FileNotFoundError:
+                        pass
+                    return True
+                time.sleep(0.2)
+
+            Path(f"{self.socket_path}.failed").touch()
+
+        logger.error(f"XTTS model server did not start within {start_timeout}s; "
+                     f"not retrying for {retry_after:.0f}s")
+        return False
+
+
+def main():
+    """Run the XTTS model server in the foreground"""
+    parser = argparse.ArgumentParser(description="Warm XTTS model server")
+    parser.add_argument("--socket", default=tts_config.xtts_server_config.socket_path,
+                        help="Unix socket path to listen on")
+    parser.add_argument("--no-preload", action="store_true",
+                        help="Load the model on the first request instead of at startup")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if XTTSClient(args.socket).ping():
+        logger.error(f"An XTTS server is already listening on {args.socket}")
+        sys.exit(1)
+
+    preload_config = None if args.no_preload else dict(tts_config.xtts_config.__dict__)
+    XTTSModelServer(args.socket, preload_config=preload_config).serve_forever()
+
+if __name__ == "__main__":
+    main()